@@ -0,0 +1,199 @@
+import asyncio
+import math
+from collections import deque
+
+
+class AdmissionClass():
+    '''
+        Concurrency limit with a bounded wait queue for one class of requests.
+
+        Up to limit requests run at once. Further requests wait in FIFO order
+        for at most timeout seconds, and once queue_size of them are waiting
+        new requests are refused right away. A finishing request hands its
+        slot directly to the first waiter, so waiters are never overtaken.
+    '''
+    def __init__(self, name, limit, queue_size, timeout=5.0, retry_after=1.0):
+        self.name = name
+        self._active = 0
+        self._waiters = deque()
+        self.admitted = 0
+        self.rejected = 0
+        self.configure(limit, queue_size, timeout, retry_after)
+
+    def configure(self, limit=None, queue_size=None, timeout=None, retry_after=None):
+        """
+        Update the class settings.
+
+        Args:
+            limit (int, optional): Maximum number of requests in flight.
+            queue_size (int, optional): Maximum number of waiting requests.
+            timeout (float, optional): Maximum seconds a request waits.
+            retry_after (float, optional): Seconds suggested to refused clients.
+
+        Raises:
+            ValueError: If limit is below 1 or queue_size is negative.
+        """
+        if limit is not None:
+            if limit < 1:
+                raise ValueError(f"Admission limit of '{self.name}' must be at least 1, got {limit}")
+            self.limit = limit
+        if queue_size is not None:
+            if queue_size < 0:
+                raise ValueError(f"Admission queue of '{self.name}' must not be negative, got {queue_size}")
+            self.queue_size = queue_size
+        if timeout is not None:
+            self.timeout = timeout
+        if retry_after is not None:
+            self.retry_after = retry_after
+
+    @property
+    def active(self):
+        return self._active
+
+    @property
+    def queued(self):
+        return len(self._waiters)
+
+    async def acquire(self):
+        """
+        Wait for a slot.
+
+        Returns:
+            bool: True if the request was admitted and must call release(),
+            False if it was refused because the queue is full or it waited
+            longer than the timeout.
+        """
+        if self._active < self.limit and not self._waiters:
+            self._active += 1
+            self.admitted += 1
+            return True
+        if len(self._waiters) >= self.queue_size:
+            self.rejected += 1
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.timeout)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # the slot was handed over as the timeout fired, wait_for
+                # may still raise, the slot is ours and is used
+                self.admitted += 1
+                return True
+            self.rejected += 1
+            return False
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # the slot was handed over just before the cancellation
+                self.release()
+            raise
+        finally:
+            if not waiter.done() or waiter.cancelled():
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+        self.admitted += 1
+        return True
+
+    def release(self):
+        """
+        Free a slot, or hand it to the first waiter.
+        """
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+        self._active -= 1
+
+    def stats(self):
+        return {
+            'active': self._active,
+            'queued': len(self._waiters),
+            'admitted': self.admitted,
+            'rejected': self.rejected,
+        }
+
+
+class AdmissionController():
+    '''
+        Assigns requests to admission classes by path.
+
+        Every class has its own slots and queue, so a backlog in one class,
+        e.g. slow logins, never takes slots from another one, e.g. cheap
+        calculations. Paths without an entry in routes use the default class.
+    '''
+    def __init__(self, classes, routes=None, default='default', enabled=True):
+        self.enabled = enabled
+        self.classes = {admission_class.name: admission_class for admission_class in classes}
+        self.routes = dict(routes or {})
+        self.default = self.classes[default]
+
+    def configure(self, enabled=None, **classes):
+        """
+        Update the controller and its classes.
+
+        Args:
+            enabled (bool, optional): Switch admission control on or off.
+            **classes (dict): Settings per class name, passed to AdmissionClass.configure.
+        """
+        if enabled is not None:
+            self.enabled = enabled
+        for name, settings in classes.items():
+            self.classes[name].configure(**settings)
+
+    def classify(self, path):
+        """
+        Get the admission class of a request path.
+
+        Args:
+            path (str): The request path.
+
+        Returns:
+            AdmissionClass: The class of the path.
+        """
+        name = self.routes.get(path)
+        return self.classes[name] if name is not None else self.default
+
+    def stats(self):
+        return {name: admission_class.stats() for name, admission_class in self.classes.items()}
+
+
+class AdmissionMiddleware():
+    '''
+        ASGI middleware enforcing an AdmissionController.
+
+        Refused requests get an immediate 503 with a Retry-After header
+        instead of waiting without bound. A slot is held until the response
+        is complete, streaming responses included. WebSocket connections are
+        long-lived and not counted.
+    '''
+    def __init__(self, app, controller):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not self.controller.enabled:
+            await self.app(scope, receive, send)
+            return
+        admission_class = self.controller.classify(scope['path'])
+        if not await admission_class.acquire():
+            await self._reject(send, admission_class.retry_after)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission_class.release()
+
+    @staticmethod
+    async def _reject(send, retry_after):
+        await send({
+            'type': 'http.response.start',
+            'status': 503,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'retry-after', str(math.ceil(retry_after)).encode('ascii')),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': b'{"detail":"Server is overloaded, try again later."}'})
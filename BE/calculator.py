@@ -1,16 +1,20 @@
 import sys
 import argparse
 from calculator_helper import CalculatorHelper
-import calculator_rest_service
+# calculator_rest_service pulls in FastAPI, pydantic and NumPy, so it is only
+# imported for --rest to keep the arithmetic commands fast to start
 
 parser = argparse.ArgumentParser(prog='ProgramName',
       formatter_class=argparse.RawDescriptionHelpFormatter,
-      epilog=('''Example of usage: python calculator.py --add 1 2'''))
+      epilog=('''Example of usage: python calculator.py --add 1 2
+                  python calculator.py --multiply 1 2 3 4
+                  python calculator.py --batch operations.csv
+                  python calculator.py --binary divide a.npy b.npy --output results.npy'''))
 parser.add_argument('-a', '--add',
                     nargs='+',
                     type=float,
                     required=False,
-                    help='Add two numbers.'
+                    help='Add two or more numbers.'
                     )
 parser.add_argument('-s', '--subtract',
                     nargs='+',
@@ -22,7 +26,7 @@ parser.add_argument('-m', '--multiply',
                     nargs='+',
                     type=float,
                     required=False,
-                    help='Multiply two numbers.'
+                    help='Multiply two or more numbers.'
                     )
 parser.add_argument('-d', '--divide',
                     nargs='+',
@@ -30,30 +34,76 @@ parser.add_argument('-d', '--divide',
                     required=False,
                     help='Divide two numbers.'
                     )
+parser.add_argument('-b', '--batch',
+                    nargs='?',
+                    const='-',
+                    metavar='FILE',
+                    help='Evaluate operation,operand1,operand2 rows from a CSV/TSV FILE, or stdin when no FILE is given, and stream result,error rows to stdout.'
+                    )
+parser.add_argument('--delimiter',
+                    help='Column delimiter for --batch, tab for .tsv files and comma otherwise.'
+                    )
+parser.add_argument('--binary',
+                    nargs=3,
+                    metavar=('OPERATION', 'OPERANDS1', 'OPERANDS2'),
+                    help='Apply OPERATION element-wise to two memory-mapped .npy or raw float64 operand files, see --output.'
+                    )
+parser.add_argument('-o', '--output',
+                    metavar='FILE',
+                    help='Result file for --binary, written as .npy when the name ends in .npy and as raw float64 otherwise.'
+                    )
+parser.add_argument('-w', '--workers',
+                    type=int,
+                    default=1,
+                    help='Worker processes for --batch and --binary, 1 is default.'
+                    )
 parser.add_argument('-r', '--rest',
                     action='store_true',
                     help='Start the calculate REST service with default settings.'
                     )
 
 
-args = parser.parse_args()
+# unknown options are forwarded to the REST service, see calculator_rest_service.main
+args, rest_args = parser.parse_known_args()
+if rest_args and not args.rest:
+    parser.error(f"unrecognized arguments: {' '.join(rest_args)}")
+
+if args.binary and not args.output:
+    parser.error('--binary requires --output')
+if args.workers < 1:
+    parser.error('--workers must be at least 1')
 
-if not args.rest and len(sys.argv) != 4:
+# exactly one arithmetic option, --add and --multiply take two or more numbers
+commands = [operands for operands in (args.add, args.subtract, args.multiply, args.divide) if operands]
+operand_count = len(sys.argv) - 2
+valid_command = (len(commands) == 1 and len(commands[0]) == operand_count
+                 and (operand_count == 2 or (operand_count > 2 and bool(args.add or args.multiply))))
+if not (args.rest or args.batch or args.binary or valid_command):
     print("Wrong number of arguments provided, try again!\n")
     parser.print_help()
     sys.exit()
 
 if (args.add):
-    result = CalculatorHelper().add(args.add[0], args.add[1])
-    print(f'Addition result: {args.add[0]}+{args.add[1]}={result}')
+    result = CalculatorHelper().sum(args.add)
+    print(f"Addition result: {'+'.join(map(str, args.add))}={result}")
 elif (args.subtract):
     result = CalculatorHelper().subtract(args.subtract[0], args.subtract[1])
     print(f'Subtraction result: {args.subtract[0]}-{args.subtract[1]}={result}')
 elif (args.multiply):
-    result = CalculatorHelper().multiply(args.multiply[0], args.multiply[1])
-    print(f'Multiplication result: {args.multiply[0]}*{args.multiply[1]}={result}')
+    result = CalculatorHelper().product(args.multiply)
+    print(f"Multiplication result: {'*'.join(map(str, args.multiply))}={result}")
 elif (args.divide):
     result = CalculatorHelper().divide(args.divide[0], args.divide[1])
     print(f'Division result: {args.divide[0]}/{args.divide[1]}={result}')
+elif (args.batch):
+    import calculator_batch
+    calculator_batch.main(args.batch, args.delimiter, args.workers)
+elif (args.binary):
+    import calculator_batch
+    try:
+        calculator_batch.run_binary(*args.binary, args.output, workers=args.workers)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
 elif (args.rest):
+    import calculator_rest_service
     calculator_rest_service.main(args)
\ No newline at end of file
@@ -0,0 +1,481 @@
+import csv
+import io
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+
+import numpy as np
+
+import calculator_vectorized
+
+# Rows parsed and evaluated together, bounds memory use independent of the input size.
+CHUNK_SIZE = 65536
+
+# Operator symbols accepted next to the operation names.
+ALIASES = {'+': 'add', '-': 'subtract', '*': 'multiply', '/': 'divide'}
+
+HEADER = ('operation', 'operand1', 'operand2')
+
+# Elements per chunk in binary mode, 8 MiB of float64 per operand.
+BINARY_CHUNK_SIZE = 1 << 20
+
+# Bytes of CSV input per task when a file is split across worker processes.
+RANGE_SIZE = 1 << 20
+
+# Tasks in flight per worker, bounds the results waiting to be written in order.
+PREFETCH = 2
+
+
+def read_chunks(lines, chunk_size=CHUNK_SIZE):
+    """
+    Group an iterable of lines into lists of at most chunk_size lines.
+
+    Args:
+        lines (Iterable[str]): Input lines, e.g. a file object.
+        chunk_size (int): Maximum lines per chunk.
+
+    Yields:
+        list[str]: The next chunk of lines.
+    """
+    lines = iter(lines)
+    while True:
+        chunk = list(islice(lines, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_tasks(function, tasks, workers=1):
+    """
+    Run tasks, in worker processes when workers > 1, and yield their results in order.
+
+    Tasks only carry small arguments such as file names and offsets, the
+    workers read their data from the files themselves. At most
+    workers * PREFETCH tasks are in flight, so a slow consumer does not let
+    finished results pile up in memory.
+
+    Args:
+        function (Callable): A picklable, module-level function.
+        tasks (Iterable[tuple]): Argument tuples, consumed lazily.
+        workers (int): Number of worker processes, 1 runs in this process.
+
+    Yields:
+        The result of function(*task) for every task, in task order.
+    """
+    if workers <= 1:
+        for task in tasks:
+            yield function(*task)
+        return
+    with ProcessPoolExecutor(workers) as executor:
+        pending = deque()
+        for task in tasks:
+            pending.append(executor.submit(function, *task))
+            if len(pending) >= workers * PREFETCH:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def operation_code(name):
+    """
+    Get the operation code for an operation name or symbol.
+
+    Args:
+        name (str): e.g. 'add' or '+'.
+
+    Returns:
+        int: The code, see calculator_vectorized.OPERATIONS.
+
+    Raises:
+        KeyError: If the operation is unknown.
+    """
+    name = name.strip()
+    return calculator_vectorized.CODES[ALIASES.get(name, name)]
+
+
+def parse_chunk(lines, delimiter):
+    """
+    Parse a chunk of 'operation,operand1,operand2' rows into arrays.
+
+    Blank lines are skipped. If any row of the chunk is malformed the whole
+    chunk is parsed again row by row, so that only the bad rows fail.
+
+    Args:
+        lines (list[str]): The rows of one chunk.
+        delimiter (str): Column delimiter.
+
+    Returns:
+        tuple: Operation codes, left operands, right operands and a list of
+        per-row parse errors (None for good rows).
+    """
+    rows = [row for row in csv.reader(lines, delimiter=delimiter) if row]
+    if not rows or any(len(row) != 3 for row in rows):
+        return parse_rows(rows, delimiter)
+    try:
+        operations, operands1, operands2 = zip(*rows)
+        # look up each distinct operation once and broadcast its code
+        names, inverse = np.unique(np.array(operations, dtype=str), return_inverse=True)
+        codes = np.array([operation_code(name) for name in names.tolist()], dtype=np.int8)[inverse]
+        return (codes,
+                np.array(operands1, dtype=np.float64),
+                np.array(operands2, dtype=np.float64),
+                [None] * len(rows))
+    except (KeyError, ValueError):
+        return parse_rows(rows, delimiter)
+
+
+def parse_rows(rows, delimiter):
+    """
+    Parse rows one at a time, recording an error for every malformed row.
+
+    Args:
+        rows (list[list[str]]): The split rows.
+        delimiter (str): Column delimiter, used in error messages.
+
+    Returns:
+        tuple: Operation codes, left operands, right operands and errors, see parse_chunk.
+    """
+    codes = np.zeros(len(rows), dtype=np.int8)
+    operands1 = np.zeros(len(rows), dtype=np.float64)
+    operands2 = np.zeros(len(rows), dtype=np.float64)
+    errors = [None] * len(rows)
+    for i, row in enumerate(rows):
+        try:
+            operation, operand1, operand2 = row
+            codes[i] = operation_code(operation)
+            operands1[i] = float(operand1)
+            operands2[i] = float(operand2)
+        except KeyError:
+            errors[i] = f"Unknown operation '{row[0]}'."
+        except ValueError:
+            errors[i] = f"Invalid row '{delimiter.join(row)}', expected operation{delimiter}operand1{delimiter}operand2."
+    return codes, operands1, operands2, errors
+
+
+def evaluate_chunk(lines, delimiter):
+    """
+    Evaluate one chunk of rows.
+
+    Args:
+        lines (list[str]): The rows of one chunk.
+        delimiter (str): Column delimiter.
+
+    Returns:
+        str: One 'result<delimiter>error' output line per input row. Failed
+        rows have the error messages of calculator_vectorized.calculate_batch(),
+        quoted when they contain the delimiter.
+    """
+    codes, operands1, operands2, errors = parse_chunk(lines, delimiter)
+    results, zero_division = calculator_vectorized.calculate(codes, operands1, operands2)
+    rows = [(value, '') for value in results.tolist()]
+    for i in np.flatnonzero(zero_division | ~np.isfinite(results)).tolist():
+        error = calculator_vectorized.ZERO_DIVISION if zero_division[i] else calculator_vectorized.NOT_FINITE
+        rows[i] = ('', error)
+    for i, error in enumerate(errors):
+        if error is not None:
+            rows[i] = ('', error)
+    output = io.StringIO()
+    csv.writer(output, delimiter=delimiter, lineterminator='\n').writerows(rows)
+    return output.getvalue()
+
+
+def is_header(line, delimiter):
+    """
+    Check whether a line is the 'operation,operand1,operand2' header row.
+
+    Args:
+        line (str): The first input line.
+        delimiter (str): Column delimiter.
+
+    Returns:
+        bool: True for a header row.
+    """
+    return tuple(column.strip() for column in line.rstrip('\r\n').split(delimiter)) == HEADER
+
+
+def write_results(results, out):
+    """
+    Write evaluated chunks to out.
+
+    Args:
+        results (Iterable[str]): Output of evaluate_chunk(), in input order.
+        out (TextIO): Output stream.
+
+    Returns:
+        int: The number of rows written.
+    """
+    count = 0
+    for text in results:
+        out.write(text)
+        count += text.count('\n')
+    return count
+
+
+def run_batch(lines, out, delimiter=',', chunk_size=CHUNK_SIZE, workers=1):
+    """
+    Stream rows from lines through the vectorized calculator to out.
+
+    Rows are read, parsed and evaluated chunk by chunk, so memory use stays
+    constant no matter how large the input is. An optional header row
+    'operation,operand1,operand2' is answered with a 'result,error' header.
+    With workers > 1 the chunks are sent to worker processes, prefer
+    run_file() for files, which does not have to send the rows along.
+
+    Args:
+        lines (Iterable[str]): Input rows, e.g. a file object or sys.stdin.
+        out (TextIO): Output stream for the results.
+        delimiter (str): Column delimiter for input and output (default=',').
+        chunk_size (int): Rows evaluated per chunk.
+        workers (int): Number of worker processes (default=1).
+
+    Returns:
+        int: The number of rows evaluated.
+    """
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None:
+        return 0
+    if is_header(first, delimiter):
+        out.write(f'result{delimiter}error\n')
+    else:
+        lines = chain([first], lines)
+    tasks = ((chunk, delimiter) for chunk in read_chunks(lines, chunk_size))
+    return write_results(run_tasks(evaluate_chunk, tasks, workers), out)
+
+
+def split_file(path, begin=0, size=RANGE_SIZE):
+    """
+    Split a file into byte ranges of about size bytes that end on a line break.
+
+    Args:
+        path (str): The file.
+        begin (int): Offset of the first range.
+        size (int): Approximate range size in bytes.
+
+    Yields:
+        tuple[int, int]: Begin and end offset of the next range.
+    """
+    with open(path, 'rb') as file:
+        length = os.fstat(file.fileno()).st_size
+        while begin < length:
+            file.seek(min(begin + size, length))
+            file.readline()
+            end = min(file.tell(), length)
+            yield begin, end
+            begin = end
+
+
+def evaluate_range(path, begin, end, delimiter):
+    """
+    Evaluate the rows in a byte range of a file, see split_file().
+
+    Args:
+        path (str): The input file.
+        begin (int): Offset of the first row.
+        end (int): Offset after the last row.
+        delimiter (str): Column delimiter.
+
+    Returns:
+        str: The output lines, see evaluate_chunk().
+    """
+    with open(path, 'rb') as file:
+        file.seek(begin)
+        data = file.read(end - begin)
+    return evaluate_chunk(data.decode().splitlines(), delimiter)
+
+
+def run_file(path, out, delimiter=',', workers=1, range_size=RANGE_SIZE):
+    """
+    Evaluate a CSV/TSV file, see run_batch().
+
+    With workers > 1 the file is split into byte ranges and every worker
+    reads its own range, so only offsets travel to the workers and the
+    output chunks are written back in input order.
+
+    Args:
+        path (str): The input file.
+        out (TextIO): Output stream for the results.
+        delimiter (str): Column delimiter for input and output (default=',').
+        workers (int): Number of worker processes (default=1).
+        range_size (int): Approximate bytes per worker task.
+
+    Returns:
+        int: The number of rows evaluated.
+    """
+    if workers <= 1:
+        with open(path, newline='') as lines:
+            return run_batch(lines, out, delimiter)
+    with open(path, 'rb') as file:
+        first = file.readline()
+    begin = 0
+    if is_header(first.decode(), delimiter):
+        out.write(f'result{delimiter}error\n')
+        begin = len(first)
+    tasks = ((path, start, end, delimiter) for start, end in split_file(path, begin, range_size))
+    return write_results(run_tasks(evaluate_range, tasks, workers), out)
+
+
+def open_operands(path):
+    """
+    Memory-map an operand file without reading it.
+
+    Args:
+        path (str): A .npy file, or any other file holding raw native float64 values.
+
+    Returns:
+        numpy.memmap | numpy.ndarray: A read-only map of the file, empty for an
+        empty raw file.
+    """
+    if path.lower().endswith('.npy'):
+        return np.load(path, mmap_mode='r')
+    if os.path.getsize(path) == 0:
+        # mmap cannot map an empty file
+        return np.empty(0, dtype=np.float64)
+    return np.memmap(path, dtype=np.float64, mode='r')
+
+
+def create_output(path, length):
+    """
+    Create a float64 output file of the given length.
+
+    Args:
+        path (str): A .npy file, or any other name for a raw float64 file.
+        length (int): Number of results.
+
+    Returns:
+        numpy.memmap | numpy.ndarray: A writable map of the new file, empty
+        for an empty raw file.
+    """
+    if path.lower().endswith('.npy'):
+        return np.lib.format.open_memmap(path, mode='w+', dtype=np.float64, shape=(length,))
+    if length == 0:
+        open(path, 'wb').close()
+        return np.empty(0, dtype=np.float64)
+    return np.memmap(path, dtype=np.float64, mode='w+', shape=(length,))
+
+
+def layout(array):
+    """
+    Describe where the data of a memory-mapped file lives.
+
+    Args:
+        array (numpy.memmap): A map returned by open_operands() or create_output().
+
+    Returns:
+        tuple: File name, dtype string and offset of the first element, see map_window().
+    """
+    return array.filename, array.dtype.str, array.offset
+
+
+def map_window(file, start, end, mode='r'):
+    """
+    Map elements [start, end) of a memory-mapped file on their own.
+
+    Pages of a mapping count towards the resident memory until it is unmapped,
+    so chunks are read and written through short-lived windows instead of one
+    mapping of the whole file.
+
+    Args:
+        file (tuple): The file, see layout().
+        start (int): First element, in storage order.
+        end (int): End element, in storage order.
+        mode (str): 'r' for operands, 'r+' for results.
+
+    Returns:
+        numpy.memmap: The window.
+    """
+    filename, dtype, offset = file
+    dtype = np.dtype(dtype)
+    return np.memmap(filename, dtype=dtype, mode=mode, shape=(end - start,),
+                     offset=offset + start * dtype.itemsize)
+
+
+def evaluate_window(code, operands1, operands2, results, start, end):
+    """
+    Evaluate elements [start, end) of the operand files into the result file.
+
+    Args:
+        code (int): Operation code, see calculator_vectorized.OPERATIONS.
+        operands1 (tuple): Left operand file, see layout().
+        operands2 (tuple): Right operand file, see layout().
+        results (tuple): Result file, see layout().
+        start (int): First element.
+        end (int): End element.
+
+    Returns:
+        int: The number of evaluated elements.
+    """
+    a = map_window(operands1, start, end)
+    b = map_window(operands2, start, end)
+    out = map_window(results, start, end, mode='r+')
+    with np.errstate(all='ignore'):
+        calculator_vectorized.UFUNCS[code](a, b, out=out, casting='unsafe')
+    if code == calculator_vectorized.DIVIDE:
+        out[b == 0] = np.nan
+    return end - start
+
+
+def run_binary(operation, path1, path2, output, chunk_size=BINARY_CHUNK_SIZE, workers=1):
+    """
+    Apply one operation element-wise to two binary operand files.
+
+    The operands and the results are memory-mapped and processed chunk by
+    chunk, so nothing is parsed or copied into Python objects and the
+    resident memory stays small even for files larger than RAM. Multi
+    dimensional .npy operands are processed in storage order and the
+    results are written as a flat array. Divisions by zero produce NaN.
+    With workers > 1 the chunks are evaluated by worker processes that map
+    the same files, so no operand or result data is sent between processes.
+
+    Args:
+        operation (str): Operation name or symbol, e.g. 'divide' or '/'.
+        path1 (str): Left operands, see open_operands().
+        path2 (str): Right operands, see open_operands().
+        output (str): Result file, see create_output().
+        chunk_size (int): Elements evaluated per chunk.
+        workers (int): Number of worker processes (default=1).
+
+    Returns:
+        int: The number of results written.
+
+    Raises:
+        ValueError: If the operation is unknown or the operand files differ in length.
+    """
+    try:
+        code = operation_code(operation)
+    except KeyError:
+        raise ValueError(f"Unknown operation '{operation}'.")
+    operands1 = open_operands(path1)
+    operands2 = open_operands(path2)
+    if operands1.size != operands2.size:
+        raise ValueError(f"Operand files differ in length: {path1} has {operands1.size} "
+                         f"values, {path2} has {operands2.size}.")
+    length = operands1.size
+    results = create_output(output, length)
+    if length == 0:
+        return 0
+    files = (layout(operands1), layout(operands2), layout(results))
+    del operands1, operands2, results
+    tasks = ((code, *files, start, min(start + chunk_size, length))
+             for start in range(0, length, chunk_size))
+    return sum(run_tasks(evaluate_window, tasks, workers))
+
+
+def main(path, delimiter=None, workers=1):
+    """
+    Entry point for 'calculator.py --batch'.
+
+    Args:
+        path (str): Input file, '-' for stdin.
+        delimiter (str, optional): Column delimiter. Defaults to tab for .tsv
+            files and comma otherwise.
+        workers (int): Number of worker processes (default=1).
+    """
+    if delimiter is None:
+        delimiter = '\t' if path.lower().endswith('.tsv') else ','
+    if path == '-':
+        run_batch(sys.stdin, sys.stdout, delimiter, workers=workers)
+    else:
+        run_file(path, sys.stdout, delimiter, workers)
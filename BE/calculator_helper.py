@@ -1,3 +1,22 @@
+import math
+import operator
+from itertools import accumulate
+from passwords import hasher
+from sessions import SessionStore
+from storage import InMemoryStorage
+
+# binary operations by name, the C implementations keep scan() a tight loop
+OPERATORS = {
+    'add': operator.add,
+    'subtract': operator.sub,
+    'multiply': operator.mul,
+    'divide': operator.truediv,
+}
+
+# scrypt hash of the default admin password 'test1234', precomputed so that
+# creating the helper does not pay for a password hash
+ADMIN_PASSWORD_HASH = 'scrypt$14$Nan/buave/gLU1Bjjf815w==$Ymqkdr8eM5wYWyAS3y32kHPdk3A5MO9J7hxNDb5GI4M='
+
 class CalculatorHelper(): 
     _instance = None
     _is_initialized = False
@@ -9,12 +28,32 @@ class CalculatorHelper():
 
     def __init__(self):
         if not self._is_initialized:
-            self._user_list = []
-            self._current_user = None
-            admin = self.User('admin','test1234')
-            self._user_list.append(admin)
+            # password hashing, the shared hasher unless replaced on the instance
+            self.hasher = hasher
+            self._sessions = SessionStore()
+            self.use_storage(InMemoryStorage())
             self._is_initialized = True
 
+    @classmethod
+    def reset(cls):
+        '''
+            Replace the shared instance with a fresh one: new sessions and a
+            new in-memory storage holding only the admin account. Tests use
+            it so that no users or sessions leak from one test to the next.
+            The old storage is left open, its owner closes it.
+        '''
+        cls._instance = None
+        return cls()
+
+    def use_storage(self, storage):
+        '''
+            Switch the storage backend for users and sessions.
+            The admin account is created in it unless it already exists.
+        '''
+        self._storage = storage
+        self._sessions.configure(backend=storage)
+        storage.add_user('admin', ADMIN_PASSWORD_HASH)
+
     class User():
         '''
             Represents a user in the calculator.
@@ -38,25 +77,110 @@ class CalculatorHelper():
     def divide(self, a, b):
         return a / b
 
+    def sum(self, values):
+        '''
+            Exactly rounded sum, math.fsum tracks the partial sums so no
+            precision is lost to cancellation, unlike a left fold of add().
+            fsum raises OverflowError when a partial sum overflows, even if
+            the exact sum is finite, the sum is then taken of scaled values.
+            It is +-inf only when the exact sum is out of range.
+        '''
+        try:
+            return math.fsum(values)
+        except OverflowError:
+            total, scale = self._scaled_fsum(values)
+            return total * scale
+
+    @staticmethod
+    def _scaled_fsum(values):
+        # scaled down by a power of two no smaller than the count, no partial
+        # sum can overflow and the scaling is exact apart from subnormals
+        scale = 2.0 ** len(values).bit_length()
+        return math.fsum(value / scale for value in values), scale
+
+    def product(self, values):
+        return float(math.prod(values))
+
+    def min(self, values):
+        if not values:
+            raise ValueError('min of an empty sequence')
+        return float(min(values))
+
+    def max(self, values):
+        if not values:
+            raise ValueError('max of an empty sequence')
+        return float(max(values))
+
+    def mean(self, values):
+        if not values:
+            raise ValueError('mean of an empty sequence')
+        total = self.sum(values)
+        if math.isinf(total) and all(math.isfinite(value) for value in values):
+            # the sum overflows, the mean of finite values never does
+            total, scale = self._scaled_fsum(values)
+            return total * (scale / len(values))
+        return total / len(values)
+
+    def scan(self, operation, values):
+        '''
+            All prefix results of applying a binary operation from left to
+            right, e.g. running totals for 'add': [1, 2, 3] -> [1, 3, 6].
+        '''
+        return list(accumulate(map(float, values), OPERATORS[operation]))
+
     def register_user(self, username, password):
-        for user in self._user_list:
-            if(user.username == username):
-                return None
-        user = self.User(username, password)
-        self._user_list.append(user)
+        '''
+            Only the password hash is stored. Taken usernames are rejected
+            before hashing, so they do not cost a hash.
+        '''
+        if self._storage.get_password(username) is not None:
+            return None
+        if not self._storage.add_user(username, self.hasher.hash(password)):
+            return None
         return username
 
+    def get_user(self, username):
+        password = self._storage.get_password(username)
+        return self.User(username, password) if password is not None else None
+
     def login(self, username, password):
-        for user in self._user_list:
-            if(user.username == username and user.password == password):
-                self._current_user = user
-                return username
-        return None
-
-    def logout(self):
-        user = self._current_user
-        self._current_user = None
-        return user
-
-    def get_current_user(self):
-        return self._current_user
\ No newline at end of file
+        '''
+            Verify the password against the stored hash. Legacy plaintext
+            passwords and hashes with outdated settings are replaced by a
+            current hash on success.
+        '''
+        stored = self._storage.get_password(username)
+        if stored is None:
+            # as slow as a wrong password, the timing does not reveal the user
+            self.hasher.verify_dummy(password)
+            return None
+        if not self.hasher.verify(password, stored):
+            return None
+        if self.hasher.needs_rehash(stored):
+            self._storage.set_password(username, self.hasher.hash(password))
+        return username
+
+    def user_count(self):
+        return self._storage.count_users()
+
+    @property
+    def storage(self):
+        return self._storage
+
+    @property
+    def sessions(self):
+        return self._sessions
+
+    def create_session(self, username):
+        return self._sessions.create(username)
+
+    def logout(self, token):
+        username = self._sessions.revoke(token)
+        return self.get_user(username) if username is not None else None
+
+    def get_current_user(self, token):
+        username = self._sessions.get(token)
+        return self.get_user(username) if username is not None else None
+
+    def expire_sessions(self, limit=1000):
+        return self._sessions.expire(limit)
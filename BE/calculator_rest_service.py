@@ -1,39 +1,147 @@
-import time
-from fastapi import FastAPI
+import asyncio
+import json
+import math
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import FastAPI, Depends, Header, Cookie, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.requests import HTTPConnection
+from fastapi.routing import APIRoute, APIWebSocketRoute
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, PlainTextResponse
 from fastapi import HTTPException
-import numpy as np
 
+from admission import AdmissionClass, AdmissionController, AdmissionMiddleware
 from calculator_helper import CalculatorHelper
+from latency import LatencyInjector, LatencyProfile
+from loop_monitor import LoopMonitor
+from rate_limit import RateLimits, RateLimitMiddleware
+from sqlite_storage import SQLiteStorage
+import expression
+import metrics
+import models
+import ndjson
+import passwords
+
+from models import Calculation, BatchCalculation, Reduction, Scan, Expression, User, ResultResponse, BatchResultResponse, ScanResultResponse, CacheStatsResponse, UserResponse, ErrorResponse
+
+# artificial per-route latency keyed by operation id, see inject_latency, the
+# login delay simulates a slow authentication backend
+latency = LatencyInjector(profiles={
+    'login': LatencyProfile('normal', mean=2, stddev=1, min=1, max=4),
+})
+
+# per-client and per-username token buckets, checked before routing
+rate_limits = RateLimits()
+
+# concurrency limits with bounded queues, logins and streams get their own
+# slots so that a backlog of them cannot hold up cheap calculations
+admission = AdmissionController([
+    AdmissionClass('default', limit=64, queue_size=256),
+    AdmissionClass('login', limit=16, queue_size=64),
+    AdmissionClass('stream', limit=16, queue_size=0),
+], routes={'/login': 'login', '/register': 'login', '/calculate/stream': 'stream'})
+
+# service gauges, the user count is refreshed by /metrics as it may query the database
+users_gauge = metrics.registry.register(metrics.Gauge(
+    'calculator_users', 'Registered users.'))
+metrics.registry.register(metrics.Gauge(
+    'calculator_sessions', 'Open sessions held in memory.', callback=lambda: len(CalculatorHelper().sessions)))
+metrics.registry.register(metrics.Gauge(
+    'calculator_admission_active', 'Requests in flight by admission class.', ('class',),
+    callback=lambda: {(name,): stats['active'] for name, stats in admission.stats().items()}))
+metrics.registry.register(metrics.Gauge(
+    'calculator_admission_queued', 'Requests waiting for a slot by admission class.', ('class',),
+    callback=lambda: {(name,): stats['queued'] for name, stats in admission.stats().items()}))
+metrics.registry.register(metrics.Counter(
+    'calculator_admission_rejected_total', 'Requests shed with 503 by admission class.', ('class',),
+    callback=lambda: {(name,): stats['rejected'] for name, stats in admission.stats().items()}))
+metrics.registry.register(metrics.Gauge(
+    'calculator_rate_limit_keys', 'Tracked rate limit buckets.', ('bucket',),
+    callback=lambda: {('client',): len(rate_limits.clients), ('username',): len(rate_limits.usernames)}))
+
+# logs the stack of whatever blocks the event loop for longer than the threshold
+loop_monitor = LoopMonitor(interval=0.1, threshold=0.1)
+
+# name of the cookie carrying the session token for browser clients
+SESSION_COOKIE = 'session'
+
+async def expire_sessions(interval=5, batch=1000):
+    """
+    Periodically remove expired sessions.
+
+    Expired sessions are removed in small batches and the event loop is
+    yielded between batches, so there is never a stop-the-world sweep.
+    Sessions in the storage backend are purged in a worker thread.
 
-from models import Calculation, User, ResultResponse, UserResponse, ErrorResponse
+    Args:
+        interval (float): Seconds between expiry rounds (default=5).
+        batch (int): Maximum sessions removed before yielding (default=1000).
+    """
+    while True:
+        await asyncio.sleep(interval)
+        while CalculatorHelper().expire_sessions(batch) == batch:
+            await asyncio.sleep(0)
+        await run_in_threadpool(CalculatorHelper().sessions.purge)
 
-def normal_dist_sleep(mean=2, stddev=1, min_sleep=1, max_sleep=4):
+@asynccontextmanager
+async def lifespan(app):
+    """
+    Start and stop the background tasks of the API.
+
+    Args:
+        app (FastAPI): The application.
+    """
+    tasks = [asyncio.create_task(expire_sessions())]
+    loop_monitor.start()
+    yield
+    await loop_monitor.stop()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+def session_token(authorization: Optional[str] = Header(None), session: Optional[str] = Cookie(None)):
     """
-    Sleep for a random time drawn from a normal distribution.
+    Extract the session token of a request.
 
     Args:
-        mean (float): Mean value of the normal distribution (default=2).
-        stddev (float): Standard deviation of the distribution (default=1).
-        min_sleep (float): Minimum allowed sleep duration in seconds (default=1).
-        max_sleep (float): Maximum allowed sleep duration in seconds (default=4).
+        authorization (str, optional): 'Bearer <token>' Authorization header.
+        session (str, optional): Session cookie, used when there is no header.
 
-    The function will keep sampling until the generated value falls within
-    the allowed range, then sleep for that duration.
+    Returns:
+        str | None: The session token if the request carries one.
     """
-    while True:
-        # Generate a sleep time from a normal distribution
-        sleep_time = np.random.normal(mean, stddev)
-        # Check if the sleep time is within the allowed range
-        if min_sleep <= sleep_time <= max_sleep:
-            break  # If it's within the range, proceed
+    if authorization:
+        scheme, _, token = authorization.partition(' ')
+        if scheme.lower() == 'bearer' and token.strip():
+            return token.strip()
+    return session
+
+def route_name(route):
+    return getattr(route, 'operation_id', None) or route.name
+
+async def inject_latency(connection: HTTPConnection):
+    """
+    Delay a request by the latency profile of its route, see LatencyInjector.
+
+    Args:
+        connection (HTTPConnection): The request or WebSocket, its route is
+            named by the operation id, e.g. 'login' or 'calculate'.
+    """
+    route = connection.scope.get('route')
+    if route is not None:
+        await latency.delay(route_name(route))
 
-    # Sleep for the computed duration
-    time.sleep(sleep_time)
+# init FastAPI app, every route gets the latency of its profile
+app = FastAPI(title='Calculator', docs_url='/', description="Calculator API", version='1.0.0', lifespan=lifespan,
+              dependencies=[Depends(inject_latency)])
 
-# init FastAPI app
-app = FastAPI(title='Calculator', docs_url='/', description="Calculator API", version='1.0.0')
+# Middleware added last runs first: metrics, CORS, then rate limiting, then
+# admission control. Over-limit requests are rejected before any parsing and
+# before they take an admission slot, rejections still carry the CORS headers
+# and every request, rejected or not, is counted.
+app.add_middleware(AdmissionMiddleware, controller=admission)
+app.add_middleware(RateLimitMiddleware, limits=rate_limits)
 
 # Configure CORS
 app.add_middleware(
@@ -44,6 +152,9 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+# Count and time every request, see metrics.MetricsMiddleware
+app.add_middleware(metrics.MetricsMiddleware, routes=app.routes)
+
 # defining exceptional JSON-response
 @app.exception_handler(Exception)
 async def error_handler(request, exc):
@@ -81,6 +192,224 @@ async def calc(body: Calculation):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get('/calculate/cache', operation_id='calculate_cache', summary='Calculation result cache statistics', response_model=CacheStatsResponse, tags=["actions"])
+async def calc_cache():
+    """
+    Get the hit, miss and eviction counters of the calculation result cache.
+
+    Returns:
+        CacheStatsResponse: The cache statistics, all zero when the cache is disabled.
+    """
+    if models.result_cache is None:
+        return CacheStatsResponse()
+    return CacheStatsResponse(**models.result_cache.stats())
+
+@app.post('/calculate/batch', operation_id='calculate_batch', summary='Vectorized batch of arithmetic calculations', response_model=BatchResultResponse, tags=["actions"], responses={500: {"model": ErrorResponse}})
+async def calc_batch(body: BatchCalculation):
+    """
+    Perform a batch of arithmetic calculations in one request.
+
+    Each operation group is evaluated as a single NumPy ufunc call. Elements
+    that fail, e.g. division by zero, get a None result and an error message
+    at the same index instead of failing the whole batch.
+
+    Args:
+        body (BatchCalculation): Parallel arrays of operations and operands.
+
+    Returns:
+        BatchResultResponse: Results and per-element errors in input order.
+
+    Raises:
+        HTTPException: 500 if the batch fails.
+    """
+    try:
+        result = body.calculate()
+        return result
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post('/reduce', operation_id='reduce', summary='N-ary sum, product, min, max or mean', response_model=ResultResponse, tags=["actions"], responses={500: {"model": ErrorResponse}})
+async def reduce(body: Reduction):
+    """
+    Reduce any number of operands with one operation.
+
+    Sums and means use exactly rounded summation (math.fsum), so large
+    reductions lose no precision to cancellation.
+
+    Args:
+        body (Reduction): The operation and its operands.
+
+    Returns:
+        ResultResponse: The result of the reduction.
+
+    Raises:
+        HTTPException: 500 if the reduction fails, e.g. min of no operands.
+    """
+    try:
+        result = body.calculate()
+        return result
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post('/scan', operation_id='scan', summary='Prefix scan (running totals) of an operation', response_model=ScanResultResponse, tags=["actions"], responses={500: {"model": ErrorResponse}})
+async def scan(body: Scan):
+    """
+    Apply an operation from left to right and return every prefix result.
+
+    Replaces a chain of dependent /calculate calls, e.g. a running total is
+    the 'add' scan of the values: [1, 2, 3] gives [1, 3, 6].
+
+    Args:
+        body (Scan): The operation and its operands.
+
+    Returns:
+        ScanResultResponse: One result per operand, the first is the first operand.
+
+    Raises:
+        HTTPException: 500 if the scan fails, e.g. on division by zero.
+    """
+    try:
+        result = body.calculate()
+        return result
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def calculate_lines(lines):
+    """
+    Calculate each NDJSON Calculation record as it arrives.
+
+    Args:
+        lines (AsyncIterable[bytes]): One JSON encoded Calculation per item.
+
+    Yields:
+        str: One JSON encoded ResultResponse or ErrorResponse line per record.
+    """
+    try:
+        async for line in lines:
+            try:
+                result = Calculation.model_validate_json(line).calculate()
+            except Exception as e:
+                result = ErrorResponse(detail=str(e))
+            yield result.model_dump_json() + '\n'
+    except ndjson.LineTooLongError as e:
+        yield ErrorResponse(detail=str(e)).model_dump_json() + '\n'
+
+@app.post('/calculate/stream', operation_id='calculate_stream', summary='Streaming arithmetic calculations (NDJSON)', tags=["actions"],
+          response_class=ndjson.NDJSONStreamingResponse,
+          responses={200: {"content": {ndjson.MEDIA_TYPE: {"schema": ResultResponse.model_json_schema()}}}},
+          openapi_extra={"requestBody": {"required": True, "content": {ndjson.MEDIA_TYPE: {"schema": Calculation.model_json_schema()}}}})
+async def calc_stream(request: Request):
+    """
+    Perform calculations streamed as newline-delimited JSON.
+
+    The request body is read incrementally, one Calculation per line, and a
+    ResultResponse line is streamed back as soon as each one is computed.
+    Failed records produce an ErrorResponse line instead. Only the current
+    line is buffered, so memory stays flat for streams of any length, and
+    as the body is only read as fast as results are written, TCP flow
+    control pushes back on clients that send faster than they read.
+
+    Args:
+        request (Request): The request with the NDJSON body.
+
+    Returns:
+        NDJSONStreamingResponse: One JSON line per input line, in input order.
+    """
+    return ndjson.NDJSONStreamingResponse(calculate_lines(ndjson.read_lines(request.stream())))
+
+def calculate_message(message):
+    """
+    Calculate one WebSocket calculation message.
+
+    Args:
+        message (str): A JSON encoded Calculation with an optional 'id'.
+
+    Returns:
+        str: JSON encoded reply carrying the same 'id' and either 'result',
+        null if it is not finite, or 'detail' if the calculation failed.
+    """
+    try:
+        data = json.loads(message)
+    except ValueError as e:
+        return json.dumps({'id': None, 'detail': f'Invalid JSON: {e}'})
+    request_id = data.get('id') if isinstance(data, dict) else None
+    try:
+        result = Calculation.model_validate(data).calculate().result
+        # JSON has no Infinity or NaN, like the ResultResponse of /calculate they are null
+        reply = {'id': request_id, 'result': result if math.isfinite(result) else None}
+    except Exception as e:
+        reply = {'id': request_id, 'detail': str(e)}
+    return json.dumps(reply)
+
+@app.websocket('/ws/calculate')
+async def calc_ws(websocket: WebSocket):
+    """
+    Perform calculations over one persistent WebSocket connection.
+
+    Each text message is a Calculation with an optional correlation 'id',
+    e.g. {"id": 1, "operation": "add", "operand1": 1, "operand2": 2}. The
+    reply echoes the id with a 'result', or a 'detail' if the calculation
+    failed, so clients can pipeline requests and match the replies.
+
+    Args:
+        websocket (WebSocket): The client connection.
+    """
+    await websocket.accept()
+    try:
+        while True:
+            message = await websocket.receive_text()
+            await websocket.send_text(calculate_message(message))
+    except WebSocketDisconnect:
+        pass
+
+@app.post('/evaluate', operation_id='evaluate', summary='Evaluate an arithmetic expression', response_model=ResultResponse, tags=["actions"], responses={400: {"model": ErrorResponse}, 500: {"model": ErrorResponse}})
+async def evaluate(body: Expression):
+    """
+    Evaluate an arithmetic expression with + - * /, parentheses and precedence.
+
+    The expression is parsed into a safe AST and compiled once. Compiled
+    expressions are kept in an LRU cache keyed by the normalized expression,
+    so repeated expressions skip parsing.
+
+    Args:
+        body (Expression): The request body containing the expression.
+
+    Returns:
+        ResultResponse: The result of the expression.
+
+    Raises:
+        HTTPException:
+            400 if the expression is malformed or unsupported.
+            500 if the evaluation fails.
+    """
+    try:
+        return body.evaluate()
+    except expression.ExpressionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get('/evaluate/cache', operation_id='evaluate_cache', summary='Compiled expression cache statistics', response_model=CacheStatsResponse, tags=["actions"])
+async def evaluate_cache():
+    """
+    Get the hit, miss and eviction counters of the compiled expression cache.
+
+    Returns:
+        CacheStatsResponse: The cache statistics.
+    """
+    return CacheStatsResponse(**expression.cache.stats())
+
+@app.get('/metrics', operation_id='metrics', summary='Service metrics in the Prometheus text format', response_class=PlainTextResponse, tags=["actions"])
+async def get_metrics():
+    """
+    Get request counts, latency histograms and process gauges.
+
+    Returns:
+        PlainTextResponse: The metrics in the Prometheus text exposition format.
+    """
+    users_gauge.set(await run_in_threadpool(CalculatorHelper().user_count))
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
 @app.post('/register', operation_id='register', summary='Register new user', response_model=UserResponse, tags=["actions"], responses={409: {"model": ErrorResponse}, 500: {"model": ErrorResponse}})
 async def register(body: User):
     """
@@ -98,7 +427,7 @@ async def register(body: User):
             500 if registration fails.
     """
     try:
-        result = body.register()
+        result = await passwords.hasher.run(body.register)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     if result is None:
@@ -107,15 +436,19 @@ async def register(body: User):
 
 
 @app.post('/login', operation_id='login', summary='Login a user', response_model=UserResponse, tags=["actions"], responses={400: {"model": ErrorResponse}, 500: {"model": ErrorResponse}})
-async def login(body: User):
+async def login(body: User, response: Response):
     """
-    Log in a user.
+    Log in a user and open a session.
+
+    The session token is returned in the body and as a cookie. Later requests
+    carry it as 'Authorization: Bearer <token>' or through the cookie.
 
     Args:
         body (User): The request body containing login credentials.
+        response (Response): The response, used to set the session cookie.
 
     Returns:
-        UserResponse: The logged-in user details.
+        UserResponse: The logged-in user details and the session token.
 
     Raises:
         HTTPException:
@@ -123,18 +456,21 @@ async def login(body: User):
             500 if login fails.
     """
     try:
-        result = body.login()
-        normal_dist_sleep()
+        result = await passwords.hasher.run(body.login)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     if result is None:
         raise HTTPException(status_code=400, detail='Wrong username of password.')
+    response.set_cookie(SESSION_COOKIE, result.token, httponly=True, samesite='lax')
     return result
 
 @app.get('/users/current', operation_id='users_current', summary='Get current logged in user', response_model=UserResponse, tags=["actions"], responses={204: {"model": None}, 500: {"model": ErrorResponse}})
-async def users_current():
+async def users_current(token: Optional[str] = Depends(session_token)):
     """
-    Get the currently logged-in user.
+    Get the user of the current session.
+
+    Args:
+        token (str, optional): The session token of the request.
 
     Returns:
         UserResponse: The current user's details.
@@ -145,7 +481,7 @@ async def users_current():
             500 if retrieval fails.
     """
     def current_user():
-        user = CalculatorHelper().get_current_user()
+        user = CalculatorHelper().get_current_user(token)
         if user is not None:
             response = UserResponse()
             response.username = user.username
@@ -153,7 +489,7 @@ async def users_current():
         return None
 
     try:
-        result = current_user()
+        result = await run_in_threadpool(current_user)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     if result is None:
@@ -162,9 +498,13 @@ async def users_current():
 
 
 @app.post('/logout', operation_id='logout', summary='Logout current user', response_model=UserResponse, tags=["actions"], responses={500: {"model": ErrorResponse}})
-async def logout():
+async def logout(response: Response, token: Optional[str] = Depends(session_token)):
     """
-    Log out the current user.
+    Log out the current user by closing the session.
+
+    Args:
+        response (Response): The response, used to clear the session cookie.
+        token (str, optional): The session token of the request.
 
     Returns:
         UserResponse: The logged-out user's details.
@@ -175,7 +515,7 @@ async def logout():
             500 if logout fails.
     """
     def logout():
-        user = CalculatorHelper().logout()
+        user = CalculatorHelper().logout(token)
         if user is not None:
             response = UserResponse()
             response.username = user.username
@@ -183,11 +523,12 @@ async def logout():
         return None
 
     try:
-        result = logout()
+        result = await run_in_threadpool(logout)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     if result is None:
         raise HTTPException(status_code=204, detail='No user has signed in.')
+    response.delete_cookie(SESSION_COOKIE)
     return result
 
 def main(args):
@@ -227,13 +568,79 @@ def main(args):
     parser.add_argument('--debug', action='store_true', help='Flask debug')
     parser.add_argument('--no-debug', dest='debug', action='store_false', help='Flask no debug is default')
     parser.add_argument('-r', '--rest', action='store_true')
-    parser.set_defaults(debug=True)
+    parser.add_argument('--latency', dest='latency', action='store_true', help='Inject artificial route latency, enabled is default (env LATENCY=0 disables)')
+    parser.add_argument('--no-latency', dest='latency', action='store_false', help='Disable artificial route latency')
+    parser.add_argument('--latency-profile', action='append', metavar='ROUTE=DIST[,KEY=VALUE...]',
+                        default=[p for p in os.environ.get('LATENCY_PROFILES', '').split(';') if p],
+                        help="Latency profile for a route named by its operation id, e.g. 'login=normal,mean=2,stddev=1,min=1,max=4'. "
+                             "Distributions: normal, uniform, exponential, fixed. Can be repeated (env LATENCY_PROFILES, ';' separated)")
+    parser.add_argument('--session-ttl', type=float, **ifenv('SESSION_TTL', 1800), help='Idle seconds before a session expires, 1800 is default')
+    parser.add_argument('--max-sessions', type=int, **ifenv('MAX_SESSIONS', 100000), help='Maximum number of live sessions, the least recently used is evicted beyond it, 100000 is default')
+    parser.add_argument('--storage', **ifenv('STORAGE', 'memory'), choices=['memory', 'sqlite'], help='Storage backend for users and sessions, memory is default')
+    parser.add_argument('--database', **ifenv('DATABASE', 'calculator.db'), help='SQLite database file, calculator.db is default')
+    parser.add_argument('--db-pool-size', type=int, **ifenv('DB_POOL_SIZE', 4), help='Pooled SQLite read connections, 4 is default')
+    parser.add_argument('--expression-cache-size', type=int, **ifenv('EXPRESSION_CACHE_SIZE', 1024), help='Compiled expressions kept for /evaluate, 1024 is default')
+    parser.add_argument('--result-cache', dest='result_cache', action='store_true', help='Memoize /calculate results in an LRU cache (env RESULT_CACHE=1 enables)')
+    parser.add_argument('--no-result-cache', dest='result_cache', action='store_false', help='Do not memoize /calculate results, disabled is default')
+    parser.add_argument('--result-cache-size', type=int, **ifenv('RESULT_CACHE_SIZE', 4096), help='Results kept by the /calculate cache, 4096 is default')
+    parser.add_argument('--password-hash', **ifenv('PASSWORD_HASH', 'scrypt'), choices=['scrypt', 'pbkdf2'], help='Password hash algorithm, scrypt is default')
+    parser.add_argument('--password-cost', type=int, **ifenv('PASSWORD_COST', None), help='Password hash cost, log2(N) for scrypt and iterations for pbkdf2, 14 and 600000 are default')
+    parser.add_argument('--hash-workers', type=int, **ifenv('HASH_WORKERS', 4), help='Threads hashing and verifying passwords, 4 is default')
+    parser.add_argument('--rate-limit', dest='rate_limit', action='store_true', help='Enforce per-client and per-username rate limits, enabled is default (env RATE_LIMIT=0 disables)')
+    parser.add_argument('--no-rate-limit', dest='rate_limit', action='store_false', help='Disable rate limiting')
+    parser.add_argument('--client-rate', type=float, **ifenv('CLIENT_RATE', 100), help='Requests per second per client address, 100 is default')
+    parser.add_argument('--client-burst', type=float, **ifenv('CLIENT_BURST', 200), help='Request burst per client address, 200 is default')
+    parser.add_argument('--login-rate', type=float, **ifenv('LOGIN_RATE', 1), help='Login attempts per second per username, 1 is default')
+    parser.add_argument('--login-burst', type=float, **ifenv('LOGIN_BURST', 10), help='Login attempt burst per username, 10 is default')
+    parser.add_argument('--admission', dest='admission', action='store_true', help='Limit requests in flight and shed excess load with 503, enabled is default (env ADMISSION=0 disables)')
+    parser.add_argument('--no-admission', dest='admission', action='store_false', help='Disable admission control')
+    parser.add_argument('--max-in-flight', type=int, **ifenv('MAX_IN_FLIGHT', 64), help='Requests processed at once, 64 is default')
+    parser.add_argument('--max-queue', type=int, **ifenv('MAX_QUEUE', 256), help='Requests waiting for a slot before 503 is returned, 256 is default')
+    parser.add_argument('--login-max-in-flight', type=int, **ifenv('LOGIN_MAX_IN_FLIGHT', 16), help='Logins and registrations processed at once, 16 is default')
+    parser.add_argument('--login-max-queue', type=int, **ifenv('LOGIN_MAX_QUEUE', 64), help='Logins and registrations waiting for a slot, 64 is default')
+    parser.add_argument('--queue-timeout', type=float, **ifenv('QUEUE_TIMEOUT', 5), help='Seconds a request waits for a slot before 503 is returned, 5 is default')
+    parser.add_argument('--loop-lag-threshold', type=float, **ifenv('LOOP_LAG_THRESHOLD', 0.1), help='Seconds the event loop may be blocked before the blocking stack is logged, 0.1 is default')
+    parser.set_defaults(debug=True,
+                        latency=os.environ.get('LATENCY', '1').lower() not in ('0', 'false', 'off', 'no'),
+                        result_cache=os.environ.get('RESULT_CACHE', '0').lower() in ('1', 'true', 'on', 'yes'),
+                        rate_limit=os.environ.get('RATE_LIMIT', '1').lower() not in ('0', 'false', 'off', 'no'),
+                        admission=os.environ.get('ADMISSION', '1').lower() not in ('0', 'false', 'off', 'no'))
 
     args = parser.parse_args()
 
+    try:
+        profiles = dict(LatencyProfile.parse(spec) for spec in args.latency_profile)
+    except ValueError as e:
+        parser.error(str(e))
+    routes = sorted({route_name(route) for route in app.routes if isinstance(route, (APIRoute, APIWebSocketRoute))})
+    unknown = sorted(set(profiles) - set(routes))
+    if unknown:
+        parser.error(f"Latency profile for unknown route {', '.join(unknown)}, expected one of {', '.join(routes)}")
+    latency.configure(enabled=args.latency, profiles=profiles)
+    CalculatorHelper().sessions.configure(ttl=args.session_ttl, max_sessions=args.max_sessions)
+    expression.cache.resize(args.expression_cache_size)
+    loop_monitor.configure(threshold=args.loop_lag_threshold)
+    try:
+        passwords.hasher.configure(args.password_hash, args.password_cost, args.hash_workers)
+        rate_limits.configure(args.rate_limit, args.client_rate, args.client_burst, args.login_rate, args.login_burst)
+        admission.configure(
+            enabled=args.admission,
+            default={'limit': args.max_in_flight, 'queue_size': args.max_queue, 'timeout': args.queue_timeout},
+            login={'limit': args.login_max_in_flight, 'queue_size': args.login_max_queue, 'timeout': args.queue_timeout},
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    if args.result_cache:
+        models.enable_result_cache(args.result_cache_size)
+    if args.storage == 'sqlite':
+        CalculatorHelper().use_storage(SQLiteStorage(args.database, pool_size=args.db_pool_size))
+
     # Listen on all network interfaces
     #app.run('0.0.0.0', port=args.flask_port, debug=args.debug)
-    uvicorn.run(app, host="0.0.0.0", port=args.port)
+    try:
+        uvicorn.run(app, host="0.0.0.0", port=args.port)
+    finally:
+        CalculatorHelper().storage.close()
 
 if __name__ == '__main__':
     import sys
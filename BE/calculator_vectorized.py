@@ -0,0 +1,84 @@
+import numpy as np
+
+# Operation names in the order of their integer codes.
+OPERATIONS = ('add', 'subtract', 'multiply', 'divide')
+UFUNCS = (np.add, np.subtract, np.multiply, np.divide)
+CODES = {name: code for code, name in enumerate(OPERATIONS)}
+DIVIDE = CODES['divide']
+
+ZERO_DIVISION = 'float division by zero'
+NOT_FINITE = 'Result is not a finite number.'
+
+
+def operation_codes(operations):
+    """
+    Translate a sequence of operation names into an int8 code array.
+
+    Args:
+        operations (Iterable[str]): Operation names, e.g. 'add' or an Opertions value.
+
+    Returns:
+        numpy.ndarray: One code per operation, indexing OPERATIONS.
+
+    Raises:
+        KeyError: If an operation name is unknown.
+    """
+    # look up each distinct operation once and broadcast its code
+    names, inverse = np.unique(np.array(list(operations), dtype=object), return_inverse=True)
+    codes = np.array([CODES[getattr(name, 'value', name)] for name in names.tolist()], dtype=np.int8)
+    return codes[inverse.reshape(-1)]
+
+
+def calculate(codes, operands1, operands2):
+    """
+    Evaluate parallel arrays of operations and operands.
+
+    Every operation group is evaluated with a single NumPy ufunc call on the
+    elements selected for it, so the cost grows with the array size rather
+    than with a Python loop per element.
+
+    Args:
+        codes (numpy.ndarray): Operation codes, see operation_codes().
+        operands1 (array_like): Left operands.
+        operands2 (array_like): Right operands.
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray]: The float64 results and a boolean
+        mask of the elements that divide by zero. Masked results are NaN.
+    """
+    a = np.asarray(operands1, dtype=np.float64)
+    b = np.asarray(operands2, dtype=np.float64)
+    results = np.empty(a.shape, dtype=np.float64)
+    with np.errstate(all='ignore'):
+        for code, ufunc in enumerate(UFUNCS):
+            mask = codes == code
+            if mask.all():
+                ufunc(a, b, out=results)
+            elif mask.any():
+                results[mask] = ufunc(a[mask], b[mask])
+    zero_division = (codes == DIVIDE) & (b == 0)
+    results[zero_division] = np.nan
+    return results, zero_division
+
+
+def calculate_batch(operations, operands1, operands2):
+    """
+    Evaluate a batch and report per-element errors instead of failing.
+
+    Args:
+        operations (Sequence[str]): Operation names.
+        operands1 (Sequence[float]): Left operands.
+        operands2 (Sequence[float]): Right operands.
+
+    Returns:
+        tuple[list, list]: Results in input order (None where the element
+        failed) and error messages (None where the element succeeded).
+    """
+    results, zero_division = calculate(operation_codes(operations), operands1, operands2)
+    failed = zero_division | ~np.isfinite(results)
+    values = results.tolist()
+    errors = [None] * len(values)
+    for i in np.flatnonzero(failed).tolist():
+        values[i] = None
+        errors[i] = ZERO_DIVISION if zero_division[i] else NOT_FINITE
+    return values, errors
@@ -0,0 +1,113 @@
+import ast
+import math
+import warnings
+
+from calculator_helper import CalculatorHelper
+from lru_cache import LRUCache
+
+# Python AST operator types mapped to the CalculatorHelper operation names.
+OPERATORS = {
+    ast.Add: 'add',
+    ast.Sub: 'subtract',
+    ast.Mult: 'multiply',
+    ast.Div: 'divide',
+}
+
+# Compiled expressions keyed by normalized expression text.
+cache = LRUCache(maxsize=1024)
+
+
+class ExpressionError(ValueError):
+    '''
+        Raised for expressions that are malformed or use unsupported syntax.
+    '''
+
+
+def normalize(expression):
+    """
+    Normalize an expression for use as a cache key.
+
+    Leading and trailing whitespace is removed and inner runs of whitespace
+    are collapsed to a single space, so '1+2' and ' 1 +  2' differ but
+    '1 2' never turns into '12'.
+
+    Args:
+        expression (str): The arithmetic expression.
+
+    Returns:
+        str: The normalized expression.
+    """
+    return ' '.join(expression.split())
+
+
+def compile_expression(expression):
+    """
+    Parse an arithmetic expression into a safe AST and compile it.
+
+    Only numbers, parentheses, unary +/- and the four operators + - * / are
+    accepted. Everything else, names, calls and other operators included,
+    is rejected before anything is evaluated.
+
+    Args:
+        expression (str): The arithmetic expression, e.g. '(1 + 2) * 3'.
+
+    Returns:
+        Callable[[], float]: A function evaluating the expression.
+
+    Raises:
+        ExpressionError: If the expression is malformed or unsupported.
+    """
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', SyntaxWarning)
+            tree = ast.parse(expression, mode='eval')
+        return _compile(tree.body, CalculatorHelper())
+    except ExpressionError:
+        raise
+    except (SyntaxError, ValueError, OverflowError, RecursionError, MemoryError) as e:
+        raise ExpressionError(f'Invalid expression: {e}') from None
+
+
+def _compile(node, calc):
+    if isinstance(node, ast.Constant):
+        if type(node.value) not in (int, float):
+            raise ExpressionError(f'Unsupported constant: {node.value!r}')
+        value = float(node.value)
+        if not math.isfinite(value):
+            raise ExpressionError(f'Number out of range: {node.value!r}')
+        return lambda: value
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.UAdd, ast.USub)):
+        operand = _compile(node.operand, calc)
+        if isinstance(node.op, ast.USub):
+            return lambda: -operand()
+        return operand
+    if isinstance(node, ast.BinOp) and type(node.op) in OPERATORS:
+        operation = getattr(calc, OPERATORS[type(node.op)])
+        left = _compile(node.left, calc)
+        right = _compile(node.right, calc)
+        return lambda: operation(left(), right())
+    if isinstance(node, (ast.BinOp, ast.UnaryOp)):
+        raise ExpressionError(f'Unsupported operator: {type(node.op).__name__}')
+    raise ExpressionError(f'Unsupported syntax: {type(node).__name__}')
+
+
+def evaluate(expression):
+    """
+    Evaluate an arithmetic expression, compiling it only on a cache miss.
+
+    Args:
+        expression (str): The arithmetic expression.
+
+    Returns:
+        float: The result.
+
+    Raises:
+        ExpressionError: If the expression is malformed or unsupported.
+        ZeroDivisionError: If the expression divides by zero.
+    """
+    key = normalize(expression)
+    compiled = cache.get(key)
+    if compiled is None:
+        compiled = compile_expression(key)
+        cache.put(key, compiled)
+    return compiled()
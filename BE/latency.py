@@ -0,0 +1,139 @@
+import asyncio
+import numpy as np
+
+
+class LatencyProfile():
+    '''
+        Random delay distribution for one route.
+
+        Supported distributions:
+            normal: normal(mean, stddev) resampled until within [min, max].
+            uniform: uniform between min and max.
+            exponential: exponential with the given mean, clipped to [min, max].
+            fixed: always mean.
+    '''
+    DISTRIBUTIONS = ('normal', 'uniform', 'exponential', 'fixed')
+    MAX_SAMPLES = 100
+
+    def __init__(self, distribution='normal', mean=2, stddev=1, min=1, max=4):
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"Unknown distribution '{distribution}', expected one of {self.DISTRIBUTIONS}")
+        if min > max:
+            raise ValueError(f'min ({min}) must not be larger than max ({max})')
+        self.distribution = distribution
+        self.mean = float(mean)
+        self.stddev = float(stddev)
+        self.min = float(min)
+        self.max = float(max)
+
+    def __repr__(self):
+        return (f"LatencyProfile(distribution={self.distribution}, mean={self.mean}, "
+                f"stddev={self.stddev}, min={self.min}, max={self.max})")
+
+    @classmethod
+    def parse(cls, spec):
+        """
+        Parse a profile specification.
+
+        Args:
+            spec (str): 'route=distribution[,key=value...]', for example
+                'login=normal,mean=2,stddev=1,min=1,max=4'.
+
+        Returns:
+            tuple[str, LatencyProfile]: The route name and its profile.
+
+        Raises:
+            ValueError: If the specification is malformed.
+        """
+        route, sep, rest = spec.partition('=')
+        if not sep or not route.strip():
+            raise ValueError(f"Latency profile '{spec}' must look like 'route=distribution[,key=value...]'")
+        distribution, *options = rest.split(',')
+        kwargs = {}
+        for option in options:
+            key, sep, value = option.partition('=')
+            if not sep or key.strip() not in ('mean', 'stddev', 'min', 'max'):
+                raise ValueError(f"Invalid option '{option}' in latency profile '{spec}'")
+            kwargs[key.strip()] = float(value)
+        return route.strip(), cls(distribution.strip(), **kwargs)
+
+    def sample(self, rng):
+        """
+        Draw one delay in seconds.
+
+        Args:
+            rng (numpy.random.Generator): Random generator to draw from.
+
+        Returns:
+            float: The delay, always within [min, max].
+        """
+        if self.distribution == 'fixed':
+            return min(max(self.mean, self.min), self.max)
+        if self.distribution == 'uniform':
+            return rng.uniform(self.min, self.max)
+        if self.distribution == 'exponential':
+            return min(max(rng.exponential(self.mean), self.min), self.max)
+        # Keep sampling until the value falls within the allowed range, and
+        # give up on very unlikely ranges instead of spinning forever.
+        for _ in range(self.MAX_SAMPLES):
+            delay = rng.normal(self.mean, self.stddev)
+            if self.min <= delay <= self.max:
+                return delay
+        return min(max(self.mean, self.min), self.max)
+
+
+class LatencyInjector():
+    '''
+        Injects artificial, awaitable delays into routes.
+
+        The delay is an asyncio sleep, so concurrent requests overlap their
+        delays instead of blocking the event loop.
+    '''
+    def __init__(self, enabled=True, profiles=None, seed=None):
+        self.enabled = enabled
+        self.profiles = dict(profiles or {})
+        self._rng = np.random.default_rng(seed)
+
+    def configure(self, enabled=None, profiles=None):
+        """
+        Update the injector settings.
+
+        Args:
+            enabled (bool, optional): Switch delays on or off.
+            profiles (dict[str, LatencyProfile], optional): Profiles to add or
+                replace, keyed by route name.
+        """
+        if enabled is not None:
+            self.enabled = enabled
+        if profiles:
+            self.profiles.update(profiles)
+
+    def sample(self, route):
+        """
+        Draw the delay for a route.
+
+        Args:
+            route (str): Route name, e.g. 'login'.
+
+        Returns:
+            float: Delay in seconds, 0 when disabled or without a profile.
+        """
+        profile = self.profiles.get(route)
+        if not self.enabled or profile is None:
+            return 0.0
+        return profile.sample(self._rng)
+
+    async def delay(self, route):
+        """
+        Sleep for the delay configured for a route without blocking the event loop.
+
+        Args:
+            route (str): Route name, e.g. 'login'.
+
+        Returns:
+            float: The delay that was applied, in seconds.
+        """
+        delay = self.sample(route)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Frames from files below this directory are application code.
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class Stall():
+    '''
+        One event loop stall: when it was detected and where the loop was stuck.
+    '''
+    def __init__(self, detected_at, blocked_for, stack):
+        self.detected_at = detected_at
+        self.blocked_for = blocked_for
+        self.stack = stack
+
+    def __repr__(self):
+        return f"Stall(blocked_for={self.blocked_for:.3f}, call_site={self.call_site})"
+
+    @property
+    def call_site(self):
+        """
+        The innermost application frame of the stack, i.e. the blocking call
+        in our own code, or the innermost frame if no application frame is on it.
+
+        Returns:
+            str: 'file:line in function'.
+        """
+        frames = [frame for frame in self.stack if frame.filename.startswith(APP_DIR)] or self.stack
+        if not frames:
+            return 'unknown'
+        frame = frames[-1]
+        return f'{os.path.basename(frame.filename)}:{frame.lineno} in {frame.name}'
+
+
+class LoopMonitor():
+    '''
+        Measures event loop lag and names the code that blocks the loop.
+
+        A heartbeat task sleeps for interval and records how late it wakes up
+        as the loop lag metric. A watchdog thread checks the heartbeat and,
+        when the loop has not run it for longer than interval + threshold,
+        captures the current stack of the loop thread. That stack shows the
+        synchronous call that holds the loop, e.g. a time.sleep slipped into
+        an async route. The stall is logged with its stack, counted in the
+        metrics and kept in recent.
+    '''
+    def __init__(self, interval=0.1, threshold=0.1, history=20):
+        self.interval = interval
+        self.threshold = threshold
+        self.recent = deque(maxlen=history)
+        self._beat = time.monotonic()
+        self._reported = False
+        self._loop_thread = None
+        self._task = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def configure(self, interval=None, threshold=None):
+        """
+        Update the monitor settings.
+
+        Args:
+            interval (float, optional): Seconds between heartbeats.
+            threshold (float, optional): Extra seconds without a heartbeat
+                before the loop counts as stalled.
+        """
+        if interval is not None:
+            self.interval = interval
+        if threshold is not None:
+            self.threshold = threshold
+
+    def start(self):
+        """
+        Start the heartbeat task on the running loop and the watchdog thread.
+        """
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._reported = False
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name='loop-monitor', daemon=True)
+        self._thread.start()
+
+    async def stop(self):
+        """
+        Stop the heartbeat task and the watchdog thread.
+        """
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self._thread is not None:
+            self._thread.join()
+        self._task = self._thread = None
+
+    async def _heartbeat(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self._beat = time.monotonic()
+            self._reported = False
+            metrics.loop_lag.set(lag)
+            metrics.loop_lag_probes.observe((), lag)
+
+    def _watch(self):
+        while not self._stop.wait(self.threshold / 2):
+            blocked_for = time.monotonic() - self._beat - self.interval
+            if blocked_for > self.threshold and not self._reported:
+                self._reported = True
+                self.report(blocked_for)
+
+    def report(self, blocked_for):
+        """
+        Capture the stack of the loop thread and record a stall.
+
+        Args:
+            blocked_for (float): Seconds the loop has been blocked so far.
+
+        Returns:
+            Stall | None: The stall, or None if the loop thread is gone.
+        """
+        frame = sys._current_frames().get(self._loop_thread)
+        if frame is None:
+            return None
+        stall = Stall(time.time(), blocked_for, traceback.extract_stack(frame))
+        del frame
+        self.recent.append(stall)
+        metrics.loop_stalls.inc()
+        logger.warning('Event loop blocked for %.3fs at %s\n%s', blocked_for, stall.call_site,
+                       ''.join(traceback.format_list(stall.stack)))
+        return stall
@@ -0,0 +1,95 @@
+import threading
+from collections import OrderedDict
+
+
+class LRUCache():
+    '''
+        Bounded mapping with least-recently-used eviction and hit, miss and
+        eviction counters.
+    '''
+    def __init__(self, maxsize=1024):
+        if maxsize < 1:
+            raise ValueError(f'maxsize must be at least 1, got {maxsize}')
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        """
+        Look up a key and mark it as most recently used.
+
+        Args:
+            key: The cache key.
+            default: Value returned on a miss (default=None).
+
+        Returns:
+            The cached value, or default on a miss.
+        """
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """
+        Store a value, evicting the least recently used entries when full.
+
+        Args:
+            key: The cache key.
+            value: The value to cache.
+        """
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def resize(self, maxsize):
+        """
+        Change the size bound, evicting entries if the cache shrinks.
+
+        Args:
+            maxsize (int): The new maximum number of entries.
+        """
+        if maxsize < 1:
+            raise ValueError(f'maxsize must be at least 1, got {maxsize}')
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """
+        Remove all entries and reset the counters.
+        """
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """
+        Get the cache counters.
+
+        Returns:
+            dict: hits, misses, evictions, size and maxsize.
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+        }
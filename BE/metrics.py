@@ -0,0 +1,238 @@
+import math
+import os
+import time
+from bisect import bisect_left
+
+# Content type of the Prometheus text exposition format.
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Request latency buckets in seconds.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Buckets for the arithmetic itself, which takes microseconds.
+CALCULATION_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 1e-3, 1e-2)
+
+# Methods reported by name, anything else is reported as 'other'.
+METHODS = frozenset(('GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'HEAD', 'OPTIONS'))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter():
+    '''
+        Monotonic counter with a value per label tuple.
+
+        Metrics are recorded from the event loop thread only, so a plain
+        dict update is enough and recording takes no lock. Counters kept
+        elsewhere can be exported with a callback that returns a number, or
+        a dict of numbers keyed by label tuple, when the metrics are rendered.
+    '''
+    kind = 'counter'
+
+    def __init__(self, name, help, labelnames=(), callback=None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self._values = {}
+
+    def inc(self, labels=(), amount=1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels=()):
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        values = self._values
+        if self.callback is not None:
+            values = self.callback()
+            if not isinstance(values, dict):
+                values = {(): values}
+        for labels, value in values.items():
+            yield f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}'
+
+
+class Gauge(Counter):
+    '''
+        Gauge that is either set directly or read from a callback, see Counter.
+    '''
+    kind = 'gauge'
+
+    def set(self, value, labels=()):
+        self._values[labels] = value
+
+
+class Histogram():
+    '''
+        Histogram with fixed buckets and a series per label tuple.
+
+        observe() only bumps one bucket count, cumulative counts are built
+        when the histogram is rendered.
+    '''
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # labels -> [bucket counts..., overflow count, sum]
+
+    def observe(self, labels, value):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def count(self, labels=()):
+        series = self._series.get(labels)
+        return sum(series[:-1]) if series is not None else 0
+
+    def samples(self):
+        for labels, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), series):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                yield f'{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}'
+            yield f'{self.name}_sum{_labels(self.labelnames, labels)} {_number(series[-1])}'
+            yield f'{self.name}_count{_labels(self.labelnames, labels)} {cumulative}'
+
+
+class Registry():
+    '''
+        Collection of metrics rendered together in the Prometheus text format.
+    '''
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        """
+        Add a metric, replacing a metric of the same name.
+
+        Args:
+            metric (Counter | Histogram | Gauge): The metric.
+
+        Returns:
+            The metric.
+        """
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        """
+        Render all metrics.
+
+        Returns:
+            str: The metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        lines.append('')
+        return '\n'.join(lines)
+
+
+def resident_memory():
+    """
+    Get the resident set size of this process.
+
+    Returns:
+        int: Bytes, 0 where /proc is not available.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+# start of the process uptime
+START = time.monotonic()
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    'calculator_http_requests_total', 'HTTP requests by route, method and status code.',
+    ('route', 'method', 'status')))
+http_duration = registry.register(Histogram(
+    'calculator_http_request_duration_seconds', 'HTTP request latency by route, method and status code.',
+    ('route', 'method', 'status')))
+calculations = registry.register(Counter(
+    'calculator_calculations_total', 'Single calculations by operation and outcome.',
+    ('operation', 'outcome')))
+calculation_duration = registry.register(Histogram(
+    'calculator_calculation_duration_seconds', 'Time spent computing single calculations by operation.',
+    ('operation',), buckets=CALCULATION_BUCKETS))
+loop_lag = registry.register(Gauge(
+    'calculator_event_loop_lag_seconds', 'Delay of the last event loop lag probe beyond its schedule.'))
+loop_lag.set(0.0)
+loop_lag_probes = registry.register(Histogram(
+    'calculator_event_loop_lag_probe_seconds', 'Event loop lag of every lag probe.',
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)))
+# incremented by the loop monitor's watchdog thread, the only metric that is
+# not recorded on the event loop, a lost increment under the GIL is harmless
+loop_stalls = registry.register(Counter(
+    'calculator_event_loop_stalls_total', 'Event loop stalls longer than the loop monitor threshold.'))
+registry.register(Gauge(
+    'process_resident_memory_bytes', 'Resident memory size in bytes.', callback=resident_memory))
+registry.register(Gauge(
+    'process_uptime_seconds', 'Seconds since the metrics module was loaded.',
+    callback=lambda: time.monotonic() - START))
+
+
+class MetricsMiddleware():
+    '''
+        ASGI middleware recording a count and a latency per HTTP request.
+
+        Requests are labelled with the route path when it is one of the
+        application routes and with 'unmatched' otherwise, so unknown paths
+        cannot blow up the number of series. The latency runs until the
+        response is complete, streamed responses included.
+    '''
+    def __init__(self, app, routes):
+        self.app = app
+        # the middleware stack is built on the first request, when all routes exist
+        self.routes = frozenset(route.path for route in routes)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+
+        async def send_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            path = scope['path']
+            method = scope['method']
+            labels = (path if path in self.routes else 'unmatched',
+                      method if method in METHODS else 'other',
+                      str(status))
+            http_requests.inc(labels)
+            http_duration.observe(labels, time.perf_counter() - start)
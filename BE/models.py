@@ -1,7 +1,33 @@
 from fastapi import Query
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 from calculator_helper import CalculatorHelper
 from enum import Enum
+from typing import List, Optional
+import time
+import calculator_vectorized
+import expression
+import metrics
+from lru_cache import LRUCache
+
+# optional memoization of Calculation results, see enable_result_cache()
+result_cache = None
+
+def enable_result_cache(maxsize=4096):
+    """
+    Memoize Calculation results in a bounded LRU cache.
+
+    Args:
+        maxsize (int): Maximum number of cached results (default=4096).
+    """
+    global result_cache
+    result_cache = LRUCache(maxsize)
+
+def disable_result_cache():
+    """
+    Stop memoizing Calculation results and drop the cache.
+    """
+    global result_cache
+    result_cache = None
 
 class ErrorResponse(BaseModel):
     detail: str
@@ -17,6 +43,28 @@ class Calculation(BaseModel):
     operand2: float
 
     def calculate(self):
+        start = time.perf_counter()
+        try:
+            if result_cache is None:
+                result = self._compute()
+            else:
+                # by bit pattern, 0.0 == -0.0 but their results differ in sign
+                key = (self.operation, self.operand1.hex(), self.operand2.hex())
+                result = result_cache.get(key)
+                if result is None:
+                    # failed calculations raise and are never cached
+                    result = self._compute()
+                    result_cache.put(key, result)
+        except Exception:
+            metrics.calculations.inc((self.operation.value, 'error'))
+            raise
+        metrics.calculations.inc((self.operation.value, 'ok'))
+        metrics.calculation_duration.observe((self.operation.value,), time.perf_counter() - start)
+        response = ResultResponse()
+        response.result = result
+        return response
+
+    def _compute(self):
         calc = CalculatorHelper()
         do = {
                 Opertions.add:calc.add,
@@ -24,9 +72,65 @@ class Calculation(BaseModel):
                 Opertions.multiply:calc.multiply,
                 Opertions.divide:calc.divide
         }
-        result = do[self.operation](self.operand1, self.operand2)
+        return do[self.operation](self.operand1, self.operand2)
+
+class BatchCalculation(BaseModel):
+    operations: List[Opertions]
+    operands1: List[float]
+    operands2: List[float]
+
+    @model_validator(mode='after')
+    def check_lengths(self):
+        if not len(self.operations) == len(self.operands1) == len(self.operands2):
+            raise ValueError('operations, operands1 and operands2 must have the same length')
+        return self
+
+    def calculate(self):
+        results, errors = calculator_vectorized.calculate_batch(self.operations, self.operands1, self.operands2)
+        response = BatchResultResponse()
+        response.results = results
+        response.errors = errors
+        return response
+
+class Reductions(str, Enum):
+    sum = "sum"
+    product = "product"
+    min = "min"
+    max = "max"
+    mean = "mean"
+
+class Reduction(BaseModel):
+    operation: Reductions
+    operands: List[float]
+
+    def calculate(self):
+        calc = CalculatorHelper()
+        do = {
+                Reductions.sum:calc.sum,
+                Reductions.product:calc.product,
+                Reductions.min:calc.min,
+                Reductions.max:calc.max,
+                Reductions.mean:calc.mean
+        }
         response = ResultResponse()
-        response.result = result
+        response.result = do[self.operation](self.operands)
+        return response
+
+class Scan(BaseModel):
+    operation: Opertions
+    operands: List[float]
+
+    def calculate(self):
+        response = ScanResultResponse()
+        response.results = CalculatorHelper().scan(self.operation.value, self.operands)
+        return response
+
+class Expression(BaseModel):
+    expression: str = Field(max_length=10000)
+
+    def evaluate(self):
+        response = ResultResponse()
+        response.result = expression.evaluate(self.expression)
         return response
 
 class User(BaseModel):
@@ -43,10 +147,12 @@ class User(BaseModel):
         return response
 
     def login(self):
-        username = CalculatorHelper().login(self.username, self.password)
+        calc = CalculatorHelper()
+        username = calc.login(self.username, self.password)
         if username is not None:
             response = UserResponse()
             response.username = username
+            response.token = calc.create_session(username)
         else:
             response = None
         return response
@@ -54,7 +160,22 @@ class User(BaseModel):
 class ResultResponse(BaseModel):
     result: float = None
 
+class BatchResultResponse(BaseModel):
+    results: List[Optional[float]] = []
+    errors: List[Optional[str]] = []
+
+class ScanResultResponse(BaseModel):
+    results: List[float] = []
+
+class CacheStatsResponse(BaseModel):
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    size: int = 0
+    maxsize: int = 0
+
 class UserResponse(BaseModel):
     username: str = None
+    token: Optional[str] = None
 
 
@@ -0,0 +1,67 @@
+from starlette.responses import StreamingResponse
+
+MEDIA_TYPE = 'application/x-ndjson'
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    '''
+        Streaming response whose body is produced while the request body is
+        still being read.
+
+        StreamingResponse watches for client disconnects by calling receive()
+        next to the body iterator, which would take request body chunks away
+        from Request.stream(). Here the request stream notices a disconnect
+        itself, so the body is streamed directly.
+    '''
+    media_type = MEDIA_TYPE
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+class LineTooLongError(ValueError):
+    '''
+        Raised when a newline-delimited record exceeds the allowed size.
+    '''
+
+
+async def read_lines(chunks, max_line=65536):
+    """
+    Split a stream of byte chunks into lines without buffering the stream.
+
+    Only the current, incomplete line is kept in memory, so memory use is
+    bounded by max_line no matter how long the stream is.
+
+    Args:
+        chunks (AsyncIterable[bytes]): The byte stream, e.g. Request.stream().
+        max_line (int): Maximum length of one line in bytes (default=65536).
+
+    Yields:
+        bytes: Each non-empty line without its line terminator.
+
+    Raises:
+        LineTooLongError: If a line is longer than max_line.
+    """
+    buffer = bytearray()
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b'\n', start)
+            if end < 0:
+                break
+            buffer += chunk[start:end]
+            start = end + 1
+            line = bytes(buffer).strip()
+            buffer.clear()
+            if len(line) > max_line:
+                raise LineTooLongError(f'Line longer than {max_line} bytes.')
+            if line:
+                yield line
+        buffer += chunk[start:]
+        if len(buffer) > max_line:
+            raise LineTooLongError(f'Line longer than {max_line} bytes.')
+    line = bytes(buffer).strip()
+    if line:
+        yield line
@@ -0,0 +1,173 @@
+import base64
+import functools
+import hashlib
+import hmac
+import secrets
+
+
+def _encode(data):
+    return base64.b64encode(data).decode('ascii')
+
+
+class PasswordHasher():
+    '''
+        Salted, deliberately slow password hashes.
+
+        Hashes are stored as 'algorithm$cost$salt$hash' strings, so the cost
+        can be raised without invalidating existing hashes: verify() reads
+        the parameters from the stored hash and needs_rehash() tells when a
+        hash should be replaced after the next successful login. Stored
+        values without that format are legacy plaintext passwords.
+
+        Supported algorithms:
+            scrypt: cost is log2 of the scrypt work factor N (r=8, p=1).
+            pbkdf2: PBKDF2-HMAC-SHA256, cost is the iteration count.
+
+        Hashing takes tens of milliseconds by design. hashlib releases the
+        GIL while it runs, so the async routes hand it to run(), which uses a
+        dedicated thread pool of a fixed size: a burst of logins queues up
+        there instead of blocking the event loop or starving the default
+        thread pool that the other routes use.
+    '''
+    DEFAULT_COST = {'scrypt': 14, 'pbkdf2': 600000}
+    SALT_SIZE = 16
+    KEY_SIZE = 32
+
+    def __init__(self, algorithm='scrypt', cost=None, workers=4):
+        self._executor = None
+        self._dummy_hash = None
+        self.workers = workers
+        self.configure(algorithm, cost)
+
+    def configure(self, algorithm=None, cost=None, workers=None):
+        """
+        Update the hasher settings.
+
+        Args:
+            algorithm (str, optional): 'scrypt' or 'pbkdf2'.
+            cost (int, optional): Work factor, see the class documentation.
+                Defaults to DEFAULT_COST of the algorithm.
+            workers (int, optional): Size of the hashing thread pool.
+
+        Raises:
+            ValueError: If the algorithm is unknown or the cost is not positive.
+        """
+        if algorithm is not None:
+            if algorithm not in self.DEFAULT_COST:
+                raise ValueError(f"Unknown password hash '{algorithm}', expected one of {tuple(self.DEFAULT_COST)}")
+            self.algorithm = algorithm
+            self.cost = self.DEFAULT_COST[algorithm]
+        if cost is not None:
+            if cost < 1:
+                raise ValueError(f'Password hash cost must be positive, got {cost}')
+            self.cost = cost
+        if algorithm is not None or cost is not None:
+            self._dummy_hash = None
+        if workers is not None and workers != self.workers:
+            self.workers = workers
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    @property
+    def executor(self):
+        # created on first use, so the CLI never starts hashing threads
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='password-hasher')
+        return self._executor
+
+    def _derive(self, algorithm, cost, password, salt):
+        password = password.encode('utf-8')
+        if algorithm == 'scrypt':
+            n = 1 << cost
+            return hashlib.scrypt(password, salt=salt, n=n, r=8, p=1, maxmem=256 * n * 8, dklen=self.KEY_SIZE)
+        return hashlib.pbkdf2_hmac('sha256', password, salt, cost, dklen=self.KEY_SIZE)
+
+    def hash(self, password):
+        """
+        Hash a password with a new random salt.
+
+        Args:
+            password (str): The plaintext password.
+
+        Returns:
+            str: The encoded hash, 'algorithm$cost$salt$hash'.
+        """
+        salt = secrets.token_bytes(self.SALT_SIZE)
+        key = self._derive(self.algorithm, self.cost, password, salt)
+        return f'{self.algorithm}${self.cost}${_encode(salt)}${_encode(key)}'
+
+    def verify(self, password, encoded):
+        """
+        Check a password against a stored hash in constant time.
+
+        Args:
+            password (str): The plaintext password to check.
+            encoded (str): The stored hash, or a legacy plaintext password.
+
+        Returns:
+            bool: True if the password matches.
+        """
+        algorithm, cost, salt, key = self._parse(encoded)
+        if algorithm is None:
+            return hmac.compare_digest(password.encode('utf-8'), encoded.encode('utf-8'))
+        return hmac.compare_digest(self._derive(algorithm, cost, password, salt), key)
+
+    def verify_dummy(self, password):
+        """
+        Spend the time of a verify() without a stored hash, e.g. for an
+        unknown username, so the answer does not tell whether it exists.
+
+        Args:
+            password (str): The plaintext password to check.
+
+        Returns:
+            bool: Always False.
+        """
+        if self._dummy_hash is None:
+            # a hash of a random password with the current settings
+            self._dummy_hash = self.hash(secrets.token_urlsafe(self.SALT_SIZE))
+        self.verify(password, self._dummy_hash)
+        return False
+
+    def needs_rehash(self, encoded):
+        """
+        Check whether a stored hash uses other settings than the current ones.
+
+        Args:
+            encoded (str): The stored hash, or a legacy plaintext password.
+
+        Returns:
+            bool: True for legacy plaintext passwords and outdated hashes.
+        """
+        algorithm, cost, _, _ = self._parse(encoded)
+        return algorithm != self.algorithm or cost != self.cost
+
+    def _parse(self, encoded):
+        parts = encoded.split('$')
+        if len(parts) != 4 or parts[0] not in self.DEFAULT_COST:
+            return None, None, None, None
+        try:
+            return parts[0], int(parts[1]), base64.b64decode(parts[2]), base64.b64decode(parts[3])
+        except ValueError:
+            return None, None, None, None
+
+    async def run(self, function, *args):
+        """
+        Run a blocking function that hashes or verifies passwords in the hashing pool.
+
+        Args:
+            function (Callable): The function, e.g. User.login.
+            *args: Its arguments.
+
+        Returns:
+            The return value of the function.
+        """
+        import asyncio  # only the REST service gets here, keeps the CLI import cheap
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(function, *args))
+
+
+# hasher used by CalculatorHelper, configured by calculator_rest_service.main
+hasher = PasswordHasher()
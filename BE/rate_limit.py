@@ -0,0 +1,245 @@
+import json
+import math
+import time
+
+
+class TokenBuckets():
+    '''
+        Token buckets keyed by an arbitrary string, e.g. a client address.
+
+        Every key gets a bucket of burst tokens that refills at rate tokens
+        per second. A bucket is stored as a (tokens, timestamp) tuple in a
+        plain dict kept in least-recently-used order, so idle keys collect
+        at the front. A bucket that has been idle long enough to refill
+        completely is the same as no bucket at all, so every call drops a
+        few of those from the front, and beyond max_keys the least recently
+        used key is dropped as well.
+    '''
+    # idle buckets dropped per take(), keeps the cleanup amortized O(1)
+    EXPIRE_PER_TAKE = 2
+
+    def __init__(self, rate, burst, max_keys=100000, clock=time.monotonic):
+        self._buckets = {}  # key -> (tokens, updated_at)
+        self._clock = clock
+        self.rate = None
+        self.burst = None
+        self.max_keys = None
+        self.configure(rate, burst, max_keys)
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def configure(self, rate=None, burst=None, max_keys=None):
+        """
+        Update the bucket settings.
+
+        Args:
+            rate (float, optional): Tokens added per second.
+            burst (float, optional): Bucket capacity, the largest burst allowed.
+            max_keys (int, optional): Maximum number of tracked keys.
+
+        Raises:
+            ValueError: If rate is not positive or burst is below 1.
+        """
+        if rate is not None:
+            if rate <= 0:
+                raise ValueError(f'Rate must be positive, got {rate}')
+            self.rate = float(rate)
+        if burst is not None:
+            if burst < 1:
+                raise ValueError(f'Burst must be at least 1, got {burst}')
+            self.burst = float(burst)
+        if max_keys is not None:
+            self.max_keys = max_keys
+        while len(self._buckets) > self.max_keys:
+            del self._buckets[next(iter(self._buckets))]
+
+    def take(self, key):
+        """
+        Take one token from the bucket of a key.
+
+        Args:
+            key (str): The bucket key.
+
+        Returns:
+            float: 0.0 if a token was taken, otherwise the seconds until the
+            next token is available.
+        """
+        now = self._clock()
+        buckets = self._buckets
+        bucket = buckets.pop(key, None)
+        if bucket is None:
+            tokens = self.burst
+        else:
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+        else:
+            wait = (1 - tokens) / self.rate
+        buckets[key] = (tokens, now)
+
+        idle = now - self.burst / self.rate
+        for _ in range(self.EXPIRE_PER_TAKE):
+            first = next(iter(buckets))
+            if buckets[first][1] > idle:
+                break
+            del buckets[first]
+        if len(buckets) > self.max_keys:
+            del buckets[next(iter(buckets))]
+        return wait
+
+    def clear(self):
+        self._buckets.clear()
+
+
+class RateLimits():
+    '''
+        Rate limit settings and state shared with RateLimitMiddleware.
+
+        clients limits all HTTP requests, WebSocket handshakes and WebSocket
+        messages per client address. usernames limits
+        login attempts per username, so guessing the password of one account
+        is throttled even when the attempts come from many addresses.
+    '''
+    def __init__(self, enabled=True, clients=None, usernames=None, login_paths=('/login',)):
+        self.enabled = enabled
+        self.clients = clients if clients is not None else TokenBuckets(rate=100, burst=200)
+        self.usernames = usernames if usernames is not None else TokenBuckets(rate=1, burst=10)
+        self.login_paths = frozenset(login_paths)
+
+    def configure(self, enabled=None, client_rate=None, client_burst=None, login_rate=None, login_burst=None):
+        """
+        Update the limits.
+
+        Args:
+            enabled (bool, optional): Switch rate limiting on or off.
+            client_rate (float, optional): Requests per second per client.
+            client_burst (float, optional): Burst of requests per client.
+            login_rate (float, optional): Login attempts per second per username.
+            login_burst (float, optional): Burst of login attempts per username.
+        """
+        if enabled is not None:
+            self.enabled = enabled
+        self.clients.configure(client_rate, client_burst)
+        self.usernames.configure(login_rate, login_burst)
+
+    def clear(self):
+        self.clients.clear()
+        self.usernames.clear()
+
+
+class RateLimitMiddleware():
+    '''
+        ASGI middleware enforcing RateLimits.
+
+        Requests are rejected with 429 and a Retry-After header before they
+        reach routing or model validation. For login paths the small JSON
+        body is read here to find the username and is then replayed to the
+        application unchanged. An over-limit WebSocket handshake is closed
+        before it is accepted, and a connection that sends messages faster
+        than the client's limit is closed, both with code 1008.
+    '''
+    # WebSocket close code for rejected handshakes and connections
+    POLICY_VIOLATION = 1008
+    # larger login bodies are not inspected, model validation rejects them
+    MAX_LOGIN_BODY = 4096
+
+    def __init__(self, app, limits):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limits = self.limits
+        if scope['type'] == 'websocket' and limits.enabled:
+            await self._websocket(scope, receive, send)
+            return
+        if scope['type'] != 'http' or not limits.enabled:
+            await self.app(scope, receive, send)
+            return
+        client = scope.get('client')
+        wait = limits.clients.take(client[0] if client else '')
+        if not wait and scope['path'] in limits.login_paths:
+            receive, username = await self._read_username(receive)
+            if username is not None:
+                wait = limits.usernames.take(username)
+        if wait:
+            await self._reject(send, wait)
+            return
+        await self.app(scope, receive, send)
+
+    async def _websocket(self, scope, receive, send):
+        """
+        Take a client token for the handshake and for every received message.
+
+        Args:
+            scope (dict): The ASGI websocket scope.
+            receive (Callable): The ASGI receive channel.
+            send (Callable): The ASGI send channel.
+        """
+        limits = self.limits
+        client = scope.get('client')
+        key = client[0] if client else ''
+        if limits.clients.take(key):
+            message = await receive()
+            if message['type'] == 'websocket.connect':
+                await send({'type': 'websocket.close', 'code': self.POLICY_VIOLATION, 'reason': 'Too many requests.'})
+            return
+
+        async def receive_limited():
+            message = await receive()
+            if message['type'] == 'websocket.receive' and limits.enabled and limits.clients.take(key):
+                # the client gets the close, the application a disconnect
+                await send({'type': 'websocket.close', 'code': self.POLICY_VIOLATION, 'reason': 'Too many requests.'})
+                return {'type': 'websocket.disconnect', 'code': self.POLICY_VIOLATION}
+            return message
+
+        await self.app(scope, receive_limited, send)
+
+    async def _read_username(self, receive):
+        """
+        Read the request body and extract the username field.
+
+        Args:
+            receive (Callable): The ASGI receive channel.
+
+        Returns:
+            tuple: A receive channel replaying the consumed messages, and the
+            username, or None if the body has none.
+        """
+        messages = []
+        size = 0
+        while True:
+            message = await receive()
+            messages.append(message)
+            if message['type'] != 'http.request':
+                break
+            size += len(message.get('body', b''))
+            if not message.get('more_body', False) or size > self.MAX_LOGIN_BODY:
+                break
+
+        async def replay():
+            if messages:
+                return messages.pop(0)
+            return await receive()
+
+        username = None
+        if size <= self.MAX_LOGIN_BODY and messages[-1]['type'] == 'http.request':
+            try:
+                body = json.loads(b''.join(message.get('body', b'') for message in messages))
+                username = body.get('username') if isinstance(body, dict) else None
+            except ValueError:
+                pass
+        return replay, username if isinstance(username, str) else None
+
+    @staticmethod
+    async def _reject(send, wait):
+        await send({
+            'type': 'http.response.start',
+            'status': 429,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'retry-after', str(math.ceil(wait)).encode('ascii')),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': b'{"detail":"Too many requests."}'})
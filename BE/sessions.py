@@ -0,0 +1,173 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+
+class SessionStore():
+    '''
+        In-memory session store with a sliding TTL and a bounded size.
+
+        Sessions are kept in least-recently-used order: every lookup moves a
+        session to the back, so idle sessions collect at the front. Expiry
+        therefore only has to look at the front of the store and can be done
+        in small increments, and when the store is full the least recently
+        used session is evicted to make room.
+
+        With a storage backend sessions are also written through to it and
+        read back on a miss, so they survive restarts and evictions. The
+        extended lifetime is written back once it runs ahead of the stored
+        one by REFRESH_FRACTION of the TTL, not on every lookup.
+    '''
+    REFRESH_FRACTION = 0.1
+
+    def __init__(self, ttl=1800, max_sessions=100000, clock=time.time, backend=None):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.backend = backend
+        self._clock = clock
+        self._sessions = OrderedDict()  # token -> (username, expires_at, stored expires_at)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def configure(self, ttl=None, max_sessions=None, backend=None):
+        """
+        Update the store settings.
+
+        Args:
+            ttl (float, optional): Idle time in seconds before a session expires.
+            max_sessions (int, optional): Maximum number of live sessions.
+            backend (optional): Storage backend sessions are persisted to.
+        """
+        if backend is not None:
+            self.backend = backend
+        if ttl is not None:
+            self.ttl = ttl
+        if max_sessions is not None:
+            self.max_sessions = max_sessions
+        with self._lock:
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def create(self, username):
+        """
+        Open a session for a user.
+
+        Args:
+            username (str): The authenticated user.
+
+        Returns:
+            str: The session token.
+        """
+        token = secrets.token_urlsafe(32)
+        expires_at = self._clock() + self.ttl
+        if self.backend is not None:
+            self.backend.save_session(token, username, expires_at)
+        self._remember(token, username, expires_at, expires_at)
+        return token
+
+    def _remember(self, token, username, expires_at, stored):
+        with self._lock:
+            while len(self._sessions) >= self.max_sessions:
+                self._sessions.popitem(last=False)
+            self._sessions[token] = (username, expires_at, stored)
+
+    def _needs_refresh(self, expires_at, stored):
+        return self.backend is not None and expires_at - stored >= self.ttl * self.REFRESH_FRACTION
+
+    def get(self, token):
+        """
+        Look up a session and extend its lifetime.
+
+        Args:
+            token (str): The session token.
+
+        Returns:
+            str | None: The username, or None if the session is unknown or expired.
+        """
+        if token is None:
+            return None
+        now = self._clock()
+        expires_at = now + self.ttl
+        with self._lock:
+            session = self._sessions.get(token)
+            if session is not None:
+                username, previous, stored = session
+                if previous <= now:
+                    del self._sessions[token]
+                    return None
+                refresh = self._needs_refresh(expires_at, stored)
+                self._sessions[token] = (username, expires_at, expires_at if refresh else stored)
+                self._sessions.move_to_end(token)
+        if session is not None:
+            if refresh:
+                self.backend.refresh_session(token, expires_at)
+            return username
+        if self.backend is None:
+            return None
+        session = self.backend.load_session(token)
+        if session is None or session[1] <= now:
+            return None
+        username, stored = session
+        if self._needs_refresh(expires_at, stored):
+            self.backend.refresh_session(token, expires_at)
+            stored = expires_at
+        self._remember(token, username, expires_at, stored)
+        return username
+
+    def revoke(self, token):
+        """
+        Close a session.
+
+        Args:
+            token (str): The session token.
+
+        Returns:
+            str | None: The username of the closed session, or None if there was none.
+        """
+        if token is None:
+            return None
+        with self._lock:
+            session = self._sessions.pop(token, None)
+        if self.backend is not None:
+            if session is None:
+                session = self.backend.load_session(token)
+            self.backend.delete_session(token)
+        if session is None or session[1] <= self._clock():
+            return None
+        return session[0]
+
+    def expire(self, limit=1000):
+        """
+        Remove expired sessions from the front of the store.
+
+        Args:
+            limit (int): Maximum number of sessions to remove in this call.
+
+        Returns:
+            int: The number of removed sessions. Equal to limit when more
+            expired sessions may be left.
+        """
+        now = self._clock()
+        removed = 0
+        with self._lock:
+            while removed < limit and self._sessions:
+                token, (_, expires_at, _) = next(iter(self._sessions.items()))
+                if expires_at > now:
+                    break
+                del self._sessions[token]
+                removed += 1
+        return removed
+
+    def purge(self):
+        """
+        Remove expired sessions from the storage backend.
+
+        Returns:
+            int: The number of removed sessions.
+        """
+        if self.backend is None:
+            return 0
+        return self.backend.purge_sessions(self._clock())
@@ -0,0 +1,166 @@
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+
+class SQLiteStorage():
+    '''
+        SQLite storage backend for users and sessions.
+
+        The database runs in WAL mode so readers never wait for the writer.
+        Reads use a pool of connections, each with its own prepared statement
+        cache. All writes go through one writer thread that groups whatever
+        is queued into a single transaction, so concurrent registrations
+        share one commit instead of paying for one each. Every write runs
+        in a savepoint of its own, a failing write is rolled back and only
+        its caller gets the exception.
+
+        All methods block on database I/O and must not be called from the
+        event loop directly.
+    '''
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS users (username TEXT PRIMARY KEY, password TEXT NOT NULL)',
+        'CREATE TABLE IF NOT EXISTS sessions (token TEXT PRIMARY KEY, username TEXT NOT NULL, expires_at REAL NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS sessions_expires_at ON sessions (expires_at)',
+    )
+
+    def __init__(self, path, pool_size=4, batch_size=256):
+        self.path = path
+        self.batch_size = batch_size
+        self._writes = queue.Queue()
+        self._writer_db = self._connect()
+        for statement in self.SCHEMA:
+            self._writer_db.execute(statement)
+        self._pool = queue.Queue()
+        for _ in range(pool_size):
+            self._pool.put(self._connect())
+        self._writer = threading.Thread(target=self._write_loop, name='sqlite-writer', daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, cached_statements=64)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        db.execute('PRAGMA busy_timeout=5000')
+        return db
+
+    @contextmanager
+    def _connection(self):
+        db = self._pool.get()
+        try:
+            yield db
+        finally:
+            self._pool.put(db)
+
+    def _read(self, sql, params=()):
+        with self._connection() as db:
+            return db.execute(sql, params).fetchone()
+
+    def _write(self, handler, *params):
+        future = Future()
+        self._writes.put((handler, params, future))
+        return future.result()
+
+    def _write_loop(self):
+        db = self._writer_db
+        running = True
+        while running:
+            batch = [self._writes.get()]
+            # group everything that queued up while the last commit ran
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                running = False
+                batch = [item for item in batch if item is not None]
+            if not batch:
+                continue
+            results = []  # (exception, result) per write
+            try:
+                db.execute('BEGIN IMMEDIATE')
+                for handler, params, _ in batch:
+                    db.execute('SAVEPOINT write')
+                    try:
+                        results.append((None, handler(db, *params)))
+                    except Exception as e:
+                        db.execute('ROLLBACK TO write')
+                        results.append((e, None))
+                    db.execute('RELEASE write')
+                db.execute('COMMIT')
+            except Exception as e:
+                # the transaction itself failed, none of the writes is stored
+                if db.in_transaction:
+                    db.execute('ROLLBACK')
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, _, future), (error, result) in zip(batch, results):
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+        db.close()
+
+    @staticmethod
+    def _insert_user(db, username, password):
+        cursor = db.execute('INSERT OR IGNORE INTO users (username, password) VALUES (?, ?)', (username, password))
+        return cursor.rowcount == 1
+
+    @staticmethod
+    def _update_user(db, username, password):
+        db.execute('UPDATE users SET password = ? WHERE username = ?', (password, username))
+
+    @staticmethod
+    def _insert_session(db, token, username, expires_at):
+        db.execute('INSERT OR REPLACE INTO sessions (token, username, expires_at) VALUES (?, ?, ?)', (token, username, expires_at))
+
+    @staticmethod
+    def _update_session(db, token, expires_at):
+        # never inserts, a session revoked in the meantime stays revoked
+        db.execute('UPDATE sessions SET expires_at = ? WHERE token = ?', (expires_at, token))
+
+    @staticmethod
+    def _delete_session(db, token):
+        db.execute('DELETE FROM sessions WHERE token = ?', (token,))
+
+    @staticmethod
+    def _delete_expired_sessions(db, now):
+        return db.execute('DELETE FROM sessions WHERE expires_at <= ?', (now,)).rowcount
+
+    def add_user(self, username, password):
+        return self._write(self._insert_user, username, password)
+
+    def set_password(self, username, password):
+        self._write(self._update_user, username, password)
+
+    def get_password(self, username):
+        row = self._read('SELECT password FROM users WHERE username = ?', (username,))
+        return row[0] if row is not None else None
+
+    def count_users(self):
+        return self._read('SELECT COUNT(*) FROM users')[0]
+
+    def save_session(self, token, username, expires_at):
+        self._write(self._insert_session, token, username, expires_at)
+
+    def load_session(self, token):
+        return self._read('SELECT username, expires_at FROM sessions WHERE token = ?', (token,))
+
+    def refresh_session(self, token, expires_at):
+        self._write(self._update_session, token, expires_at)
+
+    def delete_session(self, token):
+        self._write(self._delete_session, token)
+
+    def purge_sessions(self, now):
+        return self._write(self._delete_expired_sessions, now)
+
+    def close(self):
+        self._writes.put(None)
+        self._writer.join()
+        while not self._pool.empty():
+            self._pool.get().close()
@@ -0,0 +1,50 @@
+import threading
+
+
+class InMemoryStorage():
+    '''
+        Default storage backend, users live in a dict keyed by username.
+
+        Sessions are only kept by the SessionStore, so the session methods
+        are no-ops and nothing survives a restart. The SQLite backend lives
+        in sqlite_storage so that importing this module stays cheap.
+    '''
+    def __init__(self):
+        self._users = {}
+        self._lock = threading.Lock()
+
+    def add_user(self, username, password):
+        with self._lock:
+            if username in self._users:
+                return False
+            self._users[username] = password
+            return True
+
+    def set_password(self, username, password):
+        with self._lock:
+            if username in self._users:
+                self._users[username] = password
+
+    def get_password(self, username):
+        return self._users.get(username)
+
+    def count_users(self):
+        return len(self._users)
+
+    def save_session(self, token, username, expires_at):
+        pass
+
+    def load_session(self, token):
+        return None
+
+    def refresh_session(self, token, expires_at):
+        pass
+
+    def delete_session(self, token):
+        pass
+
+    def purge_sessions(self, now):
+        return 0
+
+    def close(self):
+        pass
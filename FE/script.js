@@ -8,6 +8,68 @@ let resultDisplayed = false;
 const remoteServerAddress = window.config.remoteServerAddress;
 const webServerAddress = window.config.webServerAddress;
 
+// Session token returned by /login, sent as a Bearer token on session requests
+const sessionTokenKey = 'sessionToken';
+
+function authHeaders() {
+    const token = localStorage.getItem(sessionTokenKey);
+    return token ? { 'Authorization': `Bearer ${token}` } : {};
+}
+
+// Persistent WebSocket channel for calculations, replies are matched by id
+let calculationSocket = null;
+let nextCalculationId = 1;
+const pendingCalculations = new Map();
+
+function connectCalculationSocket() {
+    if (!('WebSocket' in window)) return;
+    // Same address as the fetch calls, a path prefix of the server address is kept
+    const url = new URL(`${remoteServerAddress}/ws/calculate`, window.location.href);
+    url.protocol = url.protocol === 'https:' ? 'wss:' : 'ws:';
+
+    const socket = new WebSocket(url);
+    socket.onopen = () => {
+        calculationSocket = socket;
+    };
+    socket.onmessage = event => {
+        const reply = JSON.parse(event.data);
+        const pending = pendingCalculations.get(reply.id);
+        if (pending) {
+            pendingCalculations.delete(reply.id);
+            pending.callback(reply);
+        }
+    };
+    socket.onclose = () => {
+        calculationSocket = null;
+        // Resend unanswered calculations over HTTP and reconnect later
+        const unanswered = Array.from(pendingCalculations.values());
+        pendingCalculations.clear();
+        unanswered.forEach(pending => calculateWithFetch(pending.payload, pending.callback));
+        setTimeout(connectCalculationSocket, 5000);
+    };
+}
+
+function calculateWithSocket(payload, callback) {
+    const id = nextCalculationId++;
+    pendingCalculations.set(id, { payload: payload, callback: callback });
+    calculationSocket.send(JSON.stringify({ id: id, ...payload }));
+}
+
+function calculateWithFetch(payload, callback) {
+    fetch(`${remoteServerAddress}/calculate`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify(payload)
+    })
+        .then(response => response.json())
+        .then(callback)
+        .catch(error => {
+            console.error('Error:', error);
+        });
+}
+
 function appendNumber(number) {
     if (resultDisplayed) {
         currentOperand = '';  // Clear the current operand if result is displayed
@@ -86,25 +148,20 @@ function computeResultRemote() {
         operation: operationsMap[operation]
     };
 
-    fetch(`${remoteServerAddress}/calculate`, {
-        method: 'POST',
-        headers: {
-            'Content-Type': 'application/json'
-        },
-        body: JSON.stringify(payload)
-    })
-        .then(response => response.json())
-        .then(data => {
-            currentOperand = data.result;
-            operation = undefined;
-            previousOperand = '';
-            resultDisplayed = true;  // Set the flag when a result is displayed
-            updateScreen();
-            logToTextWindow('=' + data.result + '\n');
-        })
-        .catch(error => {
-            console.error('Error:', error);
-        });
+    const showResult = data => {
+        currentOperand = data.result;
+        operation = undefined;
+        previousOperand = '';
+        resultDisplayed = true;  // Set the flag when a result is displayed
+        updateScreen();
+        logToTextWindow('=' + data.result + '\n');
+    };
+
+    if (calculationSocket && calculationSocket.readyState === WebSocket.OPEN) {
+        calculateWithSocket(payload, showResult);
+    } else {
+        calculateWithFetch(payload, showResult);
+    }
 }
 
 function clearScreen() {
@@ -166,14 +223,17 @@ function loginWith(username, password, form) {
     })
         .then(response => {
             document.getElementById('spinner').style.display = 'none';
-            document.getElementById('login-form').removeAttribute('style');
+            document.getElementById(form + '-form').removeAttribute('style');
             if (!response.ok) {
                 if (response.status === 400) {
                     console.log("failed login: 401")
                     document.getElementById('errormsg').style.display = "block";
                 }
             } else {
-                window.location.replace(`${webServerAddress}/index.html`);
+                return response.json().then(body => {
+                    localStorage.setItem(sessionTokenKey, body.token);
+                    window.location.replace(`${webServerAddress}/index.html`);
+                });
             }
         })
         .catch(error => {
@@ -183,10 +243,12 @@ function loginWith(username, password, form) {
 
 function logout() {
     fetch(`${remoteServerAddress}/logout`, {
-        method: 'POST'
+        method: 'POST',
+        headers: authHeaders()
     })
         .then(response => {
-            if (response.ok) {
+            if (response.ok || response.status === 204) {
+                localStorage.removeItem(sessionTokenKey);
                 window.location.replace(`${webServerAddress}/login.html`);
             } else {
                 console.error("Could not logout!");
@@ -221,8 +283,8 @@ function register() {
         })
             .then(response => {
                 if (response.ok) {
+                    // loginWith redirects to the calculator once the session is open
                     loginWith(username, password1, "register");
-                    window.location.replace(`${webServerAddress}/index.html`);
                 } else {
                     if (response.status === 409) {
                         error.style.display = "block";
@@ -243,7 +305,8 @@ function register() {
 
 function getUserName() {
     fetch(`${remoteServerAddress}/users/current`, {
-        method: 'GET'
+        method: 'GET',
+        headers: authHeaders()
     })
         .then(response => {
             if (response.status === 204) {
@@ -0,0 +1,81 @@
+"""
+Benchmark of CLI batch throughput against the number of worker processes.
+
+Usage (from the repository root):
+    python -m test.benchmarks.bench_batch_workers [--rows 2000000] [--elements 100000000] [--workers 1 2 4 8]
+
+A CSV file of `--rows` rows and two float64 operand files of `--elements`
+values are generated in a temporary directory and evaluated with
+calculator_batch.run_file and calculator_batch.run_binary for every worker
+count. Throughput and the speedup over one worker are printed, the speedup
+can not exceed the number of cores printed in the header.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import test.test_base  # noqa: F401 - puts BE on sys.path
+import calculator_batch
+
+
+class NullWriter():
+    def write(self, text):
+        pass
+
+
+def make_inputs(directory, rows, elements):
+    operations = np.array(['add', 'subtract', 'multiply', 'divide'])
+    rng = np.random.default_rng(1)
+    csv_path = os.path.join(directory, 'input.csv')
+    with open(csv_path, 'w') as file:
+        for start in range(0, rows, calculator_batch.CHUNK_SIZE):
+            size = min(calculator_batch.CHUNK_SIZE, rows - start)
+            names = operations[rng.integers(0, 4, size)]
+            a = rng.integers(-10**6, 10**6, size)
+            b = rng.integers(-10**6, 10**6, size)
+            file.writelines(f'{op},{x},{y}\n' for op, x, y in zip(names.tolist(), a.tolist(), b.tolist()))
+    paths = []
+    for name in ('a.npy', 'b.npy'):
+        path = os.path.join(directory, name)
+        array = np.lib.format.open_memmap(path, mode='w+', dtype=np.float64, shape=(elements,))
+        for start in range(0, elements, calculator_batch.BINARY_CHUNK_SIZE):
+            end = min(start + calculator_batch.BINARY_CHUNK_SIZE, elements)
+            array[start:end] = rng.uniform(-1e6, 1e6, end - start)
+        array.flush()
+        del array
+        paths.append(path)
+    return csv_path, paths
+
+
+def timed(function, *args, **kwargs):
+    begin = time.perf_counter()
+    count = function(*args, **kwargs)
+    return count / (time.perf_counter() - begin)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Batch worker scaling benchmark')
+    parser.add_argument('--rows', type=int, default=2000000, help='CSV rows, 2000000 is default')
+    parser.add_argument('--elements', type=int, default=100000000, help='Binary operand elements, 100000000 is default')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8], help='Worker counts to run, 1 2 4 8 is default')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path, (path1, path2) = make_inputs(directory, args.rows, args.elements)
+        output = os.path.join(directory, 'out.npy')
+        print(f'cores: {os.cpu_count()}')
+        print(f'{"workers":>8} {"csv rows/s":>12} {"speedup":>8} {"binary elem/s":>14} {"speedup":>8}')
+        base = None
+        for workers in args.workers:
+            csv_rate = timed(calculator_batch.run_file, csv_path, NullWriter(), workers=workers)
+            binary_rate = timed(calculator_batch.run_binary, 'divide', path1, path2, output, workers=workers)
+            base = base or (csv_rate, binary_rate)
+            print(f'{workers:>8} {csv_rate:>12.0f} {csv_rate / base[0]:>8.2f} '
+                  f'{binary_rate:>14.0f} {binary_rate / base[1]:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
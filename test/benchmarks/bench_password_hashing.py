@@ -0,0 +1,77 @@
+"""
+Benchmark of /login throughput versus password hash cost and hashing pool size.
+
+Usage (from the repository root):
+    python -m test.benchmarks.bench_password_hashing [--logins 64] [--costs 12 13 14] [--workers 1 2 4 8]
+
+For every scrypt cost and hashing pool size, `--logins` concurrent logins
+are sent through the FastAPI app in-process with the artificial latency
+and rate limits disabled, while a probe keeps calling /calculate. Login throughput shows
+what the pool buys, the probe latency shows that hashing stays off the
+event loop.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+
+import test.test_base  # noqa: F401 - puts BE on sys.path
+from calculator_helper import CalculatorHelper
+import passwords
+from calculator_rest_service import app, latency, rate_limits
+
+USERNAME = 'bench_user'
+PASSWORD = 'bench-password'
+
+
+async def probe(client, stop, delays):
+    while not stop.is_set():
+        begin = time.perf_counter()
+        await client.post('/calculate', json={'operation': 'add', 'operand1': 1, 'operand2': 2})
+        delays.append(time.perf_counter() - begin)
+        await asyncio.sleep(0.001)
+
+
+async def run(logins):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+        stop = asyncio.Event()
+        delays = []
+        probe_task = asyncio.create_task(probe(client, stop, delays))
+        begin = time.perf_counter()
+        responses = await asyncio.gather(*(
+            client.post('/login', json={'username': USERNAME, 'password': PASSWORD}) for _ in range(logins)
+        ))
+        elapsed = time.perf_counter() - begin
+        stop.set()
+        await probe_task
+    assert all(response.status_code == 200 for response in responses)
+    return logins / elapsed, max(delays, default=0.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Password hashing benchmark')
+    parser.add_argument('--logins', type=int, default=64, help='Concurrent logins per run, 64 is default')
+    parser.add_argument('--costs', type=int, nargs='+', default=[12, 13, 14], help='scrypt costs (log2 N) to run, 12 13 14 is default')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8], help='Hashing pool sizes to run, 1 2 4 8 is default')
+    args = parser.parse_args()
+
+    latency.configure(enabled=False)
+    rate_limits.configure(enabled=False)
+    calculator = CalculatorHelper()
+    print(f'cores: {os.cpu_count()}')
+    print(f'{"cost":>5} {"workers":>8} {"logins/s":>10} {"max probe ms":>13}')
+    for cost in args.costs:
+        passwords.hasher.configure('scrypt', cost)
+        calculator.storage.set_password(USERNAME, passwords.hasher.hash(PASSWORD))
+        calculator.register_user(USERNAME, PASSWORD)
+        for workers in args.workers:
+            passwords.hasher.configure(workers=workers)
+            rate, delay = asyncio.run(run(args.logins))
+            print(f'{cost:>5} {workers:>8} {rate:>10.1f} {delay * 1000:>13.1f}')
+
+
+if __name__ == '__main__':
+    main()
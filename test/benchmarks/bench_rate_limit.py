@@ -0,0 +1,74 @@
+"""
+Benchmark of the rate limiter overhead per request.
+
+Usage (from the repository root):
+    python -m test.benchmarks.bench_rate_limit [--requests 200000] [--clients 10000]
+
+Measures TokenBuckets.take() on its own and the full RateLimitMiddleware
+call around a no-op ASGI application, for /calculate requests and for
+/login requests whose body is inspected, spread over `--clients` client
+addresses. Limits are set high enough that every request is admitted.
+"""
+import argparse
+import asyncio
+import time
+
+import test.test_base  # noqa: F401 - puts BE on sys.path
+from rate_limit import TokenBuckets, RateLimits, RateLimitMiddleware
+
+
+async def noop_app(scope, receive, send):
+    pass
+
+
+async def send(message):
+    pass
+
+
+def scopes(path, requests, clients):
+    return [{'type': 'http', 'path': path, 'client': (f'10.0.{i % clients // 256}.{i % 256}', 1234)}
+            for i in range(requests)]
+
+
+async def run_middleware(app, scopes, body):
+    message = {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def receive():
+        return message
+
+    begin = time.perf_counter()
+    for scope in scopes:
+        await app(scope, receive, send)
+    return (time.perf_counter() - begin) / len(scopes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rate limiter overhead benchmark')
+    parser.add_argument('--requests', type=int, default=200000, help='Requests per measurement, 200000 is default')
+    parser.add_argument('--clients', type=int, default=10000, help='Distinct client addresses, 10000 is default')
+    args = parser.parse_args()
+
+    buckets = TokenBuckets(rate=1e9, burst=1e9)
+    keys = [f'10.0.{i % args.clients // 256}.{i % 256}' for i in range(args.requests)]
+    begin = time.perf_counter()
+    for key in keys:
+        buckets.take(key)
+    take = (time.perf_counter() - begin) / len(keys)
+
+    limits = RateLimits(clients=TokenBuckets(rate=1e9, burst=1e9), usernames=TokenBuckets(rate=1e9, burst=1e9))
+    limited = RateLimitMiddleware(noop_app, limits)
+    calculate = scopes('/calculate', args.requests, args.clients)
+    login = scopes('/login', args.requests, args.clients)
+    body = b'{"username": "admin", "password": "test1234"}'
+    baseline = asyncio.run(run_middleware(noop_app, calculate, body))
+    plain = asyncio.run(run_middleware(limited, calculate, body))
+    inspected = asyncio.run(run_middleware(limited, login, body))
+
+    print(f'{"measurement":>28} {"us/request":>11}')
+    print(f'{"TokenBuckets.take":>28} {take * 1e6:>11.2f}')
+    print(f'{"middleware /calculate":>28} {(plain - baseline) * 1e6:>11.2f}')
+    print(f'{"middleware /login":>28} {(inspected - baseline) * 1e6:>11.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark of /calculate throughput with and without the result cache.
+
+Usage (from the repository root):
+    python -m test.benchmarks.bench_result_cache [--requests 20000] [--distinct 100] [--cache-size 4096]
+
+A repetitive workload of `--distinct` different calculations is sent
+through the FastAPI app in-process, with rate limits disabled, once with
+the cache disabled and once with it enabled, and the throughput of both runs is printed together with
+the model-level cost of Calculation.calculate().
+"""
+import argparse
+import random
+import time
+
+import test.test_base  # noqa: F401 - puts BE on sys.path
+from starlette.testclient import TestClient
+
+import models
+from models import Calculation, Opertions
+from calculator_rest_service import app, rate_limits
+
+
+def workload(requests, distinct):
+    rng = random.Random(1)
+    pool = [
+        {'operation': rng.choice(list(Opertions)).value, 'operand1': rng.randint(1, 10**6), 'operand2': rng.randint(1, 10**6)}
+        for _ in range(distinct)
+    ]
+    return [rng.choice(pool) for _ in range(requests)]
+
+
+def run_http(client, payloads):
+    begin = time.perf_counter()
+    for payload in payloads:
+        client.post('/calculate', json=payload)
+    return len(payloads) / (time.perf_counter() - begin)
+
+
+def run_model(payloads):
+    bodies = [Calculation(**payload) for payload in payloads]
+    begin = time.perf_counter()
+    for body in bodies:
+        body.calculate()
+    return len(bodies) / (time.perf_counter() - begin)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Result cache benchmark')
+    parser.add_argument('--requests', type=int, default=20000, help='Calculations per run, 20000 is default')
+    parser.add_argument('--distinct', type=int, default=100, help='Distinct calculations in the workload, 100 is default')
+    parser.add_argument('--cache-size', type=int, default=4096, help='Result cache size, 4096 is default')
+    args = parser.parse_args()
+
+    rate_limits.configure(enabled=False)
+    payloads = workload(args.requests, args.distinct)
+    print(f'{"mode":>10} {"http req/s":>12} {"model calc/s":>14} {"hit ratio":>10}')
+    with TestClient(app) as client:
+        for mode in ('uncached', 'cached'):
+            if mode == 'cached':
+                models.enable_result_cache(args.cache_size)
+            else:
+                models.disable_result_cache()
+            http = run_http(client, payloads)
+            model = run_model(payloads)
+            stats = models.result_cache.stats() if models.result_cache is not None else None
+            ratio = f'{stats["hits"] / (stats["hits"] + stats["misses"]):.3f}' if stats else '-'
+            print(f'{mode:>10} {http:>12.0f} {model:>14.0f} {ratio:>10}')
+    models.disable_result_cache()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmark of CalculatorHelper register_user/login latency versus user count.
+
+Usage (from the repository root):
+    python -m test.benchmarks.bench_user_store [--max-users 1000000] [--samples 1000]
+
+The store is filled up to each size, then the mean latency of registering
+and logging in a sample of users is measured. With a keyed store both stay
+flat as the number of users grows. Password hashing is set to a single
+PBKDF2 iteration, so the store is measured rather than the hash, see
+bench_password_hashing for that.
+"""
+import argparse
+import time
+
+import test.test_base  # noqa: F401 - puts BE on sys.path
+from calculator_helper import CalculatorHelper
+import passwords
+
+
+def measure(calculator, start, samples):
+    begin = time.perf_counter()
+    for i in range(start, start + samples):
+        calculator.register_user(f'user{i}', 'password')
+    register = (time.perf_counter() - begin) / samples
+
+    begin = time.perf_counter()
+    for i in range(start, start + samples):
+        calculator.login(f'user{i}', 'password')
+    login = (time.perf_counter() - begin) / samples
+    return register, login
+
+
+def main():
+    parser = argparse.ArgumentParser(description='User store benchmark')
+    parser.add_argument('--max-users', type=int, default=1_000_000, help='Largest store size, 1000000 is default')
+    parser.add_argument('--samples', type=int, default=1000, help='Operations timed per size, 1000 is default')
+    args = parser.parse_args()
+
+    passwords.hasher.configure('pbkdf2', cost=1)
+    calculator = CalculatorHelper()
+    next_id = 0
+    size = 1000
+    print(f'{"users":>10} {"register us":>12} {"login us":>12}')
+    while size <= args.max_users:
+        # fill the store up to the target size
+        while calculator.user_count() < size:
+            calculator.register_user(f'filler{next_id}', 'password')
+            next_id += 1
+        register, login = measure(calculator, next_id, args.samples)
+        next_id += args.samples
+        print(f'{size:>10} {register * 1e6:>12.2f} {login * 1e6:>12.2f}')
+        size *= 10
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,320 @@
+"""
+Open-loop load generator for the calculator API.
+
+Usage (from the repository root):
+    python -m test.benchmarks.load_generator [--url http://localhost:5001] [--rate 100] [--duration 10]
+        [--mix calculate=70,users_current=20,login=5,register=5] [--users 16] [--output report.json]
+
+Requests start on a fixed schedule, one every 1/rate seconds, whether or
+not the earlier ones have completed. A closed loop that waits for every
+answer before it sends the next request slows down with the server and
+never sees the queue it would have built up (coordinated omission). Here
+latency is measured from the time a request was scheduled to start, so a
+stalled server, or a generator that falls behind its schedule, shows up
+in the percentiles. The time from handing the request to the client is
+reported separately as service time.
+
+The traffic is a weighted mix of operations. Logins use a pool of users
+registered before the run, /users/current uses the session of the last
+login and every registration creates a new user. The report is printed
+as JSON, latencies are in milliseconds. All requests come from one
+address, start the server with --no-rate-limit to measure capacity
+rather than the rate limiter.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+import uuid
+
+import httpx
+
+from test.calculator_client.client import Client
+from test.calculator_client.api.actions import calculate, login, register, users_current
+from test.calculator_client.models.calculation import Calculation
+from test.calculator_client.models.opertions import Opertions
+from test.calculator_client.models.user import User
+
+OPERATIONS = ('calculate', 'login', 'register', 'users_current')
+
+DEFAULT_MIX = 'calculate=70,users_current=20,login=5,register=5'
+
+PERCENTILES = (50, 75, 90, 95, 99, 99.9, 99.99)
+
+PASSWORD = 'load-password'
+
+
+class LatencyHistogram():
+    '''
+        Latency histogram with a bounded relative error, in the style of HdrHistogram.
+
+        Values are recorded as integer microseconds. Values below
+        2**precision_bits get a bucket of their own, larger values share a
+        bucket with the values that agree in their top precision_bits bits,
+        so a bucket is never wider than 2**(1 - precision_bits) of its
+        values: under 1% with the default 8 bits. Recording is O(1) and the
+        memory grows with the logarithm of the value range.
+    '''
+    def __init__(self, precision_bits=8):
+        self.precision_bits = precision_bits
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self._buckets = {}  # (shift, top bits) -> count
+
+    def record(self, seconds):
+        micros = max(0, int(seconds * 1e6))
+        shift = max(0, micros.bit_length() - self.precision_bits)
+        key = (shift, micros >> shift)
+        self._buckets[key] = self._buckets.get(key, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def percentile(self, percent):
+        """
+        Get the value below which a percentage of the recorded values fall.
+
+        Args:
+            percent (float): The percentile, 0 to 100.
+
+        Returns:
+            float: The upper bound of the bucket holding the percentile in
+            seconds, never above the largest recorded value, 0.0 if empty.
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(percent / 100 * self.count))
+        seen = 0
+        for shift, top in sorted(self._buckets, key=lambda key: key[1] << key[0]):
+            seen += self._buckets[shift, top]
+            if seen >= rank:
+                return min(self.max, (((top + 1) << shift) - 1) / 1e6)
+        return self.max
+
+    def summary(self):
+        """
+        Summarize the histogram.
+
+        Returns:
+            dict: Count, min, mean, max and the PERCENTILES in milliseconds.
+        """
+        if not self.count:
+            return {'count': 0}
+        summary = {'count': self.count, 'min': self.min * 1000, 'mean': self.total / self.count * 1000}
+        for percent in PERCENTILES:
+            summary[f'p{percent:g}'] = self.percentile(percent) * 1000
+        summary['max'] = self.max * 1000
+        return {key: round(value, 3) for key, value in summary.items()}
+
+
+class OperationStats():
+    '''
+        Outcome counts and latencies of one operation.
+    '''
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.service_time = LatencyHistogram()
+        self.outcomes = {}
+
+    def record(self, outcome, latency, service_time):
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        self.latency.record(latency)
+        self.service_time.record(service_time)
+
+    def report(self):
+        return {
+            'count': self.latency.count,
+            'outcomes': dict(sorted(self.outcomes.items())),
+            'latency_ms': self.latency.summary(),
+            'service_time_ms': self.service_time.summary(),
+        }
+
+
+def parse_mix(spec):
+    """
+    Parse an operation mix.
+
+    Args:
+        spec (str): Comma separated 'operation=weight' pairs, e.g. 'calculate=9,login=1'.
+
+    Returns:
+        dict: Weight by operation, operations without a weight are left out.
+
+    Raises:
+        ValueError: If an operation is unknown or a weight is negative or not a number.
+    """
+    mix = {}
+    for part in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{name}', expected one of {OPERATIONS}")
+        try:
+            weight = float(weight)
+        except ValueError:
+            raise ValueError(f"Weight of '{name}' must be a number, got '{weight}'") from None
+        if weight < 0:
+            raise ValueError(f"Weight of '{name}' must not be negative, got {weight}")
+        if weight:
+            mix[name] = weight
+    if not mix:
+        raise ValueError('The operation mix is empty')
+    return mix
+
+
+class Workload():
+    '''
+        The requests of each operation, issued with the generated async client.
+    '''
+    def __init__(self, client, users, seed=None):
+        self.client = client
+        self.users = users
+        self.random = random.Random(seed)
+        self.prefix = f'load-{uuid.uuid4().hex[:8]}'
+        self.registered = 0
+
+    async def setup(self):
+        """
+        Register the login users and open the session used by /users/current.
+
+        Raises:
+            RuntimeError: If the first pool user cannot log in.
+        """
+        for user in self.users:
+            await register.asyncio_detailed(client=self.client, body=User(username=user, password=PASSWORD))
+        # the client keeps the session cookie of its last login
+        response = await login.asyncio_detailed(client=self.client, body=User(username=self.users[0], password=PASSWORD))
+        if response.status_code != 200:
+            raise RuntimeError(f'Login of the load users failed with {int(response.status_code)}')
+
+    async def calculate(self, index):
+        body = Calculation(operation=self.random.choice(list(Opertions)),
+                           operand1=self.random.uniform(-1000, 1000), operand2=self.random.uniform(1, 1000))
+        return await calculate.asyncio_detailed(client=self.client, body=body)
+
+    async def login(self, index):
+        user = self.users[index % len(self.users)]
+        return await login.asyncio_detailed(client=self.client, body=User(username=user, password=PASSWORD))
+
+    async def register(self, index):
+        self.registered += 1
+        user = User(username=f'{self.prefix}-{self.registered}', password=PASSWORD)
+        return await register.asyncio_detailed(client=self.client, body=user)
+
+    async def users_current(self, index):
+        return await users_current.asyncio_detailed(client=self.client)
+
+
+async def generate(client, rate, duration, mix, users=16, seed=None):
+    """
+    Run an open-loop load test.
+
+    Args:
+        client (Client): Generated API client, its async httpx client is used.
+        rate (float): Requests started per second.
+        duration (float): Seconds during which requests are started.
+        mix (dict): Weight by operation, see parse_mix.
+        users (int): Users in the login pool (default=16).
+        seed (int, optional): Seed of the operation choice and the operands.
+
+    Returns:
+        dict: The report, see the module documentation.
+    """
+    workload = Workload(client, [f'load-user-{i}' for i in range(users)], seed)
+    await workload.setup()
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    stats = {name: OperationStats() for name in names}
+    total = OperationStats()
+    choices = workload.random.choices(names, weights, k=max(1, round(rate * duration)))
+
+    async def issue(name, index, scheduled):
+        started = time.perf_counter()
+        try:
+            response = await getattr(workload, name)(index)
+            outcome = str(int(response.status_code))
+        except Exception as e:
+            outcome = type(e).__name__
+        finished = time.perf_counter()
+        # measured from the schedule, so time spent waiting behind a slow server counts
+        stats[name].record(outcome, finished - scheduled, finished - started)
+        total.record(outcome, finished - scheduled, finished - started)
+
+    tasks = set()
+    interval = 1.0 / rate
+    max_lag = 0.0
+    begin = time.perf_counter()
+    for index, name in enumerate(choices):
+        scheduled = begin + index * interval
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            max_lag = max(max_lag, -delay)
+        task = asyncio.create_task(issue(name, index, scheduled))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - begin
+
+    report = {
+        'url': str(client.get_async_httpx_client().base_url),
+        'rate': rate,
+        'duration': duration,
+        'requests': len(choices),
+        'elapsed': round(elapsed, 3),
+        'throughput': round(total.latency.count / elapsed, 1),
+        # how late the generator itself started requests, a large lag means
+        # it could not keep up and the measured rate is below the target
+        'max_schedule_lag_ms': round(max_lag * 1000, 3),
+        'mix': mix,
+    }
+    report.update(total.report())
+    report['operations'] = {name: stats[name].report() for name in names}
+    return report
+
+
+async def run(url, rate, duration, mix, users, connections, timeout, seed):
+    client = Client(base_url=url, timeout=httpx.Timeout(timeout),
+                    httpx_args={'limits': httpx.Limits(max_connections=connections)})
+    async with client.get_async_httpx_client():
+        return await generate(client, rate, duration, mix, users, seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Open-loop load generator for the calculator API')
+    parser.add_argument('--url', default='http://localhost:5001', help='Base URL of the API, http://localhost:5001 is default')
+    parser.add_argument('--rate', type=float, default=100, help='Requests started per second, 100 is default')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds of load, 10 is default')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f"Operation weights, '{DEFAULT_MIX}' is default")
+    parser.add_argument('--users', type=int, default=16, help='Users in the login pool, 16 is default')
+    parser.add_argument('--connections', type=int, default=100, help='Maximum open connections, 100 is default')
+    parser.add_argument('--timeout', type=float, default=30, help='Request timeout in seconds, 30 is default')
+    parser.add_argument('--seed', type=int, help='Seed of the operation choice and the operands')
+    parser.add_argument('-o', '--output', help='Write the JSON report to this file instead of stdout')
+    args = parser.parse_args()
+    if args.rate <= 0 or args.duration <= 0 or args.users < 1 or args.connections < 1:
+        parser.error('--rate and --duration must be positive, --users and --connections at least 1')
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    report = asyncio.run(run(args.url, args.rate, args.duration, mix, args.users,
+                             args.connections, args.timeout, args.seed))
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
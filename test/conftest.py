@@ -0,0 +1,255 @@
+import contextlib
+import os
+import socket
+import subprocess
+import sys
+import time
+from http.cookiejar import DefaultCookiePolicy
+
+import pytest
+
+BE_DIR = os.path.join(os.path.dirname(__file__), '..', 'BE')
+
+# Add the BE directory to the path
+sys.path.append(BE_DIR)
+
+# seconds a spawned server gets to answer its first request
+STARTUP_TIMEOUT = 30.0
+
+# server options for tests: no artificial latency, no rate limits and cheap
+# password hashes, the behaviour under test is the same without the cost
+SERVER_OPTIONS = ('--no-latency', '--no-rate-limit', '--password-hash', 'pbkdf2', '--password-cost', '1')
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('calculator', 'calculator API tests')
+    group.addoption('--api-mode', choices=('inprocess', 'socket'), default=os.environ.get('API_MODE', 'inprocess'),
+                    help='Drive the API in process through its ASGI interface, or through a real socket '
+                         'served by a spawned uvicorn process, inprocess is default (env API_MODE)')
+    group.addoption('--api-url', default=os.environ.get('API_URL'),
+                    help='Test an already running server at this URL instead, implies socket mode (env API_URL)')
+
+
+class _WebSocket():
+    '''
+        The send()/recv() interface of websockets.sync.client for a starlette test session.
+    '''
+    def __init__(self, session):
+        self.session = session
+
+    def send(self, message):
+        self.session.send_text(message)
+
+    def recv(self):
+        return self.session.receive_text()
+
+
+class ApiServer():
+    '''
+        The calculator API under test, reached in process or through a socket.
+
+        In process the FastAPI app runs on the event loop of a starlette
+        TestClient: requests go through the ASGI interface without a socket,
+        the lifespan runs once for the session and there is nothing to wait
+        for. In socket mode the same calls go over HTTP to a uvicorn server.
+        Tests only use the helpers below and run unchanged in both modes.
+
+        get(), post() and request() keep no cookies, like requests.post.
+        session() returns a client that keeps them, like requests.Session.
+    '''
+    def __init__(self, base_url, transport=None, websocket_connect=None, reset=None, app=None):
+        import httpx
+
+        self.base_url = base_url
+        self._app = app
+        self._transport = transport
+        self._websocket_connect = websocket_connect
+        self._reset = reset
+        self.http = httpx.Client(base_url=base_url, transport=transport)
+        self.http.cookies.jar.set_policy(DefaultCookiePolicy(allowed_domains=()))
+
+    def request(self, method, path, **kwargs):
+        return self.http.request(method, path, **kwargs)
+
+    def get(self, path, **kwargs):
+        return self.http.get(path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.http.post(path, **kwargs)
+
+    def session(self):
+        """
+        Get a new HTTP client that keeps the cookies the server sets.
+
+        Returns:
+            httpx.Client: The client, requests take paths relative to the API.
+        """
+        import httpx
+        return httpx.Client(base_url=self.base_url, transport=self._transport)
+
+    def client(self, **kwargs):
+        """
+        Get a generated API client talking to this server.
+
+        Args:
+            **kwargs: Further arguments of calculator_client.Client.
+
+        Returns:
+            calculator_client.Client: The client. In process its async calls
+            run the app on the caller's event loop through httpx.ASGITransport.
+        """
+        import httpx
+        from test.calculator_client.client import Client
+        httpx_args = dict(kwargs.pop('httpx_args', {}))
+        if self._transport is not None:
+            httpx_args['transport'] = self._transport
+        client = Client(base_url=self.base_url, httpx_args=httpx_args, **kwargs)
+        if self._app is not None:
+            client.set_async_httpx_client(httpx.AsyncClient(
+                base_url=self.base_url, transport=httpx.ASGITransport(app=self._app)))
+        return client
+
+    def websocket(self, path):
+        """
+        Open a WebSocket connection.
+
+        Args:
+            path (str): The WebSocket route, e.g. '/ws/calculate'.
+
+        Returns:
+            A context manager yielding a connection with send() and recv().
+        """
+        if self._websocket_connect is not None:
+            return self._websocket_connect(path)
+        from websockets.sync.client import connect
+        return connect(self.base_url.replace('http', 'ws', 1) + path)
+
+    def reset(self):
+        """
+        Drop all users and sessions of an in-process server, see
+        CalculatorHelper.reset. A server in another process keeps its state,
+        tests against it use their own usernames.
+        """
+        if self._reset is not None:
+            self._reset()
+
+    def close(self):
+        self.http.close()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(base_url, process=None, timeout=STARTUP_TIMEOUT):
+    """
+    Poll a server until it answers, instead of sleeping for a fixed time.
+
+    Args:
+        base_url (str): The server URL.
+        process (subprocess.Popen, optional): The server process, polling
+            stops early when it exits.
+        timeout (float): Maximum seconds to wait.
+
+    Raises:
+        RuntimeError: If the server exits or does not answer in time.
+    """
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    delay = 0.01
+    while True:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f'API server exited with {process.returncode} before it was ready')
+        try:
+            if httpx.get(base_url + '/openapi.json', timeout=1).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError(f'API server at {base_url} was not ready after {timeout}s')
+        time.sleep(delay)
+        delay = min(delay * 2, 0.2)
+
+
+@contextlib.contextmanager
+def inprocess_server():
+    from starlette.testclient import TestClient
+    from calculator_rest_service import app, latency, rate_limits
+    from calculator_helper import CalculatorHelper
+    import passwords
+
+    settings = (latency.enabled, rate_limits.enabled, passwords.hasher.algorithm, passwords.hasher.cost)
+    latency.configure(enabled=False)
+    rate_limits.configure(enabled=False)
+    passwords.hasher.configure('pbkdf2', 1)
+    try:
+        with TestClient(app) as app_client:
+            # the transport of the test client runs requests on its event loop,
+            # every client built on it shares the app and its single lifespan
+            server = ApiServer(str(app_client.base_url), app_client._transport,
+                               lambda path: _websocket_session(app_client, path), CalculatorHelper.reset, app)
+            try:
+                yield server
+            finally:
+                server.close()
+    finally:
+        latency.configure(enabled=settings[0])
+        rate_limits.configure(enabled=settings[1])
+        passwords.hasher.configure(settings[2], settings[3])
+
+
+@contextlib.contextmanager
+def _websocket_session(app_client, path):
+    with app_client.websocket_connect(path) as session:
+        yield _WebSocket(session)
+
+
+@contextlib.contextmanager
+def socket_server():
+    # every pytest-xdist worker starts its own server on its own free port
+    port = free_port()
+    base_url = f'http://127.0.0.1:{port}'
+    process = subprocess.Popen([sys.executable, 'calculator.py', '--rest', '--port', str(port), *SERVER_OPTIONS],
+                               cwd=BE_DIR)
+    try:
+        wait_until_ready(base_url, process)
+        server = ApiServer(base_url)
+        try:
+            yield server
+        finally:
+            server.close()
+    finally:
+        process.terminate()
+        process.wait()
+
+
+@pytest.fixture(scope='session')
+def api_server(request):
+    """
+    The API under test, shared by all tests of the session or pytest-xdist
+    worker, see ApiServer.
+    """
+    url = request.config.getoption('--api-url')
+    if url:
+        wait_until_ready(url.rstrip('/'))
+        server = ApiServer(url.rstrip('/'))
+        yield server
+        server.close()
+    elif request.config.getoption('--api-mode') == 'socket':
+        with socket_server() as server:
+            yield server
+    else:
+        with inprocess_server() as server:
+            yield server
+
+
+@pytest.fixture
+def api(api_server):
+    """
+    The API under test, starting from a fresh CalculatorHelper when it runs in process.
+    """
+    api_server.reset()
+    return api_server
@@ -0,0 +1,154 @@
+import asyncio
+import pytest
+from test.test_base import TestBase
+from admission import AdmissionClass, AdmissionController, AdmissionMiddleware
+
+
+class TestAdmissionClass(TestBase):
+    def test_queue_overflow_is_refused(self):
+        # Arrange
+        admission_class = AdmissionClass("default", limit=1, queue_size=1, timeout=1)
+
+        async def scenario():
+            first = await admission_class.acquire()
+            waiter = asyncio.ensure_future(admission_class.acquire())
+            await asyncio.sleep(0)
+            refused = await admission_class.acquire()
+            admission_class.release()
+            return first, refused, await waiter
+
+        # Act
+        first, refused, second = asyncio.run(scenario())
+
+        # Assert
+        assert (first, refused, second) == (True, False, True)
+        assert admission_class.stats() == {"active": 1, "queued": 0, "admitted": 2, "rejected": 1}
+
+    def test_waiters_are_admitted_in_order(self):
+        # Arrange
+        admission_class = AdmissionClass("default", limit=1, queue_size=10, timeout=1)
+        order = []
+
+        async def request(i):
+            await admission_class.acquire()
+            order.append(i)
+            await asyncio.sleep(0)
+            admission_class.release()
+
+        async def scenario():
+            await asyncio.gather(*(request(i) for i in range(5)))
+
+        # Act
+        asyncio.run(scenario())
+
+        # Assert
+        assert order == [0, 1, 2, 3, 4]
+        assert admission_class.active == 0
+
+    def test_wait_times_out(self):
+        # Arrange
+        admission_class = AdmissionClass("default", limit=1, queue_size=1, timeout=0.01)
+
+        async def scenario():
+            await admission_class.acquire()
+            return await admission_class.acquire()
+
+        # Act
+        result = asyncio.run(scenario())
+
+        # Assert
+        assert result is False
+        assert admission_class.queued == 0
+
+    def test_cancelled_waiter_does_not_leak_a_slot(self):
+        # Arrange
+        admission_class = AdmissionClass("default", limit=1, queue_size=1, timeout=1)
+
+        async def scenario():
+            await admission_class.acquire()
+            waiter = asyncio.ensure_future(admission_class.acquire())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+            admission_class.release()
+
+        # Act
+        asyncio.run(scenario())
+
+        # Assert
+        assert admission_class.active == 0
+        assert admission_class.queued == 0
+
+    def test_slot_handed_over_at_the_timeout_is_used(self, monkeypatch):
+        # Arrange - release() resolves the waiter, wait_for raises anyway
+        admission_class = AdmissionClass("default", limit=1, queue_size=1, timeout=1)
+
+        async def wait_for(waiter, timeout):
+            admission_class.release()
+            raise asyncio.TimeoutError
+
+        async def scenario():
+            await admission_class.acquire()
+            monkeypatch.setattr(asyncio, "wait_for", wait_for)
+            admitted = await admission_class.acquire()
+            monkeypatch.undo()
+            admission_class.release()
+            return admitted
+
+        # Act
+        admitted = asyncio.run(scenario())
+
+        # Assert
+        assert admitted is True
+        assert admission_class.stats() == {"active": 0, "queued": 0, "admitted": 2, "rejected": 0}
+
+    def test_invalid_settings_are_rejected(self):
+        # Act & Assert
+        with pytest.raises(ValueError):
+            AdmissionClass("default", limit=0, queue_size=1)
+        with pytest.raises(ValueError):
+            AdmissionClass("default", limit=1, queue_size=-1)
+
+
+class TestAdmissionMiddleware(TestBase):
+    def test_slow_class_does_not_block_default_class(self):
+        # Arrange
+        controller = AdmissionController([
+            AdmissionClass("default", limit=1, queue_size=0),
+            AdmissionClass("login", limit=1, queue_size=0, retry_after=2),
+        ], routes={"/login": "login"})
+        release_login = asyncio.Event()
+        statuses = {}
+
+        async def app(scope, receive, send):
+            if scope["path"] == "/login":
+                await release_login.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        middleware = AdmissionMiddleware(app, controller)
+
+        async def request(name, path):
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    statuses[name] = (message["status"], dict(message["headers"]).get(b"retry-after"))
+            await middleware({"type": "http", "path": path}, None, send)
+
+        async def scenario():
+            slow = asyncio.ensure_future(request("login", "/login"))
+            await asyncio.sleep(0)
+            await request("second login", "/login")
+            await request("calculate", "/calculate")
+            release_login.set()
+            await slow
+
+        # Act
+        asyncio.run(scenario())
+
+        # Assert
+        assert statuses == {
+            "login": (200, None),
+            "second login": (503, b"2"),
+            "calculate": (200, None),
+        }
+        assert controller.stats()["login"]["active"] == 0
@@ -1,51 +1,24 @@
 import pytest
-import requests
 import json
-import time
-import subprocess
-import os
-import signal
-import sys
+import uuid
+
+# a server behind --api-url keeps its users, every run registers new ones
+RUN = uuid.uuid4().hex[:8]
+
+
+def reject_constant(name):
+    raise ValueError(f"{name} is not valid JSON")
 
 
 class TestCalculatorAPI:
-    @classmethod
-    def setup_class(cls):
-        """Start the REST API server before running tests"""
-        cls.base_url = "http://localhost:5001"  # Using port 5001 to avoid conflicts
-        cls.api_process = None
-        
-        # Start the REST API server
-        try:
-            # Change to the BE directory
-            be_path = os.path.join(os.path.dirname(__file__), '..', 'BE')
-            cls.api_process = subprocess.Popen([
-                sys.executable, 'calculator.py', '--rest', '--port', '5001'
-            ], cwd=be_path)
-            
-            # Wait for the server to start
-            time.sleep(3)
-            
-            # Test if server is running
-            response = requests.get(f"{cls.base_url}/", timeout=5)
-            if response.status_code != 200:
-                raise Exception("API server didn't start properly")
-                
-        except Exception as e:
-            if cls.api_process:
-                cls.api_process.terminate()
-            raise Exception(f"Failed to start API server: {e}")
-    
-    @classmethod
-    def teardown_class(cls):
-        """Stop the REST API server after all tests"""
-        if cls.api_process:
-            cls.api_process.terminate()
-            cls.api_process.wait()
+    @pytest.fixture(autouse=True)
+    def setup_api(self, api):
+        """Use the API server shared by the test session, see conftest.api"""
+        self.api = api
     
     def test_api_is_running(self):
         """Test that the API is accessible"""
-        response = requests.get(f"{self.base_url}/")
+        response = self.api.get("/")
         assert response.status_code == 200
     
     def test_add_endpoint(self):
@@ -58,8 +31,7 @@ class TestCalculatorAPI:
         }
         
         # Act
-        response = requests.post(
-            f"{self.base_url}/calculate", 
+        response = self.api.post("/calculate", 
             json=payload,
             headers={'Content-Type': 'application/json'}
         )
@@ -79,8 +51,7 @@ class TestCalculatorAPI:
         }
         
         # Act
-        response = requests.post(
-            f"{self.base_url}/calculate", 
+        response = self.api.post("/calculate", 
             json=payload,
             headers={'Content-Type': 'application/json'}
         )
@@ -100,8 +71,7 @@ class TestCalculatorAPI:
         }
         
         # Act
-        response = requests.post(
-            f"{self.base_url}/calculate", 
+        response = self.api.post("/calculate", 
             json=payload,
             headers={'Content-Type': 'application/json'}
         )
@@ -121,8 +91,7 @@ class TestCalculatorAPI:
         }
         
         # Act
-        response = requests.post(
-            f"{self.base_url}/calculate", 
+        response = self.api.post("/calculate", 
             json=payload,
             headers={'Content-Type': 'application/json'}
         )
@@ -142,8 +111,7 @@ class TestCalculatorAPI:
         }
         
         # Act
-        response = requests.post(
-            f"{self.base_url}/calculate", 
+        response = self.api.post("/calculate", 
             json=payload,
             headers={'Content-Type': 'application/json'}
         )
@@ -163,8 +131,7 @@ class TestCalculatorAPI:
         }
         
         # Act
-        response = requests.post(
-            f"{self.base_url}/calculate", 
+        response = self.api.post("/calculate", 
             json=payload,
             headers={'Content-Type': 'application/json'}
         )
@@ -183,8 +150,136 @@ class TestCalculatorAPI:
         }
         
         # Act
-        response = requests.post(
-            f"{self.base_url}/calculate", 
+        response = self.api.post("/calculate", 
+            json=payload,
+            headers={'Content-Type': 'application/json'}
+        )
+        
+        # Assert
+        assert response.status_code == 422  # Validation error
+        result = response.json()
+        assert "detail" in result
+    
+    def test_calculate_cache_stats(self):
+        """Test the result cache statistics endpoint"""
+        # Act
+        response = self.api.get("/calculate/cache")
+        
+        # Assert
+        assert response.status_code == 200
+        result = response.json()
+        assert set(result) == {"hits", "misses", "evictions", "size", "maxsize"}
+    
+    def test_batch_endpoint(self):
+        """Test the vectorized batch operation via API"""
+        # Arrange
+        payload = {
+            "operations": ["add", "subtract", "multiply", "divide"],
+            "operands1": [5, 10, 4, 10],
+            "operands2": [3, 3, 5, 2]
+        }
+        
+        # Act
+        response = self.api.post("/calculate/batch", 
+            json=payload,
+            headers={'Content-Type': 'application/json'}
+        )
+        
+        # Assert
+        assert response.status_code == 200
+        result = response.json()
+        assert result["results"] == [8, 7, 20, 5]
+        assert result["errors"] == [None, None, None, None]
+    
+    def test_batch_divide_by_zero_error_slot(self):
+        """Test divide by zero only fails its own element in a batch"""
+        # Arrange
+        payload = {
+            "operations": ["divide", "add"],
+            "operands1": [10, 1],
+            "operands2": [0, 2]
+        }
+        
+        # Act
+        response = self.api.post("/calculate/batch", 
+            json=payload,
+            headers={'Content-Type': 'application/json'}
+        )
+        
+        # Assert
+        assert response.status_code == 200
+        result = response.json()
+        assert result["results"] == [None, 3]
+        assert result["errors"][0] is not None
+        assert result["errors"][1] is None
+    
+    @pytest.mark.parametrize("operation,expected", [
+        ("sum", 2.0),
+        ("min", -1e16),
+        ("max", 1e16),
+    ])
+    def test_reduce_endpoint(self, operation, expected):
+        """Test the n-ary reductions via API"""
+        # Arrange
+        payload = {"operation": operation, "operands": [1e16, 1.0, -1e16] + [0.1] * 10}
+        
+        # Act
+        response = self.api.post("/reduce", json=payload)
+        
+        # Assert
+        assert response.status_code == 200
+        assert response.json()["result"] == expected
+    
+    def test_reduce_endpoint_overflow(self):
+        """Test a sum that overflows is not an internal error"""
+        # Act
+        response = self.api.post("/reduce", json={"operation": "sum", "operands": [1e308, 1e308]})
+        
+        # Assert - infinity has no JSON representation, like /calculate it is null
+        assert response.status_code == 200
+        assert response.json()["result"] is None
+    
+    def test_reduce_empty_min_fails(self):
+        """Test min of no operands returns an error"""
+        # Act
+        response = self.api.post("/reduce", json={"operation": "min", "operands": []})
+        
+        # Assert
+        assert response.status_code == 500
+        assert "empty" in response.json()["detail"]
+    
+    def test_scan_endpoint(self):
+        """Test running totals via API"""
+        # Arrange
+        payload = {"operation": "add", "operands": [1, 2, 3, 4]}
+        
+        # Act
+        response = self.api.post("/scan", json=payload)
+        
+        # Assert
+        assert response.status_code == 200
+        assert response.json()["results"] == [1, 3, 6, 10]
+    
+    def test_scan_divide_by_zero_fails(self):
+        """Test a division by zero in a scan returns an error"""
+        # Act
+        response = self.api.post("/scan", json={"operation": "divide", "operands": [1, 0]})
+        
+        # Assert
+        assert response.status_code == 500
+        assert response.json()["detail"] == "float division by zero"
+    
+    def test_batch_length_mismatch(self):
+        """Test batch with arrays of different length returns validation error"""
+        # Arrange
+        payload = {
+            "operations": ["add", "add"],
+            "operands1": [1, 2],
+            "operands2": [3]
+        }
+        
+        # Act
+        response = self.api.post("/calculate/batch", 
             json=payload,
             headers={'Content-Type': 'application/json'}
         )
@@ -194,17 +289,128 @@ class TestCalculatorAPI:
         result = response.json()
         assert "detail" in result
     
+    def test_stream_endpoint(self):
+        """Test NDJSON streaming calculations via API"""
+        # Arrange
+        records = [
+            {"operation": "add", "operand1": 5, "operand2": 3},
+            {"operation": "divide", "operand1": 1, "operand2": 0},
+            {"operation": "invalid_op", "operand1": 1, "operand2": 2},
+            {"operation": "multiply", "operand1": 4, "operand2": 5},
+        ]
+        def body():
+            for record in records:
+                yield (json.dumps(record) + "\n").encode()
+        
+        # Act
+        response = self.api.post("/calculate/stream",
+            content=body(),
+            headers={'Content-Type': 'application/x-ndjson'}
+        )
+        lines = [json.loads(line) for line in response.iter_lines() if line]
+        
+        # Assert
+        assert response.status_code == 200
+        assert len(lines) == 4
+        assert lines[0]["result"] == 8
+        assert "detail" in lines[1]
+        assert "detail" in lines[2]
+        assert lines[3]["result"] == 20
+    
+    def test_websocket_calculations(self):
+        """Test pipelined calculations over the WebSocket channel"""
+        # Arrange
+        messages = [
+            {"id": 1, "operation": "add", "operand1": 5, "operand2": 3},
+            {"id": "two", "operation": "divide", "operand1": 1, "operand2": 0},
+            {"id": 3, "operation": "multiply", "operand1": 4, "operand2": 5},
+            {"id": 4, "operation": "multiply", "operand1": 1e308, "operand2": 10},
+            {"id": 5, "operation": "add", "operand1": "nan", "operand2": 1},
+        ]
+        
+        # Act - parsed like JSON.parse of a browser, which rejects Infinity and NaN
+        with self.api.websocket("/ws/calculate") as websocket:
+            for message in messages:
+                websocket.send(json.dumps(message))
+            replies = {reply["id"]: reply for reply in (json.loads(websocket.recv(), parse_constant=reject_constant)
+                                                        for _ in messages)}
+            websocket.send("not json")
+            invalid = json.loads(websocket.recv())
+        
+        # Assert
+        assert replies[1]["result"] == 8
+        assert "detail" in replies["two"]
+        assert replies[3]["result"] == 20
+        assert replies[4]["result"] is None
+        assert replies[5]["result"] is None
+        assert invalid["id"] is None
+        assert "detail" in invalid
+    
+    def test_evaluate_endpoint(self):
+        """Test expression evaluation via API"""
+        # Arrange
+        payload = {"expression": "(1 + 2) * 3 - 4 / 2"}
+        
+        # Act
+        response = self.api.post("/evaluate", json=payload)
+        
+        # Assert
+        assert response.status_code == 200
+        assert response.json()["result"] == 7
+    
+    def test_evaluate_invalid_expression(self):
+        """Test evaluating unsupported syntax returns bad request"""
+        # Arrange
+        payload = {"expression": "__import__('os').getcwd()"}
+        
+        # Act
+        response = self.api.post("/evaluate", json=payload)
+        
+        # Assert
+        assert response.status_code == 400
+        assert "detail" in response.json()
+    
+    def test_evaluate_cache_stats(self):
+        """Test repeated expressions are served from the cache"""
+        # Arrange
+        payload = {"expression": "6 * 7 + 0"}
+        before = self.api.get("/evaluate/cache").json()
+        
+        # Act
+        self.api.post("/evaluate", json=payload)
+        self.api.post("/evaluate", json=payload)
+        after = self.api.get("/evaluate/cache").json()
+        
+        # Assert
+        assert after["hits"] >= before["hits"] + 1
+        assert after["size"] <= after["maxsize"]
+    
+    def test_metrics_endpoint(self):
+        """Test request and calculation counters are exposed in the Prometheus format"""
+        # Arrange
+        self.api.post("/calculate", json={"operation": "multiply", "operand1": 6, "operand2": 7})
+        
+        # Act
+        response = self.api.get("/metrics")
+        
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        lines = response.text.splitlines()
+        assert any(line.startswith('calculator_http_requests_total{route="/calculate",method="POST",status="200"}') for line in lines)
+        assert any(line.startswith('calculator_calculations_total{operation="multiply",outcome="ok"}') for line in lines)
+        assert any(line.startswith("process_resident_memory_bytes ") for line in lines)
+    
     def test_register_user(self):
         """Test user registration via API"""
         # Arrange
         payload = {
-            "username": "testuser",
+            "username": f"testuser-{RUN}",
             "password": "testpass123"
         }
         
         # Act
-        response = requests.post(
-            f"{self.base_url}/register", 
+        response = self.api.post("/register", 
             json=payload,
             headers={'Content-Type': 'application/json'}
         )
@@ -212,22 +418,21 @@ class TestCalculatorAPI:
         # Assert
         assert response.status_code == 200
         result = response.json()
-        assert result["username"] == "testuser"
+        assert result["username"] == f"testuser-{RUN}"
     
     def test_register_duplicate_user(self):
         """Test registering a duplicate user returns error"""
         # Arrange - First register a user
         payload = {
-            "username": "duplicateuser",
+            "username": f"duplicateuser-{RUN}",
             "password": "testpass123"
         }
         
         # Register the user first time
-        requests.post(f"{self.base_url}/register", json=payload)
+        self.api.post("/register", json=payload)
         
         # Act - Try to register the same user again
-        response = requests.post(
-            f"{self.base_url}/register", 
+        response = self.api.post("/register", 
             json=payload,
             headers={'Content-Type': 'application/json'}
         )
@@ -241,18 +446,17 @@ class TestCalculatorAPI:
         """Test user login via API"""
         # Arrange - First register a user
         register_payload = {
-            "username": "loginuser",
+            "username": f"loginuser-{RUN}",
             "password": "loginpass123"
         }
-        requests.post(f"{self.base_url}/register", json=register_payload)
+        self.api.post("/register", json=register_payload)
         
         # Act - Login with the registered user
         login_payload = {
-            "username": "loginuser",
+            "username": f"loginuser-{RUN}",
             "password": "loginpass123"
         }
-        response = requests.post(
-            f"{self.base_url}/login", 
+        response = self.api.post("/login", 
             json=login_payload,
             headers={'Content-Type': 'application/json'}
         )
@@ -260,19 +464,18 @@ class TestCalculatorAPI:
         # Assert
         assert response.status_code == 200
         result = response.json()
-        assert result["username"] == "loginuser"
+        assert result["username"] == f"loginuser-{RUN}"
     
     def test_login_invalid_credentials(self):
         """Test login with invalid credentials returns error"""
         # Arrange
         payload = {
-            "username": "nonexistent",
+            "username": f"nonexistent-{RUN}",
             "password": "wrongpass"
         }
         
         # Act
-        response = requests.post(
-            f"{self.base_url}/login", 
+        response = self.api.post("/login", 
             json=payload,
             headers={'Content-Type': 'application/json'}
         )
@@ -286,38 +489,76 @@ class TestCalculatorAPI:
         """Test getting current user when someone is logged in"""
         # Arrange - Register and login a user
         register_payload = {
-            "username": "currentuser",
+            "username": f"currentuser-{RUN}",
             "password": "currentpass123"
         }
-        requests.post(f"{self.base_url}/register", json=register_payload)
-        requests.post(f"{self.base_url}/login", json=register_payload)
+        self.api.post("/register", json=register_payload)
+        token = self.api.post("/login", json=register_payload).json()["token"]
         
         # Act
-        response = requests.get(f"{self.base_url}/users/current")
+        response = self.api.get("/users/current",
+            headers={'Authorization': f'Bearer {token}'}
+        )
         
         # Assert
         assert response.status_code == 200
         result = response.json()
-        assert result["username"] == "currentuser"
+        assert result["username"] == f"currentuser-{RUN}"
     
     def test_logout_user(self):
         """Test user logout via API"""
         # Arrange - Register and login a user
         user_payload = {
-            "username": "logoutuser",
+            "username": f"logoutuser-{RUN}",
             "password": "logoutpass123"
         }
-        requests.post(f"{self.base_url}/register", json=user_payload)
-        requests.post(f"{self.base_url}/login", json=user_payload)
+        self.api.post("/register", json=user_payload)
+        token = self.api.post("/login", json=user_payload).json()["token"]
+        headers = {'Authorization': f'Bearer {token}'}
         
         # Act - Logout
-        response = requests.post(f"{self.base_url}/logout")
+        response = self.api.post("/logout", headers=headers)
         
         # Assert
         assert response.status_code == 200
         result = response.json()
-        assert result["username"] == "logoutuser"
+        assert result["username"] == f"logoutuser-{RUN}"
         
         # Verify user is actually logged out
-        current_user_response = requests.get(f"{self.base_url}/users/current")
-        assert current_user_response.status_code == 204  # No content - no user logged in
\ No newline at end of file
+        current_user_response = self.api.get("/users/current", headers=headers)
+        assert current_user_response.status_code == 204  # No content - no user logged in
+    
+    def test_sessions_are_per_client(self):
+        """Test that two logged in users each see their own session"""
+        # Arrange - Register and login two users
+        first = {"username": f"sessionuser1-{RUN}", "password": "sessionpass1"}
+        second = {"username": f"sessionuser2-{RUN}", "password": "sessionpass2"}
+        self.api.post("/register", json=first)
+        self.api.post("/register", json=second)
+        first_token = self.api.post("/login", json=first).json()["token"]
+        second_token = self.api.post("/login", json=second).json()["token"]
+        
+        # Act
+        first_user = self.api.get("/users/current", headers={'Authorization': f'Bearer {first_token}'})
+        second_user = self.api.get("/users/current", headers={'Authorization': f'Bearer {second_token}'})
+        anonymous = self.api.get("/users/current")
+        
+        # Assert
+        assert first_user.json()["username"] == f"sessionuser1-{RUN}"
+        assert second_user.json()["username"] == f"sessionuser2-{RUN}"
+        assert anonymous.status_code == 204
+    
+    def test_session_cookie(self):
+        """Test that the session cookie set by login identifies the user"""
+        # Arrange
+        payload = {"username": f"cookieuser-{RUN}", "password": "cookiepass"}
+        self.api.post("/register", json=payload)
+        session = self.api.session()
+        session.post("/login", json=payload)
+        
+        # Act
+        response = session.get("/users/current")
+        
+        # Assert
+        assert response.status_code == 200
+        assert response.json()["username"] == f"cookieuser-{RUN}"
\ No newline at end of file
@@ -1,20 +1,22 @@
+import uuid
 import pytest
-import requests
-from test.calculator_client.client import Client
 from test.calculator_client.api.actions import calculate, login, logout, register, users_current
 from test.calculator_client.models.calculation import Calculation
 from test.calculator_client.models.opertions import Opertions
 from test.calculator_client.models.user import User
 from test.calculator_client.models import ResultResponse, UserResponse, ErrorResponse, HTTPValidationError
 
+# a server behind --api-url keeps its users, every run registers new ones
+RUN = uuid.uuid4().hex[:8]
+
 
 class TestGeneratedApi:
     """Test suite for the generated API client code."""
     
-    def setup_method(self):
-        """Set up test fixtures before each test method."""
-        self.base_url = "http://localhost:5001"
-        self.client = Client(base_url=self.base_url)
+    @pytest.fixture(autouse=True)
+    def setup_client(self, api):
+        """Set up a client of the API server shared by the test session, see conftest.api"""
+        self.client = api.client()
     
     def test_generated_code(self):
         """Test the basic calculation functionality."""
@@ -81,7 +83,7 @@ class TestGeneratedApi:
 
     def test_register_new_user(self):
         """Test user registration."""
-        test_user = User(username="testuser", password="testpassword")
+        test_user = User(username=f"testuser-{RUN}", password="testpassword")
         response = register.sync(
             client=self.client,
             body=test_user,
@@ -90,11 +92,11 @@ class TestGeneratedApi:
         assert isinstance(response, (UserResponse, ErrorResponse))
         
         if isinstance(response, UserResponse):
-            assert response.username == "testuser"
+            assert response.username == f"testuser-{RUN}"
 
     def test_register_duplicate_user(self):
         """Test registration of duplicate user."""
-        test_user = User(username="duplicateuser", password="testpassword")
+        test_user = User(username=f"duplicateuser-{RUN}", password="testpassword")
         
         # First registration
         first_response = register.sync(
@@ -114,7 +116,7 @@ class TestGeneratedApi:
     def test_login_valid_credentials(self):
         """Test login with valid credentials."""
         # First register a user
-        test_user = User(username="logintest", password="loginpassword")
+        test_user = User(username=f"logintest-{RUN}", password="loginpassword")
         register_response = register.sync(
             client=self.client,
             body=test_user,
@@ -129,11 +131,11 @@ class TestGeneratedApi:
         assert isinstance(login_response, (UserResponse, ErrorResponse))
         
         if isinstance(login_response, UserResponse):
-            assert login_response.username == "logintest"
+            assert login_response.username == f"logintest-{RUN}"
 
     def test_login_invalid_credentials(self):
         """Test login with invalid credentials."""
-        invalid_user = User(username="nonexistent", password="wrongpassword")
+        invalid_user = User(username=f"nonexistent-{RUN}", password="wrongpassword")
         response = login.sync(
             client=self.client,
             body=invalid_user,
@@ -145,7 +147,7 @@ class TestGeneratedApi:
     def test_get_current_user_when_logged_in(self):
         """Test getting current user when logged in."""
         # First register and login a user
-        test_user = User(username="currentusertest", password="currentpassword")
+        test_user = User(username=f"currentusertest-{RUN}", password="currentpassword")
         register.sync(client=self.client, body=test_user)
         login.sync(client=self.client, body=test_user)
         
@@ -158,7 +160,7 @@ class TestGeneratedApi:
     def test_logout_when_logged_in(self):
         """Test logout when user is logged in."""
         # First register and login a user
-        test_user = User(username="logouttest", password="logoutpassword")
+        test_user = User(username=f"logouttest-{RUN}", password="logoutpassword")
         register.sync(client=self.client, body=test_user)
         login.sync(client=self.client, body=test_user)
         
@@ -0,0 +1,147 @@
+import json
+import uuid
+import pytest
+from test.web.api_stub import ApiStub
+
+# a server behind --api-url keeps its users, every run registers a new one
+USERNAME = f"contract-{uuid.uuid4().hex[:8]}"
+
+# Requests replayed against the real service and the stub. A step of None
+# body sends no body; 'auth' sends the token of the last successful login.
+SCENARIOS = {
+    "calculate": [
+        ("POST", "/calculate", {"operation": "add", "operand1": 5, "operand2": 3}, False),
+        ("POST", "/calculate", {"operation": "divide", "operand1": 7, "operand2": 2}, False),
+        ("POST", "/calculate", {"operation": "divide", "operand1": 1, "operand2": 0}, False),
+        ("POST", "/calculate", {"operation": "multiply", "operand1": 1e308, "operand2": 10}, False),
+    ],
+    "validation": [
+        ("POST", "/calculate", {"operation": "power", "operand1": 2, "operand2": 3}, False),
+        ("POST", "/calculate", {"operation": "add", "operand1": 1}, False),
+        ("POST", "/login", {"username": USERNAME}, False),
+        ("GET", "/calculate", None, False),
+    ],
+    "session": [
+        ("GET", "/users/current", None, False),
+        ("POST", "/register", {"username": USERNAME, "password": "secret"}, False),
+        ("POST", "/register", {"username": USERNAME, "password": "other"}, False),
+        ("POST", "/login", {"username": USERNAME, "password": "wrong"}, False),
+        ("POST", "/login", {"username": USERNAME, "password": "secret"}, False),
+        ("GET", "/users/current", None, True),
+        ("POST", "/logout", None, True),
+        ("GET", "/users/current", None, True),
+        ("POST", "/logout", None, True),
+    ],
+    "admin": [
+        ("POST", "/login", {"username": "admin", "password": "test1234"}, False),
+        ("GET", "/users/current", None, True),
+    ],
+}
+
+
+def reject_constant(name):
+    """Parse like JSON.parse of a browser, which rejects Infinity and NaN"""
+    raise ValueError(f"{name} is not valid JSON")
+
+
+def normalize(status, body):
+    """Make answers comparable: tokens are random, validation messages are FastAPI's wording"""
+    if isinstance(body, dict):
+        if body.get("token"):
+            body = {**body, "token": "<token>"}
+        if status == 422:
+            body = {"detail": [(error["type"], tuple(error["loc"])) for error in body["detail"]]}
+    return status, body
+
+
+def replay(steps, send):
+    answers = []
+    token = None
+    for method, path, body, auth in steps:
+        headers = {"Content-Type": "application/json"}
+        if auth and token:
+            headers["Authorization"] = f"Bearer {token}"
+        status, content = send(method, path, headers, json.dumps(body).encode() if body is not None else b"")
+        content = json.loads(content, parse_constant=reject_constant) if content else None
+        if path == "/login" and status == 200:
+            token = content["token"]
+        answers.append(normalize(status, content))
+    return answers
+
+
+class TestApiStubContract:
+    @pytest.fixture(autouse=True)
+    def setup_api(self, api):
+        """The real service, in process or behind a socket, see conftest.api"""
+        self.api = api
+
+    def send_real(self, method, path, headers, body):
+        response = self.api.request(method, path, headers=headers, content=body)
+        return response.status_code, response.content
+
+    @pytest.mark.parametrize("scenario", sorted(SCENARIOS))
+    def test_stub_answers_like_the_service(self, scenario):
+        # Arrange
+        steps = SCENARIOS[scenario]
+        real = replay(steps, self.send_real)
+        stub = ApiStub()
+
+        # Act
+        stubbed = replay(steps, lambda method, path, headers, body: stub.handle(
+            method, path, {name.lower(): value for name, value in headers.items()}, body)[::2])
+
+        # Assert
+        assert stubbed == real
+
+    def test_stub_leaves_the_service_alone(self):
+        # Arrange
+        service_user = {"username": f"{USERNAME}-service", "password": "secret"}
+        stub_user = {"username": f"{USERNAME}-stub", "password": "secret"}
+        self.api.post("/register", json=service_user)
+
+        # Act
+        stub = ApiStub()
+        stub.handle("POST", "/register", {}, json.dumps(stub_user))
+
+        # Assert
+        assert self.api.post("/login", json=service_user).status_code == 200
+        assert self.api.post("/login", json=stub_user).status_code == 400
+
+    def test_stub_sets_the_session_cookie_like_the_service(self):
+        # Arrange
+        payload = {"username": "admin", "password": "test1234"}
+        stub = ApiStub()
+
+        # Act
+        real = self.api.post("/login", json=payload).headers["set-cookie"]
+        status, headers, body = stub.handle("POST", "/login", {}, json.dumps(payload))
+        session = stub.handle("GET", "/users/current", {"cookie": headers["set-cookie"].split(";")[0]})
+
+        # Assert
+        assert headers["set-cookie"].split("=")[0] == real.split("=")[0]
+        assert session[0] == 200
+
+    def test_stub_websocket_answers_like_the_service(self):
+        # Arrange
+        messages = [
+            json.dumps({"id": 1, "operation": "add", "operand1": 5, "operand2": 3}),
+            json.dumps({"id": "two", "operation": "divide", "operand1": 1, "operand2": 0}),
+            json.dumps({"id": 3, "operation": "power", "operand1": 1, "operand2": 2}),
+            json.dumps({"id": 4, "operation": "multiply", "operand1": 1e308, "operand2": 10}),
+            json.dumps({"id": 5, "operation": "add", "operand1": "nan", "operand2": 1}),
+            "not json",
+        ]
+        stub = ApiStub()
+
+        # Act
+        with self.api.websocket("/ws/calculate") as websocket:
+            real = []
+            for message in messages:
+                websocket.send(message)
+                real.append(json.loads(websocket.recv(), parse_constant=reject_constant))
+        stubbed = [json.loads(stub.calculate_message(message), parse_constant=reject_constant) for message in messages]
+
+        # Assert
+        assert [reply["id"] for reply in stubbed] == [reply["id"] for reply in real]
+        assert [reply.get("result") for reply in stubbed] == [reply.get("result") for reply in real]
+        assert [sorted(reply) for reply in stubbed] == [sorted(reply) for reply in real]
@@ -8,8 +8,8 @@ from calculator_helper import CalculatorHelper
 
 class TestBase:
     def setup_method(self):
-        """Setup method called before each test"""
-        self.calculator = CalculatorHelper()
+        """Setup method called before each test, with a fresh CalculatorHelper"""
+        self.calculator = CalculatorHelper.reset()
     
     def teardown_method(self):
         """Teardown method called after each test"""
@@ -0,0 +1,191 @@
+import csv
+import io
+import os
+import numpy as np
+import pytest
+from test.test_base import TestBase
+import calculator_batch
+import calculator_vectorized
+
+
+def run(text, **kwargs):
+    out = io.StringIO()
+    count = calculator_batch.run_batch(io.StringIO(text), out, **kwargs)
+    return count, out.getvalue().splitlines()
+
+
+class TestCalculatorBatch(TestBase):
+    def test_rows_are_evaluated_in_order(self):
+        # Act
+        count, lines = run("add,1,2\nsubtract,1,2\nmultiply,3,4\ndivide,1,2\n")
+
+        # Assert
+        assert count == 4
+        assert lines == ["3.0,", "-1.0,", "12.0,", "0.5,"]
+
+    def test_header_row_gets_result_header(self):
+        # Act
+        count, lines = run("operation,operand1,operand2\n+,1,2\n")
+
+        # Assert
+        assert count == 1
+        assert lines == ["result,error", "3.0,"]
+
+    def test_bad_rows_fail_alone(self):
+        # Act
+        _, lines = run('add,1,2\ndivide,1,0\npow,1,2\n"a,b",1,2\nadd,x,2\nadd,1\n\n*,2,2\n')
+
+        # Assert - error messages holding the delimiter are quoted, every row has two fields
+        assert list(csv.reader(lines)) == [
+            ["3.0", ""],
+            ["", "float division by zero"],
+            ["", "Unknown operation 'pow'."],
+            ["", "Unknown operation 'a,b'."],
+            ["", "Invalid row 'add,x,2', expected operation,operand1,operand2."],
+            ["", "Invalid row 'add,1', expected operation,operand1,operand2."],
+            ["4.0", ""],
+        ]
+
+    def test_tab_separated_errors_are_quoted(self):
+        # Act
+        _, lines = run("add\t1\n", delimiter="\t")
+
+        # Assert
+        assert list(csv.reader(lines, delimiter="\t")) == [
+            ["", "Invalid row 'add\t1', expected operation\toperand1\toperand2."],
+        ]
+
+    def test_failed_rows_match_the_batch_endpoint(self):
+        # Arrange
+        rows = [("divide", 1, 0), ("multiply", 1e308, 10), ("add", float("inf"), 1), ("divide", 0, 0)]
+        _, expected = calculator_vectorized.calculate_batch(*zip(*rows))
+
+        # Act
+        _, lines = run("".join(f"{operation},{a},{b}\n" for operation, a, b in rows))
+
+        # Assert
+        assert lines == [f",{error}" for error in expected]
+        assert lines[1] == ",Result is not a finite number."
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 1000])
+    def test_chunk_size_does_not_change_output(self, chunk_size):
+        # Arrange
+        text = "operation,operand1,operand2\n" + "".join(f"add,{i},{i}\n" for i in range(10))
+
+        # Act
+        count, lines = run(text, chunk_size=chunk_size)
+
+        # Assert
+        assert count == 10
+        assert lines == ["result,error"] + [f"{2.0 * i}," for i in range(10)]
+
+    def test_workers_keep_input_order(self, tmp_path):
+        # Arrange
+        text = "operation,operand1,operand2\n" + "".join(f"add,{i},1\ndivide,{i},0\n" for i in range(500))
+        path = tmp_path / "input.csv"
+        path.write_text(text)
+        expected = run(text)[1]
+        out = io.StringIO()
+
+        # Act
+        count = calculator_batch.run_file(str(path), out, workers=2, range_size=100)
+
+        # Assert
+        assert count == 1000
+        assert out.getvalue().splitlines() == expected
+
+    def test_workers_on_stream(self):
+        # Arrange
+        text = "".join(f"multiply,{i},2\n" for i in range(100))
+
+        # Act
+        count, lines = run(text, chunk_size=7, workers=2)
+
+        # Assert
+        assert count == 100
+        assert lines == [f"{2.0 * i}," for i in range(100)]
+
+    def test_tab_delimiter(self):
+        # Act
+        _, lines = run("multiply\t2\t3\n", delimiter="\t")
+
+        # Assert
+        assert lines == ["6.0\t"]
+
+
+class TestCalculatorBinary(TestBase):
+    @pytest.fixture
+    def operands(self, tmp_path):
+        a = np.arange(10, dtype=np.float64)
+        b = np.array([2, 0, 1, 4, 5, 0, 2, 1, 8, 3], dtype=np.float64)
+        np.save(tmp_path / "a.npy", a)
+        b.tofile(tmp_path / "b.bin")
+        return a, b, str(tmp_path / "a.npy"), str(tmp_path / "b.bin")
+
+    @pytest.mark.parametrize("chunk_size", [1, 3, 1000])
+    def test_npy_output_matches_numpy(self, operands, tmp_path, chunk_size):
+        # Arrange
+        a, b, path1, path2 = operands
+        output = str(tmp_path / "out.npy")
+
+        # Act
+        count = calculator_batch.run_binary("multiply", path1, path2, output, chunk_size=chunk_size)
+
+        # Assert
+        assert count == 10
+        assert np.load(output).tolist() == (a * b).tolist()
+
+    def test_workers_write_shared_output(self, operands, tmp_path):
+        # Arrange
+        a, b, path1, path2 = operands
+        output = str(tmp_path / "out.npy")
+
+        # Act
+        count = calculator_batch.run_binary("add", path1, path2, output, chunk_size=3, workers=2)
+
+        # Assert
+        assert count == 10
+        assert np.load(output).tolist() == (a + b).tolist()
+
+    def test_raw_output_and_zero_division(self, operands, tmp_path):
+        # Arrange
+        a, b, path1, path2 = operands
+        output = str(tmp_path / "out.bin")
+
+        # Act
+        calculator_batch.run_binary("/", path1, path2, output, chunk_size=4)
+
+        # Assert
+        results = np.fromfile(output, dtype=np.float64)
+        assert np.isnan(results[b == 0]).all()
+        assert results[b != 0].tolist() == (a[b != 0] / b[b != 0]).tolist()
+
+    def test_length_mismatch_is_rejected(self, operands, tmp_path):
+        # Arrange
+        _, _, path1, _ = operands
+        np.zeros(3).tofile(tmp_path / "short.bin")
+
+        # Act & Assert
+        with pytest.raises(ValueError):
+            calculator_batch.run_binary("add", path1, str(tmp_path / "short.bin"), str(tmp_path / "out.npy"))
+
+    def test_unknown_operation_is_rejected(self, operands, tmp_path):
+        # Arrange
+        _, _, path1, path2 = operands
+
+        # Act & Assert
+        with pytest.raises(ValueError):
+            calculator_batch.run_binary("pow", path1, path2, str(tmp_path / "out.npy"))
+
+    def test_empty_operands(self, tmp_path):
+        # Arrange
+        open(tmp_path / "a.bin", "wb").close()
+        open(tmp_path / "b.bin", "wb").close()
+
+        # Act
+        count = calculator_batch.run_binary("add", str(tmp_path / "a.bin"), str(tmp_path / "b.bin"),
+                                            str(tmp_path / "out.bin"))
+
+        # Assert
+        assert count == 0
+        assert os.path.getsize(tmp_path / "out.bin") == 0
@@ -0,0 +1,84 @@
+import json
+import os
+import subprocess
+import sys
+import pytest
+from test.test_base import TestBase
+
+BE_PATH = os.path.join(os.path.dirname(__file__), '..', 'BE')
+
+# Import and run time of one arithmetic command, interpreter startup excluded.
+STARTUP_BUDGET = 0.25
+
+# Modules only the REST service may load.
+HEAVY_MODULES = ['fastapi', 'starlette', 'pydantic', 'numpy', 'uvicorn', 'sqlite3', 'concurrent.futures']
+
+PROBE = '''
+import json, runpy, sys, time
+sys.argv = ["calculator.py"] + sys.argv[1:]
+start = time.perf_counter()
+runpy.run_path("calculator.py", run_name="__main__")
+elapsed = time.perf_counter() - start
+print(json.dumps({"elapsed": elapsed, "modules": sorted(sys.modules)}))
+'''
+
+
+def run_cli(*args):
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE, *args],
+        cwd=BE_PATH, capture_output=True, text=True, check=True
+    )
+    output, probe = result.stdout.rstrip().rsplit('\n', 1)
+    return output, json.loads(probe)
+
+
+class TestCalculatorCli(TestBase):
+    @pytest.mark.parametrize("option,expected", [
+        ("--add", "Addition result: 1.0+2.0=3.0"),
+        ("--subtract", "Subtraction result: 1.0-2.0=-1.0"),
+        ("--multiply", "Multiplication result: 1.0*2.0=2.0"),
+        ("--divide", "Division result: 1.0/2.0=0.5"),
+    ])
+    def test_arithmetic_command(self, option, expected):
+        # Act
+        output, _ = run_cli(option, "1", "2")
+
+        # Assert
+        assert output == expected
+
+    @pytest.mark.parametrize("args,expected", [
+        (("--add", "0.1", "0.2", "0.3"), "Addition result: 0.1+0.2+0.3=0.6"),
+        (("--multiply", "1", "2", "3", "4"), "Multiplication result: 1.0*2.0*3.0*4.0=24.0"),
+        (("-a", "1e308", "1e308"), "Addition result: 1e+308+1e+308=inf"),
+    ])
+    def test_n_ary_command(self, args, expected):
+        # Act
+        output, _ = run_cli(*args)
+
+        # Assert
+        assert output == expected
+
+    def test_binary_command_rejects_more_operands(self):
+        # Act
+        result = subprocess.run(
+            [sys.executable, 'calculator.py', '--subtract', '1', '2', '3'],
+            cwd=BE_PATH, capture_output=True, text=True
+        )
+
+        # Assert
+        assert result.stdout.startswith("Wrong number of arguments")
+
+    def test_arithmetic_command_skips_web_dependencies(self):
+        # Act
+        _, probe = run_cli("--add", "1", "2")
+
+        # Assert
+        loaded = [module for module in HEAVY_MODULES if module in probe["modules"]]
+        assert loaded == []
+
+    def test_arithmetic_command_startup_budget(self):
+        # Act - best of three to smooth out scheduling noise
+        elapsed = min(run_cli("--add", "1", "2")[1]["elapsed"] for _ in range(3))
+
+        # Assert
+        assert elapsed < STARTUP_BUDGET
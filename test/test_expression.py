@@ -0,0 +1,86 @@
+import pytest
+from test.test_base import TestBase
+import expression
+from lru_cache import LRUCache
+
+
+class TestExpression(TestBase):
+    @pytest.mark.parametrize("text,expected", [
+        ("1 + 2", 3),
+        ("1 + 2 * 3", 7),
+        ("(1 + 2) * 3", 9),
+        ("10 / 4 - 1", 1.5),
+        ("-3 - -3", 0),
+        ("2 * (3 + (4 - 1)) / 3", 4),
+        ("  7  ", 7),
+    ])
+    def test_evaluate(self, text, expected):
+        # Act
+        result = expression.evaluate(text)
+
+        # Assert
+        assert result == expected
+
+    @pytest.mark.parametrize("text", [
+        "", "1 +", "1 2", "2 ** 3", "7 // 2", "a + 1", "__import__('os')", "(1, 2)", "True + 1", "'1' + '2'", "1e400",
+    ])
+    def test_invalid_expression_raises_exception(self, text):
+        # Act & Assert
+        with pytest.raises(expression.ExpressionError):
+            expression.evaluate(text)
+
+    def test_divide_by_zero_raises_exception(self):
+        # Act & Assert
+        with pytest.raises(ZeroDivisionError):
+            expression.evaluate("1 / (2 - 2)")
+
+    def test_repeated_expression_hits_cache(self):
+        # Arrange
+        before = expression.cache.stats()
+
+        # Act
+        expression.evaluate("40 + 2")
+        expression.evaluate(" 40  +  2 ")
+        expression.evaluate("40+2")
+
+        # Assert
+        after = expression.cache.stats()
+        assert after["misses"] - before["misses"] == 2
+        assert after["hits"] - before["hits"] == 1
+
+
+class TestLRUCache(TestBase):
+    def test_least_recently_used_is_evicted(self):
+        # Arrange
+        cache = LRUCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+
+        # Act
+        cache.put("c", 3)
+
+        # Assert
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats() == {"hits": 3, "misses": 1, "evictions": 1, "size": 2, "maxsize": 2}
+
+    def test_resize_evicts(self):
+        # Arrange
+        cache = LRUCache(maxsize=3)
+        for key in "abc":
+            cache.put(key, key)
+
+        # Act
+        cache.resize(1)
+
+        # Assert
+        assert len(cache) == 1
+        assert cache.get("c") == "c"
+        assert cache.evictions == 2
+
+    def test_invalid_size_raises_exception(self):
+        # Act & Assert
+        with pytest.raises(ValueError):
+            LRUCache(maxsize=0)
@@ -0,0 +1,100 @@
+import asyncio
+import time
+import pytest
+from test.test_base import TestBase
+from latency import LatencyInjector, LatencyProfile
+
+
+class TestLatency(TestBase):
+    @pytest.mark.parametrize("distribution", LatencyProfile.DISTRIBUTIONS)
+    def test_samples_stay_within_bounds(self, distribution):
+        # Arrange
+        injector = LatencyInjector(profiles={"login": LatencyProfile(distribution, mean=2, stddev=1, min=1, max=4)}, seed=1)
+
+        # Act
+        samples = [injector.sample("login") for _ in range(1000)]
+
+        # Assert
+        assert all(1 <= s <= 4 for s in samples)
+
+    def test_disabled_or_unknown_route_has_no_delay(self):
+        # Arrange
+        injector = LatencyInjector(enabled=False, profiles={"login": LatencyProfile("fixed", mean=1)})
+
+        # Act & Assert
+        assert injector.sample("login") == 0
+        injector.configure(enabled=True)
+        assert injector.sample("login") == 1
+        assert injector.sample("calculate") == 0
+
+    def test_parse_profile(self):
+        # Act
+        route, profile = LatencyProfile.parse("login=uniform,min=0.5,max=1.5")
+
+        # Assert
+        assert route == "login"
+        assert profile.distribution == "uniform"
+        assert (profile.min, profile.max) == (0.5, 1.5)
+
+    @pytest.mark.parametrize("spec", ["login", "login=gamma", "login=normal,scale=2", "login=fixed,min=2,max=1"])
+    def test_parse_invalid_profile_raises_exception(self, spec):
+        # Act & Assert
+        with pytest.raises(ValueError):
+            LatencyProfile.parse(spec)
+
+    def test_concurrent_delays_overlap(self):
+        # Arrange
+        injector = LatencyInjector(profiles={"login": LatencyProfile("fixed", mean=0.2, min=0, max=1)})
+
+        async def run():
+            return await asyncio.gather(*(injector.delay("login") for _ in range(10)))
+
+        # Act
+        start = time.perf_counter()
+        delays = asyncio.run(run())
+        elapsed = time.perf_counter() - start
+
+        # Assert
+        assert delays == [0.2] * 10
+        assert elapsed < 1
+
+
+class TestRouteLatency(TestBase):
+    def setup_method(self):
+        super().setup_method()
+        from calculator_rest_service import latency
+        self.latency = latency
+        self.settings = (latency.enabled, dict(latency.profiles))
+
+    def teardown_method(self):
+        self.latency.enabled, self.latency.profiles = self.settings
+        super().teardown_method()
+
+    def test_profile_delays_its_route_only(self):
+        # Arrange
+        from starlette.testclient import TestClient
+        from calculator_rest_service import app
+        self.latency.configure(enabled=True, profiles={"calculate": LatencyProfile("fixed", mean=0.2, min=0, max=1)})
+
+        # Act
+        with TestClient(app) as client:
+            start = time.perf_counter()
+            client.post("/calculate", json={"operation": "add", "operand1": 1, "operand2": 2})
+            calculate = time.perf_counter() - start
+            start = time.perf_counter()
+            client.post("/scan", json={"operation": "add", "operands": [1, 2]})
+            scan = time.perf_counter() - start
+
+        # Assert
+        assert calculate >= 0.2
+        assert scan < 0.2
+
+    def test_profile_for_unknown_route_is_rejected(self, monkeypatch, capsys):
+        # Arrange
+        from calculator_rest_service import main
+        monkeypatch.setattr("sys.argv", ["calculator.py", "--rest", "--latency-profile", "divide=fixed,mean=1"])
+
+        # Act & Assert
+        with pytest.raises(SystemExit):
+            main([])
+        assert "unknown route divide" in capsys.readouterr().err
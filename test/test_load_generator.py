@@ -0,0 +1,73 @@
+import asyncio
+import random
+import pytest
+from test.benchmarks.load_generator import LatencyHistogram, parse_mix, generate
+
+
+class TestLatencyHistogram:
+    def test_percentiles_within_one_percent(self):
+        # Arrange
+        histogram = LatencyHistogram()
+        values = [random.Random(1).lognormvariate(-5, 1.5) for _ in range(10000)]
+        
+        # Act
+        for value in values:
+            histogram.record(value)
+        
+        # Assert
+        values.sort()
+        for percent in (50, 90, 99, 99.9):
+            exact = values[int(percent / 100 * len(values)) - 1]
+            assert histogram.percentile(percent) == pytest.approx(exact, rel=0.01, abs=1e-6)
+        assert histogram.percentile(100) == max(values)
+        assert histogram.count == len(values)
+
+    def test_summary_in_milliseconds(self):
+        # Arrange
+        histogram = LatencyHistogram()
+        
+        # Act
+        for _ in range(99):
+            histogram.record(0.001)
+        histogram.record(0.5)
+        summary = histogram.summary()
+        
+        # Assert
+        assert summary["count"] == 100
+        assert summary["p50"] == pytest.approx(1.0, rel=0.01)
+        assert summary["p99.9"] == pytest.approx(500.0, rel=0.01)
+        assert summary["max"] == 500.0
+
+    def test_empty_summary(self):
+        assert LatencyHistogram().summary() == {"count": 0}
+
+
+class TestParseMix:
+    def test_weights(self):
+        assert parse_mix("calculate=3, login=1,register=0") == {"calculate": 3.0, "login": 1.0}
+
+    @pytest.mark.parametrize("spec", ["evaluate=1", "login=-1", "login=many", "register=0", ""])
+    def test_rejects_invalid_mix(self, spec):
+        with pytest.raises(ValueError):
+            parse_mix(spec)
+
+
+class TestGenerate:
+    def test_open_loop_run(self, api):
+        # Arrange
+        client = api.client()
+        mix = {"calculate": 5, "users_current": 2, "login": 1, "register": 1}
+        
+        async def scenario():
+            async with client.get_async_httpx_client():
+                return await generate(client, rate=200, duration=0.25, mix=mix, users=2, seed=1)
+        
+        # Act
+        report = asyncio.run(scenario())
+        
+        # Assert
+        assert report["requests"] == 50
+        assert report["count"] == 50
+        assert report["outcomes"] == {"200": 50}
+        assert sum(operation["count"] for operation in report["operations"].values()) == 50
+        assert report["latency_ms"]["p50"] >= report["service_time_ms"]["p50"]
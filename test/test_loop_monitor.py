@@ -0,0 +1,51 @@
+import asyncio
+import time
+from test.test_base import TestBase
+import metrics
+from loop_monitor import LoopMonitor
+
+
+async def blocking_route():
+    time.sleep(0.3)
+
+
+async def polite_route():
+    await asyncio.sleep(0.3)
+
+
+def run_with_monitor(route):
+    monitor = LoopMonitor(interval=0.02, threshold=0.1)
+
+    async def scenario():
+        monitor.start()
+        await asyncio.sleep(0.05)
+        await route()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    asyncio.run(scenario())
+    return monitor
+
+
+class TestLoopMonitor(TestBase):
+    def test_blocking_call_is_reported_with_its_call_site(self):
+        # Arrange
+        stalls_before = metrics.loop_stalls.value()
+
+        # Act
+        monitor = run_with_monitor(blocking_route)
+
+        # Assert
+        assert len(monitor.recent) == 1
+        stall = monitor.recent[0]
+        assert stall.blocked_for > 0.1
+        assert "in blocking_route" in stall.call_site
+        assert metrics.loop_stalls.value() == stalls_before + 1
+        assert metrics.loop_lag_probes.count() > 0
+
+    def test_awaiting_does_not_stall(self):
+        # Act
+        monitor = run_with_monitor(polite_route)
+
+        # Assert
+        assert len(monitor.recent) == 0
@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+from starlette.testclient import TestClient
+from test.test_base import TestBase
+import metrics
+from metrics import Counter, Gauge, Histogram, Registry, MetricsMiddleware
+
+
+class TestMetrics(TestBase):
+    def test_counter_renders_labels(self):
+        # Arrange
+        registry = Registry()
+        counter = registry.register(Counter("requests_total", "Requests.", ("route", "status")))
+
+        # Act
+        counter.inc(("/calculate", "200"))
+        counter.inc(("/calculate", "200"), 2)
+        counter.inc(('say "hi"', "500"))
+
+        # Assert
+        assert registry.render().splitlines() == [
+            "# HELP requests_total Requests.",
+            "# TYPE requests_total counter",
+            'requests_total{route="/calculate",status="200"} 3',
+            'requests_total{route="say \\"hi\\"",status="500"} 1',
+        ]
+
+    def test_histogram_buckets_are_cumulative(self):
+        # Arrange
+        histogram = Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+
+        # Act
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(("/calculate",), value)
+
+        # Assert
+        assert list(histogram.samples()) == [
+            'latency_seconds_bucket{route="/calculate",le="0.1"} 2',
+            'latency_seconds_bucket{route="/calculate",le="1.0"} 3',
+            'latency_seconds_bucket{route="/calculate",le="+Inf"} 4',
+            'latency_seconds_sum{route="/calculate"} 2.65',
+            'latency_seconds_count{route="/calculate"} 4',
+        ]
+        assert histogram.count(("/calculate",)) == 4
+
+    def test_callback_gauge(self):
+        # Arrange
+        gauge = Gauge("queued", "Queued.", ("class",), callback=lambda: {("login",): 2})
+
+        # Act & Assert
+        assert list(gauge.samples()) == ['queued{class="login"} 2']
+
+    def test_resident_memory(self):
+        # Act & Assert
+        assert metrics.resident_memory() >= 0
+
+
+class TestMetricsMiddleware(TestBase):
+    def setup_method(self):
+        super().setup_method()
+        self.requests = Counter("requests_total", "Requests.", ("route", "method", "status"))
+        self.saved = metrics.http_requests
+        metrics.http_requests = self.requests
+
+    def teardown_method(self):
+        metrics.http_requests = self.saved
+        super().teardown_method()
+
+    def test_requests_are_counted_by_route_and_status(self):
+        # Arrange
+        async def app(scope, receive, send):
+            status = 200 if scope["path"] == "/calculate" else 404
+            await send({"type": "http.response.start", "status": status, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+        client = TestClient(MetricsMiddleware(app, [SimpleNamespace(path="/calculate")]))
+
+        # Act
+        client.post("/calculate")
+        client.get("/unknown/1")
+        client.get("/unknown/2")
+
+        # Assert
+        assert self.requests.value(("/calculate", "POST", "200")) == 1
+        assert self.requests.value(("unmatched", "GET", "404")) == 2
@@ -0,0 +1,32 @@
+import asyncio
+import pytest
+from test.test_base import TestBase
+import ndjson
+
+
+async def collect(chunks, max_line=65536):
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+    return [line async for line in ndjson.read_lines(stream(), max_line)]
+
+
+class TestNdjson(TestBase):
+    def test_lines_split_across_chunks(self):
+        # Act
+        lines = asyncio.run(collect([b'{"a":', b' 1}\n{"b"', b': 2}\n\n', b'{"c": 3}']))
+
+        # Assert
+        assert lines == [b'{"a": 1}', b'{"b": 2}', b'{"c": 3}']
+
+    def test_crlf_and_blank_lines_are_skipped(self):
+        # Act
+        lines = asyncio.run(collect([b'1\r\n\r\n2\r\n']))
+
+        # Assert
+        assert lines == [b'1', b'2']
+
+    def test_line_too_long_raises_exception(self):
+        # Act & Assert
+        with pytest.raises(ndjson.LineTooLongError):
+            asyncio.run(collect([b'x' * 10, b'x' * 10, b'\n'], max_line=16))
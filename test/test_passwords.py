@@ -0,0 +1,124 @@
+import asyncio
+import threading
+import pytest
+from test.test_base import TestBase
+import passwords
+from passwords import PasswordHasher
+
+
+class TestPasswordHasher(TestBase):
+    @pytest.fixture(params=[("scrypt", 4), ("pbkdf2", 1000)])
+    def hasher(self, request):
+        algorithm, cost = request.param
+        return PasswordHasher(algorithm, cost, workers=2)
+
+    def test_hash_and_verify(self, hasher):
+        # Act
+        encoded = hasher.hash("secret")
+
+        # Assert
+        assert "secret" not in encoded
+        assert encoded.startswith(f"{hasher.algorithm}${hasher.cost}$")
+        assert hasher.verify("secret", encoded)
+        assert not hasher.verify("Secret", encoded)
+        assert not hasher.needs_rehash(encoded)
+
+    def test_hashes_are_salted(self, hasher):
+        # Act & Assert
+        assert hasher.hash("secret") != hasher.hash("secret")
+
+    def test_changed_cost_needs_rehash_but_still_verifies(self, hasher):
+        # Arrange
+        encoded = hasher.hash("secret")
+
+        # Act
+        hasher.configure(cost=hasher.cost + 1)
+
+        # Assert
+        assert hasher.needs_rehash(encoded)
+        assert hasher.verify("secret", encoded)
+
+    def test_legacy_plaintext_password(self, hasher):
+        # Act & Assert
+        assert hasher.verify("secret", "secret")
+        assert not hasher.verify("secret", "other")
+        assert hasher.needs_rehash("secret")
+
+    def test_invalid_settings_are_rejected(self):
+        # Act & Assert
+        with pytest.raises(ValueError):
+            PasswordHasher("md5")
+        with pytest.raises(ValueError):
+            PasswordHasher("scrypt", 0)
+
+    def test_verify_dummy_derives_a_hash(self, hasher, monkeypatch):
+        # Arrange
+        hasher.verify_dummy("warm up")
+        derived = []
+        derive = hasher._derive
+        monkeypatch.setattr(hasher, "_derive", lambda *args: derived.append(args) or derive(*args))
+
+        # Act
+        result = hasher.verify_dummy("secret")
+
+        # Assert
+        assert result is False
+        assert [args[:2] for args in derived] == [(hasher.algorithm, hasher.cost)]
+
+    def test_run_uses_bounded_pool(self, hasher):
+        # Arrange
+        threads = set()
+        def work():
+            threads.add(threading.current_thread().name)
+            return hasher.hash("secret")
+        async def burst():
+            return await asyncio.gather(*(hasher.run(work) for _ in range(8)))
+
+        # Act
+        results = asyncio.run(burst())
+
+        # Assert
+        assert len(results) == 8
+        assert len(threads) <= 2
+        assert all(name.startswith("password-hasher") for name in threads)
+
+
+class TestCalculatorHelperPasswords(TestBase):
+    def test_registered_password_is_stored_hashed(self):
+        # Act
+        self.calculator.register_user("hashed_user", "secret")
+
+        # Assert
+        stored = self.calculator.storage.get_password("hashed_user")
+        assert stored != "secret"
+        assert passwords.hasher.verify("secret", stored)
+
+    def test_legacy_password_is_rehashed_on_login(self):
+        # Arrange
+        self.calculator.storage.add_user("legacy_user", "secret")
+
+        # Act
+        result = self.calculator.login("legacy_user", "secret")
+
+        # Assert
+        assert result == "legacy_user"
+        stored = self.calculator.storage.get_password("legacy_user")
+        assert stored != "secret"
+        assert not passwords.hasher.needs_rehash(stored)
+
+    def test_unknown_user_login_derives_a_hash(self, monkeypatch):
+        # Arrange
+        calls = []
+        monkeypatch.setattr(passwords.hasher, "verify_dummy", calls.append)
+
+        # Act
+        result = self.calculator.login("unknown_user", "secret")
+
+        # Assert
+        assert result is None
+        assert calls == ["secret"]
+
+    def test_admin_password(self):
+        # Act & Assert
+        assert self.calculator.login("admin", "test1234") == "admin"
+        assert self.calculator.login("admin", "wrong") is None
@@ -0,0 +1,182 @@
+import json
+import pytest
+from starlette.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+from test.test_base import TestBase
+from rate_limit import TokenBuckets, RateLimits, RateLimitMiddleware
+
+
+class FakeClock():
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+async def echo_app(scope, receive, send):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body', False):
+            break
+    await send({'type': 'http.response.start', 'status': 200, 'headers': [(b'content-type', b'application/json')]})
+    await send({'type': 'http.response.body', 'body': body or b'{}'})
+
+
+async def websocket_echo_app(scope, receive, send):
+    await receive()
+    await send({'type': 'websocket.accept'})
+    while True:
+        message = await receive()
+        if message['type'] == 'websocket.disconnect':
+            return
+        await send({'type': 'websocket.send', 'text': message['text']})
+
+
+class TestTokenBuckets(TestBase):
+    def test_burst_then_refill(self):
+        # Arrange
+        clock = FakeClock()
+        buckets = TokenBuckets(rate=2, burst=3, clock=clock)
+
+        # Act
+        taken = [buckets.take("a") for _ in range(4)]
+        clock.now += 0.5
+        refilled = buckets.take("a")
+
+        # Assert
+        assert taken[:3] == [0.0, 0.0, 0.0]
+        assert taken[3] == pytest.approx(0.5)
+        assert refilled == 0.0
+
+    def test_keys_are_independent(self):
+        # Arrange
+        buckets = TokenBuckets(rate=1, burst=1, clock=FakeClock())
+
+        # Act & Assert
+        assert buckets.take("a") == 0.0
+        assert buckets.take("a") > 0
+        assert buckets.take("b") == 0.0
+
+    def test_idle_keys_are_evicted(self):
+        # Arrange
+        clock = FakeClock()
+        buckets = TokenBuckets(rate=1, burst=2, clock=clock)
+        buckets.take("a")
+        buckets.take("b")
+
+        # Act
+        clock.now += 2
+        buckets.take("c")
+
+        # Assert
+        assert len(buckets) == 1
+
+    def test_least_recently_used_key_is_evicted_beyond_max_keys(self):
+        # Arrange
+        buckets = TokenBuckets(rate=1, burst=1, max_keys=2, clock=FakeClock())
+
+        # Act
+        for key in ("a", "b", "a", "c"):
+            buckets.take(key)
+
+        # Assert
+        assert len(buckets) == 2
+        assert buckets.take("a") > 0
+        assert buckets.take("b") == 0.0
+
+    def test_invalid_settings_are_rejected(self):
+        # Act & Assert
+        with pytest.raises(ValueError):
+            TokenBuckets(rate=0, burst=1)
+        with pytest.raises(ValueError):
+            TokenBuckets(rate=1, burst=0.5)
+
+
+class TestRateLimitMiddleware(TestBase):
+    def setup_method(self):
+        super().setup_method()
+        self.clock = FakeClock()
+        self.limits = RateLimits(
+            clients=TokenBuckets(rate=1, burst=3, clock=self.clock),
+            usernames=TokenBuckets(rate=1, burst=2, clock=self.clock),
+        )
+        self.client = TestClient(RateLimitMiddleware(echo_app, self.limits))
+
+    def test_client_over_limit_gets_429(self):
+        # Act
+        statuses = [self.client.get("/calculate").status_code for _ in range(4)]
+        response = self.client.get("/calculate")
+
+        # Assert
+        assert statuses == [200, 200, 200, 429]
+        assert response.headers["retry-after"] == "1"
+        assert response.json() == {"detail": "Too many requests."}
+
+    def test_login_is_limited_per_username_and_body_is_replayed(self):
+        # Arrange
+        self.limits.configure(client_burst=100)
+        payload = {"username": "alice", "password": "guess"}
+
+        # Act
+        first = self.client.post("/login", json=payload)
+        statuses = [self.client.post("/login", json=payload).status_code for _ in range(2)]
+        other = self.client.post("/login", json={"username": "bob", "password": "guess"})
+
+        # Assert
+        assert first.json() == payload
+        assert statuses == [200, 429]
+        assert other.status_code == 200
+
+    def test_unparsable_login_body_passes_through(self):
+        # Arrange
+        self.limits.configure(client_burst=100)
+
+        # Act
+        statuses = [self.client.post("/login", content=b"not json").status_code for _ in range(5)]
+
+        # Assert
+        assert statuses == [200] * 5
+
+    def test_disabled_limits_pass_everything(self):
+        # Arrange
+        self.limits.configure(enabled=False)
+
+        # Act
+        statuses = [self.client.get("/calculate").status_code for _ in range(10)]
+
+        # Assert
+        assert statuses == [200] * 10
+
+    def test_websocket_handshake_over_limit_is_closed(self):
+        # Arrange
+        client = TestClient(RateLimitMiddleware(websocket_echo_app, self.limits))
+        for _ in range(3):
+            with client.websocket_connect("/ws/calculate"):
+                pass
+
+        # Act & Assert
+        with pytest.raises(WebSocketDisconnect) as rejected:
+            with client.websocket_connect("/ws/calculate"):
+                pass
+        assert rejected.value.code == RateLimitMiddleware.POLICY_VIOLATION
+
+    def test_websocket_messages_are_limited(self):
+        # Arrange
+        client = TestClient(RateLimitMiddleware(websocket_echo_app, self.limits))
+
+        # Act - the handshake takes the first of the 3 tokens
+        with client.websocket_connect("/ws/calculate") as websocket:
+            replies = []
+            for message in ("1", "2"):
+                websocket.send_text(message)
+                replies.append(websocket.receive_text())
+            websocket.send_text("3")
+            with pytest.raises(WebSocketDisconnect) as closed:
+                websocket.receive_text()
+
+        # Assert
+        assert replies == ["1", "2"]
+        assert closed.value.code == RateLimitMiddleware.POLICY_VIOLATION
@@ -0,0 +1,68 @@
+import math
+import pytest
+from test.test_base import TestBase
+import models
+from models import Calculation, Opertions
+
+
+class TestResultCache(TestBase):
+    def setup_method(self):
+        super().setup_method()
+        models.enable_result_cache(maxsize=2)
+
+    def teardown_method(self):
+        models.disable_result_cache()
+        super().teardown_method()
+
+    def test_repeated_calculation_hits_cache(self):
+        # Arrange
+        body = Calculation(operation=Opertions.add, operand1=3, operand2=5)
+
+        # Act
+        first = body.calculate()
+        second = body.calculate()
+
+        # Assert
+        assert first.result == second.result == 8
+        assert models.result_cache.stats()["hits"] == 1
+        assert models.result_cache.stats()["misses"] == 1
+
+    def test_least_recently_used_result_is_evicted(self):
+        # Act
+        for operand in (1, 2, 3):
+            Calculation(operation=Opertions.multiply, operand1=operand, operand2=2).calculate()
+
+        # Assert
+        assert models.result_cache.stats()["evictions"] == 1
+        assert models.result_cache.stats()["size"] == 2
+
+    def test_signed_zeros_are_cached_apart(self):
+        # Act
+        positive = Calculation(operation=Opertions.multiply, operand1=1, operand2=0.0).calculate()
+        negative = Calculation(operation=Opertions.multiply, operand1=1, operand2=-0.0).calculate()
+
+        # Assert
+        assert math.copysign(1, positive.result) == 1
+        assert math.copysign(1, negative.result) == -1
+        assert models.result_cache.stats()["hits"] == 0
+
+    def test_failed_calculation_is_not_cached(self):
+        # Arrange
+        body = Calculation(operation=Opertions.divide, operand1=1, operand2=0)
+
+        # Act & Assert
+        for _ in range(2):
+            with pytest.raises(ZeroDivisionError):
+                body.calculate()
+        assert models.result_cache.stats()["size"] == 0
+
+    def test_disabled_cache(self):
+        # Arrange
+        models.disable_result_cache()
+
+        # Act
+        result = Calculation(operation=Opertions.subtract, operand1=3, operand2=5).calculate()
+
+        # Assert
+        assert result.result == -2
+        assert models.result_cache is None
@@ -0,0 +1,138 @@
+from test.test_base import TestBase
+from sessions import SessionStore
+from storage import InMemoryStorage
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class RecordingStorage(InMemoryStorage):
+    def __init__(self):
+        super().__init__()
+        self.refreshed = []
+
+    def refresh_session(self, token, expires_at):
+        self.refreshed.append((token, expires_at))
+
+
+class TestSessionStore(TestBase):
+    def setup_method(self):
+        super().setup_method()
+        self.clock = FakeClock()
+        self.store = SessionStore(ttl=10, max_sessions=3, clock=self.clock)
+
+    def test_create_and_get(self):
+        # Act
+        token = self.store.create("alice")
+
+        # Assert
+        assert self.store.get(token) == "alice"
+        assert self.store.get("unknown") is None
+        assert self.store.get(None) is None
+
+    def test_tokens_are_unique(self):
+        # Act
+        tokens = {self.store.create("alice") for _ in range(3)}
+
+        # Assert
+        assert len(tokens) == 3
+
+    def test_session_expires_after_ttl(self):
+        # Arrange
+        token = self.store.create("alice")
+
+        # Act
+        self.clock.now = 10
+
+        # Assert
+        assert self.store.get(token) is None
+        assert len(self.store) == 0
+
+    def test_lookup_extends_lifetime(self):
+        # Arrange
+        token = self.store.create("alice")
+
+        # Act
+        self.clock.now = 8
+        self.store.get(token)
+        self.clock.now = 15
+
+        # Assert
+        assert self.store.get(token) == "alice"
+
+    def test_extended_lifetime_is_written_back_throttled(self):
+        # Arrange
+        backend = RecordingStorage()
+        self.store.configure(backend=backend)
+        token = self.store.create("alice")
+
+        # Act - 10% of the TTL must pass before the stored expiry is refreshed
+        self.clock.now = 0.5
+        self.store.get(token)
+        self.clock.now = 1
+        self.store.get(token)
+        self.clock.now = 1.5
+        self.store.get(token)
+
+        # Assert
+        assert backend.refreshed == [(token, 11)]
+
+    def test_least_recently_used_is_evicted_when_full(self):
+        # Arrange
+        first = self.store.create("alice")
+        second = self.store.create("bob")
+        third = self.store.create("carol")
+        self.store.get(first)
+
+        # Act
+        fourth = self.store.create("dave")
+
+        # Assert
+        assert len(self.store) == 3
+        assert self.store.get(second) is None
+        assert self.store.get(first) == "alice"
+        assert self.store.get(third) == "carol"
+        assert self.store.get(fourth) == "dave"
+
+    def test_revoke(self):
+        # Arrange
+        token = self.store.create("alice")
+
+        # Act & Assert
+        assert self.store.revoke(token) == "alice"
+        assert self.store.revoke(token) is None
+        assert self.store.get(token) is None
+
+    def test_expire_removes_in_batches(self):
+        # Arrange
+        for name in ("alice", "bob", "carol"):
+            self.store.create(name)
+        self.clock.now = 5
+        live = self.store.create("dave")
+        self.clock.now = 12
+
+        # Act & Assert
+        assert self.store.expire(limit=1) == 1
+        assert self.store.expire(limit=5) == 1
+        assert self.store.expire(limit=5) == 0
+        assert self.store.get(live) == "dave"
+
+    def test_current_user_is_per_session(self):
+        # Arrange
+        self.calculator.register_user("session_alice", "secret")
+        self.calculator.register_user("session_bob", "secret")
+        alice = self.calculator.create_session("session_alice")
+        bob = self.calculator.create_session("session_bob")
+
+        # Act
+        logged_out = self.calculator.logout(alice)
+
+        # Assert
+        assert logged_out.username == "session_alice"
+        assert self.calculator.get_current_user(alice) is None
+        assert self.calculator.get_current_user(bob).username == "session_bob"
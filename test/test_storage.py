@@ -0,0 +1,170 @@
+import sqlite3
+import threading
+from concurrent.futures import Future
+import pytest
+from test.test_base import TestBase
+from storage import InMemoryStorage
+from sqlite_storage import SQLiteStorage
+from sessions import SessionStore
+
+
+class TestStorage(TestBase):
+    @pytest.fixture(params=["memory", "sqlite"])
+    def storage(self, request, tmp_path):
+        if request.param == "memory":
+            storage = InMemoryStorage()
+        else:
+            storage = SQLiteStorage(str(tmp_path / "calculator.db"), pool_size=2)
+        yield storage
+        storage.close()
+
+    def test_add_and_get_user(self, storage):
+        # Act & Assert
+        assert storage.add_user("alice", "secret") is True
+        assert storage.add_user("alice", "other") is False
+        assert storage.get_password("alice") == "secret"
+        assert storage.get_password("bob") is None
+        assert storage.count_users() == 1
+
+    def test_set_password_replaces_existing_only(self, storage):
+        # Arrange
+        storage.add_user("alice", "secret")
+
+        # Act
+        storage.set_password("alice", "hashed")
+        storage.set_password("bob", "hashed")
+
+        # Assert
+        assert storage.get_password("alice") == "hashed"
+        assert storage.get_password("bob") is None
+
+    def test_concurrent_registrations(self, storage):
+        # Arrange
+        results = []
+        def register(i):
+            results.append(storage.add_user(f"user{i % 50}", "secret"))
+        threads = [threading.Thread(target=register, args=(i,)) for i in range(200)]
+
+        # Act
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Assert
+        assert results.count(True) == 50
+        assert storage.count_users() == 50
+
+
+class TestSQLiteStorage(TestBase):
+    def test_users_and_sessions_survive_reopen(self, tmp_path):
+        # Arrange
+        path = str(tmp_path / "calculator.db")
+        storage = SQLiteStorage(path)
+        storage.add_user("alice", "secret")
+        token = SessionStore(backend=storage).create("alice")
+        storage.close()
+
+        # Act
+        reopened = SQLiteStorage(path)
+        sessions = SessionStore(backend=reopened)
+
+        # Assert
+        assert reopened.get_password("alice") == "secret"
+        assert sessions.get(token) == "alice"
+        assert sessions.revoke(token) == "alice"
+        assert reopened.load_session(token) is None
+        reopened.close()
+
+    def test_purge_expired_sessions(self, tmp_path):
+        # Arrange
+        storage = SQLiteStorage(str(tmp_path / "calculator.db"))
+        storage.save_session("old", "alice", 10)
+        storage.save_session("new", "alice", 30)
+
+        # Act
+        removed = storage.purge_sessions(20)
+
+        # Assert
+        assert removed == 1
+        assert storage.load_session("old") is None
+        assert storage.load_session("new") == ("alice", 30)
+        storage.close()
+
+    def test_refreshed_session_survives_reopen(self, tmp_path):
+        # Arrange
+        path = str(tmp_path / "calculator.db")
+        storage = SQLiteStorage(path)
+        now = [0.0]
+        token = SessionStore(ttl=10, clock=lambda: now[0], backend=storage).create("alice")
+        now[0] = 5
+        SessionStore(ttl=10, clock=lambda: now[0], backend=storage).get(token)
+        storage.close()
+
+        # Act
+        reopened = SQLiteStorage(path)
+        now[0] = 12
+
+        # Assert
+        assert reopened.load_session(token) == ("alice", 15)
+        assert SessionStore(ttl=10, clock=lambda: now[0], backend=reopened).get(token) == "alice"
+        reopened.close()
+
+    def test_refresh_does_not_restore_a_revoked_session(self, tmp_path):
+        # Arrange
+        storage = SQLiteStorage(str(tmp_path / "calculator.db"))
+        storage.save_session("token", "alice", 10)
+        storage.delete_session("token")
+
+        # Act
+        storage.refresh_session("token", 20)
+
+        # Assert
+        assert storage.load_session("token") is None
+        storage.close()
+
+    def test_failed_write_fails_alone(self, tmp_path):
+        # Arrange - hold the writer so that the next writes are grouped in one transaction
+        storage = SQLiteStorage(str(tmp_path / "calculator.db"))
+        started, release = threading.Event(), threading.Event()
+        storage._writes.put((lambda db: started.set() or release.wait(), (), Future()))
+        started.wait()
+        def insert_twice(db, username):
+            storage._insert_user(db, username, "secret")
+            db.execute("INSERT INTO users (username, password) VALUES (?, ?)", (username, "secret"))
+        writes = [(storage._insert_user, ("alice", "secret"), Future()),
+                  (insert_twice, ("bob",), Future()),
+                  (storage._insert_user, ("carol", "secret"), Future())]
+        for write in writes:
+            storage._writes.put(write)
+
+        # Act
+        release.set()
+
+        # Assert
+        assert writes[0][2].result() is True
+        with pytest.raises(sqlite3.IntegrityError):
+            writes[1][2].result()
+        assert writes[2][2].result() is True
+        assert storage.get_password("alice") == storage.get_password("carol") == "secret"
+        assert storage.get_password("bob") is None
+        storage.close()
+
+    def test_helper_with_sqlite_storage(self, tmp_path):
+        # Arrange
+        previous = self.calculator.storage
+        storage = SQLiteStorage(str(tmp_path / "calculator.db"))
+        self.calculator.use_storage(storage)
+        try:
+            # Act
+            registered = self.calculator.register_user("sqlite_user", "secret")
+            token = self.calculator.create_session(self.calculator.login("sqlite_user", "secret"))
+
+            # Assert
+            assert registered == "sqlite_user"
+            assert self.calculator.login("admin", "test1234") == "admin"
+            assert self.calculator.get_current_user(token).username == "sqlite_user"
+            assert self.calculator.user_count() == 2
+        finally:
+            self.calculator.use_storage(previous)
+            storage.close()
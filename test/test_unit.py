@@ -1,5 +1,7 @@
+import math
 import pytest
 from test.test_base import TestBase
+from calculator_helper import CalculatorHelper
 
 
 class TestCalculatorHelper(TestBase):
@@ -110,4 +112,127 @@ class TestCalculatorHelper(TestBase):
         result = self.calculator.subtract(a, b)
         
         # Assert
-        assert result == expected
\ No newline at end of file
+        assert result == expected
+
+    @pytest.mark.parametrize("operation,values,expected", [
+        ("sum", [1, 2, 3, 4], 10),
+        ("product", [1, 2, 3, 4], 24),
+        ("min", [3, -1, 2], -1),
+        ("max", [3, -1, 2], 3),
+        ("mean", [1, 2, 3, 4], 2.5),
+        ("sum", [], 0),
+        ("product", [], 1)
+    ])
+    def test_reductions(self, operation, values, expected):
+        # Act
+        result = getattr(self.calculator, operation)(values)
+        
+        # Assert
+        assert result == expected
+    
+    def test_sum_is_exactly_rounded(self):
+        # Arrange - a left fold loses the 1.0 to cancellation
+        values = [1e16, 1.0, -1e16] + [0.1] * 10
+        
+        # Act
+        result = self.calculator.sum(values)
+        
+        # Assert
+        assert result == 2.0
+    
+    @pytest.mark.parametrize("operation,values,expected", [
+        ("sum", [1e308, 1e308], math.inf),
+        ("sum", [-1e308, -1e308, 1.0], -math.inf),
+        ("sum", [1e308] * 5 + [-1e308] * 3, math.inf)
+    ])
+    def test_overflowing_reduction_is_infinite(self, operation, values, expected):
+        # Act - the exact sum is finite but too large for a float
+        result = getattr(self.calculator, operation)(values)
+        
+        # Assert
+        assert result == expected
+    
+    @pytest.mark.parametrize("operation,values,expected", [
+        ("sum", [1e308, 1e308, -1e308, -1e308, 1.0], 1.0),
+        ("sum", [1e308] * 4 + [-1e308] * 4 + [0.1], 0.1),
+        ("sum", [1.5e308, 1.5e308, -1.5e308], 1.5e308),
+        ("mean", [1e308, 1e308, -1e308, -1e308, 5.0], 1.0),
+        ("mean", [1e308, 1e308], 1e308),
+        ("mean", [1e308, 1.7e308, 1.5e308], 1.4e308)
+    ])
+    def test_overflowing_partial_sums_stay_exact(self, operation, values, expected):
+        # Act - the partial sums overflow, the result does not
+        result = getattr(self.calculator, operation)(values)
+        
+        # Assert
+        assert result == expected
+    
+    @pytest.mark.parametrize("operation", ["min", "max", "mean"])
+    def test_reduction_of_nothing_raises_exception(self, operation):
+        # Act & Assert
+        with pytest.raises(ValueError):
+            getattr(self.calculator, operation)([])
+
+    @pytest.mark.parametrize("operation,values,expected", [
+        ("add", [1, 2, 3, 4], [1, 3, 6, 10]),
+        ("subtract", [10, 1, 2], [10, 9, 7]),
+        ("multiply", [1, 2, 3, 4], [1, 2, 6, 24]),
+        ("divide", [64, 2, 4], [64, 32, 8]),
+        ("add", [], [])
+    ])
+    def test_scan(self, operation, values, expected):
+        # Act
+        result = self.calculator.scan(operation, values)
+        
+        # Assert
+        assert result == expected
+    
+    def test_scan_divide_by_zero_raises_exception(self):
+        # Act & Assert
+        with pytest.raises(ZeroDivisionError):
+            self.calculator.scan("divide", [1, 2, 0])
+
+    def test_register_user_rejects_duplicate(self):
+        # Arrange
+        self.calculator.register_user("unit_duplicate", "secret")
+        
+        # Act
+        result = self.calculator.register_user("unit_duplicate", "other")
+        
+        # Assert
+        assert result is None
+    
+    def test_login_with_registered_user(self):
+        # Arrange
+        self.calculator.register_user("unit_login", "secret")
+        
+        # Act & Assert
+        assert self.calculator.login("unit_login", "secret") == "unit_login"
+        assert self.calculator.login("unit_login", "wrong") is None
+        assert self.calculator.login("unit_missing", "secret") is None
+    
+    def test_user_count_grows_with_registrations(self):
+        # Arrange
+        before = self.calculator.user_count()
+        
+        # Act
+        self.calculator.register_user("unit_count", "secret")
+        self.calculator.register_user("unit_count", "secret")
+        
+        # Assert
+        assert self.calculator.user_count() == before + 1
+    
+    def test_reset_drops_users_and_sessions(self):
+        # Arrange
+        self.calculator.register_user("unit_reset", "secret")
+        token = self.calculator.create_session("unit_reset")
+        
+        # Act
+        fresh = CalculatorHelper.reset()
+        
+        # Assert
+        assert fresh is not self.calculator
+        assert fresh is CalculatorHelper()
+        assert fresh.user_count() == 1  # only the admin account
+        assert fresh.get_user("unit_reset") is None
+        assert fresh.get_current_user(token) is None
@@ -0,0 +1,68 @@
+import math
+import pytest
+from test.test_base import TestBase
+import calculator_vectorized
+
+
+class TestCalculatorVectorized(TestBase):
+    def test_batch_matches_helper(self):
+        # Arrange
+        operations = ["add", "subtract", "multiply", "divide", "add"]
+        operands1 = [3, 10, 4, 10, -3]
+        operands2 = [5, 3, 5, 2, -5]
+        helper = {
+            "add": self.calculator.add,
+            "subtract": self.calculator.subtract,
+            "multiply": self.calculator.multiply,
+            "divide": self.calculator.divide,
+        }
+        expected = [helper[op](a, b) for op, a, b in zip(operations, operands1, operands2)]
+
+        # Act
+        results, errors = calculator_vectorized.calculate_batch(operations, operands1, operands2)
+
+        # Assert
+        assert results == expected
+        assert errors == [None] * len(operations)
+
+    def test_division_by_zero_fills_error_slot(self):
+        # Act
+        results, errors = calculator_vectorized.calculate_batch(
+            ["divide", "add", "divide"], [1, 1, 0], [0, 2, 0])
+
+        # Assert
+        assert results == [None, 3, None]
+        assert errors == [calculator_vectorized.ZERO_DIVISION, None, calculator_vectorized.ZERO_DIVISION]
+
+    def test_overflow_fills_error_slot(self):
+        # Act
+        results, errors = calculator_vectorized.calculate_batch(["multiply"], [1e308], [10])
+
+        # Assert
+        assert results == [None]
+        assert errors == [calculator_vectorized.NOT_FINITE]
+
+    def test_empty_batch(self):
+        # Act
+        results, errors = calculator_vectorized.calculate_batch([], [], [])
+
+        # Assert
+        assert results == []
+        assert errors == []
+
+    def test_unknown_operation_raises_exception(self):
+        # Act & Assert
+        with pytest.raises(KeyError):
+            calculator_vectorized.calculate_batch(["power"], [2], [3])
+
+    def test_single_group_uses_whole_array(self):
+        # Arrange
+        operands = list(range(1, 1001))
+
+        # Act
+        results, errors = calculator_vectorized.calculate_batch(["multiply"] * 1000, operands, operands)
+
+        # Assert
+        assert results == [float(x * x) for x in operands]
+        assert not any(errors)
+        assert math.isclose(sum(results), sum(x * x for x in operands))
@@ -0,0 +1,231 @@
+import json
+import math
+import os
+import sys
+from urllib.parse import urlparse
+
+# Add the BE directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'BE'))
+
+from pydantic import ValidationError
+from calculator_helper import CalculatorHelper
+from models import Calculation, User, UserResponse
+from passwords import PasswordHasher
+
+# name of the session cookie, see calculator_rest_service.SESSION_COOKIE
+SESSION_COOKIE = 'session'
+
+JSON = {'content-type': 'application/json'}
+
+
+class StubCalculator(CalculatorHelper):
+    '''
+        A CalculatorHelper of the stub alone.
+
+        It has its own users, sessions and cheap password hasher, the
+        instance shared with a service running in the same process, e.g.
+        the in-process API of test/conftest.py, is left untouched.
+    '''
+    def __new__(cls):
+        return object.__new__(cls)
+
+    def __init__(self):
+        super().__init__()
+        # the stub runs in the test process, hashes only need to be distinct
+        self.hasher = PasswordHasher('pbkdf2', 1, workers=1)
+
+
+class ApiStub():
+    '''
+        Fast in-memory stand-in for the calculator API used by the web tests.
+
+        Requests are answered with the models of BE/models.py and a
+        StubCalculator of its own, but without the HTTP server, the artificial login
+        latency and the slow password hashes. install() routes the API calls
+        of a Playwright browser context, WebSocket calculations included, to
+        the stub, so UI tests run at UI speed and need no backend for the API.
+        test/test_api_stub.py replays the same requests against the real
+        service and the stub, and fails when their answers drift apart.
+    '''
+    # API routes answered by the stub, every other request reaches the server
+    ROUTES = ('/calculate', '/register', '/login', '/logout', '/users/current')
+    WEBSOCKET = '/ws/calculate'
+
+    def __init__(self):
+        self.calculator = StubCalculator()
+
+    def handle(self, method, path, headers=None, body=None):
+        """
+        Answer one API request.
+
+        Args:
+            method (str): The HTTP method.
+            path (str): The request path.
+            headers (dict, optional): Request headers with lowercase names.
+            body (str | bytes, optional): The request body.
+
+        Returns:
+            tuple: The status code, the response headers and the response
+            body as bytes.
+        """
+        headers = headers or {}
+        handlers = {
+            ('POST', '/calculate'): self.calculate,
+            ('POST', '/register'): self.register,
+            ('POST', '/login'): self.login,
+            ('POST', '/logout'): self.logout,
+            ('GET', '/users/current'): self.current_user,
+        }
+        handler = handlers.get((method.upper(), path))
+        if handler is None:
+            if path in self.ROUTES:
+                return _json(405, {'detail': 'Method Not Allowed'})
+            return _json(404, {'detail': 'Not Found'})
+        try:
+            return handler(body, self._token(headers))
+        except ValidationError as e:
+            return _json(422, {'detail': [{**error, 'loc': ['body', *error['loc']]}
+                                          for error in e.errors(include_url=False)]})
+
+    def calculate(self, body, token):
+        calculation = Calculation.model_validate_json(body or b'')
+        try:
+            return _json(200, calculation.calculate())
+        except Exception as e:
+            return _json(500, {'detail': str(e)})
+
+    def register(self, body, token):
+        user = User.model_validate_json(body or b'')
+        username = self.calculator.register_user(user.username, user.password)
+        if username is None:
+            return _json(409, {'detail': 'User already exists.'})
+        return _json(200, UserResponse(username=username))
+
+    def login(self, body, token):
+        user = User.model_validate_json(body or b'')
+        result = self._login(user.username, user.password)
+        if result is None:
+            return _json(400, {'detail': 'Wrong username of password.'})
+        status, headers, content = _json(200, result)
+        headers['set-cookie'] = f'{SESSION_COOKIE}={result.token}; HttpOnly; Path=/; SameSite=lax'
+        return status, headers, content
+
+    def logout(self, body, token):
+        user = self.calculator.logout(token)
+        if user is None:
+            return 204, {}, b''
+        status, headers, content = _json(200, UserResponse(username=user.username))
+        headers['set-cookie'] = f'{SESSION_COOKIE}=""; expires=Thu, 01 Jan 1970 00:00:00 GMT; Max-Age=0; Path=/; SameSite=lax'
+        return status, headers, content
+
+    def current_user(self, body, token):
+        user = self.calculator.get_current_user(token)
+        if user is None:
+            return 204, {}, b''
+        return _json(200, UserResponse(username=user.username))
+
+    def calculate_message(self, message):
+        """
+        Answer one message of the /ws/calculate WebSocket.
+
+        Args:
+            message (str): A JSON encoded Calculation with an optional 'id'.
+
+        Returns:
+            str: JSON encoded reply with the same 'id' and a 'result', null
+            if it is not finite, or a 'detail'.
+        """
+        try:
+            data = json.loads(message)
+        except ValueError as e:
+            return json.dumps({'id': None, 'detail': f'Invalid JSON: {e}'})
+        request_id = data.get('id') if isinstance(data, dict) else None
+        try:
+            result = Calculation.model_validate(data).calculate().result
+            reply = {'id': request_id, 'result': result if math.isfinite(result) else None}
+        except Exception as e:
+            reply = {'id': request_id, 'detail': str(e)}
+        return json.dumps(reply)
+
+    def _login(self, username, password):
+        username = self.calculator.login(username, password)
+        if username is None:
+            return None
+        return UserResponse(username=username, token=self.calculator.create_session(username))
+
+    def _token(self, headers):
+        scheme, _, token = headers.get('authorization', '').partition(' ')
+        if scheme.lower() == 'bearer' and token.strip():
+            return token.strip()
+        for cookie in headers.get('cookie', '').split(';'):
+            name, _, value = cookie.strip().partition('=')
+            if name == SESSION_COOKIE and value:
+                return value
+        return None
+
+    def storage_state(self, origin, username, password):
+        """
+        Log a user in to the stub and build the browser storage state of the session.
+
+        Args:
+            origin (str): Origin of the web calculator, e.g. 'http://localhost:8080'.
+            username (str): The username.
+            password (str): The password.
+
+        Returns:
+            dict: Playwright storage state holding the session token in localStorage.
+        """
+        result = self._login(username, password)
+        return {'cookies': [], 'origins': [{
+            'origin': origin,
+            'localStorage': [{'name': 'sessionToken', 'value': result.token}],
+        }]}
+
+    def install(self, context):
+        """
+        Route the API requests of a Playwright browser context to the stub.
+
+        Args:
+            context (playwright.sync_api.BrowserContext): The browser context.
+        """
+        context.route(lambda url: urlparse(url).path in self.ROUTES, self._fulfill)
+        context.route_web_socket(lambda url: urlparse(url).path == self.WEBSOCKET, self._connect)
+
+    def _fulfill(self, route):
+        request = route.request
+        request_headers = request.all_headers()
+        # the page calls the API on another origin, see API_URL in test_base.py,
+        # the answers carry the headers of the CORSMiddleware of the service
+        cors = {'access-control-allow-origin': request_headers.get('origin', '*'),
+                'access-control-allow-credentials': 'true'}
+        if request.method == 'OPTIONS':
+            route.fulfill(status=200, headers={
+                **cors,
+                'access-control-allow-methods': request_headers.get('access-control-request-method', '*'),
+                'access-control-allow-headers': request_headers.get('access-control-request-headers', '*'),
+            })
+            return
+        status, headers, body = self.handle(request.method, urlparse(request.url).path,
+                                            request_headers, request.post_data_buffer)
+        route.fulfill(status=status, headers={**headers, **cors}, body=body)
+
+    def _connect(self, websocket):
+        # not connected to the server, every message is answered by the stub
+        websocket.on_message(lambda message: websocket.send(self.calculate_message(message)))
+
+
+def _json(status, content):
+    """
+    Build a JSON response.
+
+    Args:
+        status (int): The status code.
+        content (dict | pydantic.BaseModel): The response body.
+
+    Returns:
+        tuple: The status code, the headers and the encoded body.
+    """
+    if hasattr(content, 'model_dump_json'):
+        # like FastAPI, non-finite floats become null
+        return status, dict(JSON), content.model_dump_json().encode('utf-8')
+    return status, dict(JSON), json.dumps(content, default=str).encode('utf-8')
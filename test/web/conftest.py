@@ -0,0 +1,56 @@
+# pip install playwright
+# playwright install
+
+import os
+import pytest
+from playwright.sync_api import sync_playwright
+from test.web.test_base import APP_URL, API_URL, ADMIN, SESSION_TOKEN_KEY
+
+
+def pytest_addoption(parser):
+    parser.addoption('--real-backend', action='store_true', default=os.environ.get('WEB_BACKEND') == 'real',
+                     help='Send the API calls of all web tests to the real service instead of the API stub '
+                          '(env WEB_BACKEND=real)')
+
+
+@pytest.fixture(scope='session')
+def playwright():
+    with sync_playwright() as playwright:
+        yield playwright
+
+
+@pytest.fixture(scope='session')
+def browser(playwright):
+    """
+    One Chromium per session, i.e. per pytest-xdist worker. Tests get their
+    own context from it, which isolates cookies and storage between tests
+    at a fraction of the cost of a new browser.
+    """
+    browser = playwright.chromium.launch(headless=True, args=["--disable-search-engine-choice-screen"])
+    yield browser
+    browser.close()
+
+
+@pytest.fixture(scope='session')
+def admin_storage_state(playwright):
+    """
+    Browser storage state of a logged in admin.
+
+    The admin logs in once per session through the API at API_URL, the
+    slow login is paid once instead of in every test. A context created
+    with this state opens the calculator already authenticated, as the web
+    calculator only needs the session token in the localStorage of its
+    own origin, APP_URL.
+    """
+    request = playwright.request.new_context(base_url=API_URL)
+    try:
+        response = request.post('/login', data=ADMIN)
+        assert response.ok, f'admin login failed with {response.status}'
+        state = request.storage_state()
+        state['origins'] = [{
+            'origin': APP_URL,
+            'localStorage': [{'name': SESSION_TOKEN_KEY, 'value': response.json()['token']}],
+        }]
+        return state
+    finally:
+        request.dispose()
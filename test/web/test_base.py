@@ -1,27 +1,56 @@
 # pip install playwright
 # playwright install
 
-from playwright.sync_api import sync_playwright
+import os
+import pytest
+
+# the web calculator served by nginx
+APP_URL = os.environ.get('APP_URL', 'http://localhost:8080').rstrip('/')
+
+# the calculator API the page talks to, see remoteServerAddress in FE/Dockerfile
+API_URL = os.environ.get('API_URL', 'http://localhost:5001').rstrip('/')
+
+# key of the session token in the localStorage of the web calculator, see FE/script.js
+SESSION_TOKEN_KEY = 'sessionToken'
+
+ADMIN = {'username': 'admin', 'password': 'test1234'}
 
 class WebBase:
-    def setup_method(self):
-        self.app_url = 'http://localhost:8080'
-        
-        # ---- Playwright startup
-        self._pw = sync_playwright().start()
-        self._browser = self._pw.chromium.launch(headless=True, args=["--disable-search-engine-choice-screen"])
-        self._context = self._browser.new_context(viewport={"width": 1920, "height": 1080})
+    # open the calculator with the admin logged in, skipping the login page,
+    # see conftest.admin_storage_state
+    authenticated = False
+
+    # 'stub' answers the API calls of the page with ApiStub at UI speed,
+    # 'real' sends them to the service, see conftest --real-backend
+    backend = 'stub'
+
+    @pytest.fixture(autouse=True)
+    def setup_page(self, browser, request):
+        self.app_url = APP_URL
+
+        # ---- fresh context of the shared browser, nothing leaks between tests
+        options = {"viewport": {"width": 1920, "height": 1080}}
+        self.api_stub = None
+        if self.backend == 'stub' and not request.config.getoption("--real-backend"):
+            # imported here, runs against the real backend need none of its packages
+            from test.web.api_stub import ApiStub
+            self.api_stub = ApiStub()
+            if self.authenticated:
+                options["storage_state"] = self.api_stub.storage_state(APP_URL, ADMIN["username"], ADMIN["password"])
+        elif self.authenticated:
+            options["storage_state"] = request.getfixturevalue("admin_storage_state")
+        self._context = browser.new_context(**options)
+        if self.api_stub is not None:
+            self.api_stub.install(self._context)
         self.page = self._context.new_page()
-        
+
         # Set default timeouts
-        self.page.set_default_navigation_timeout(15000) 
-        self.page.set_default_timeout(15000)           
+        self.page.set_default_navigation_timeout(15000)
+        self.page.set_default_timeout(15000)
 
         # Go to application
-        self.page.goto(self.app_url)
+        self.page.goto(f"{self.app_url}/index.html" if self.authenticated else self.app_url)
+        yield
 
-    def teardown_method(self):
-        # Close the browser
+        # Close the context, the browser stays open for the next test
         self._context.close()
-        self._browser.close()
-        self._pw.stop()
@@ -5,6 +5,9 @@ from playwright.sync_api import expect
 import pytest
 
 class TestFullWorkflow(WebBase):
+    # the end-to-end check of the UI against the real service
+    backend = 'real'
+
     def test_complete_user_session(self):
         """Test a complete user session from login to logout"""
         # Start at login page
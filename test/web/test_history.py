@@ -1,18 +1,15 @@
 from test.web.test_base import WebBase
-from test.web.pages.login_page import LoginPage
 from test.web.pages.calculator_page import CalculatorPage
 from playwright.sync_api import expect
 import pytest
 
 class TestHistory(WebBase):
-    def setup_method(self):
-        """Setup for each test - login first"""
-        super().setup_method()
-        # Go to login page and login
-        self.page.goto(f"{self.app_url}/login.html")
-        LoginPage(self.page).login(username="admin", password="test1234")
-        
-        # Wait for redirect to calculator
+    # start logged in, the login page itself is covered by TestLogin
+    authenticated = True
+
+    @pytest.fixture(autouse=True)
+    def setup_calculator(self, setup_page):
+        """Setup for each test - the calculator page of the logged in admin"""
         expect(self.page).to_have_url(f"{self.app_url}/index.html")
         self.calculator = CalculatorPage(self.page)
 
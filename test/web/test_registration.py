@@ -4,7 +4,7 @@ from test.web.pages.register_page import RegisterPage
 from test.web.pages.calculator_page import CalculatorPage
 from playwright.sync_api import expect
 import pytest
-import time
+import uuid
 
 class TestRegistration(WebBase):
     def test_register_new_user(self):
@@ -22,7 +22,7 @@ class TestRegistration(WebBase):
         expect(self.page).to_have_url(f"{self.app_url}/register.html")
         
         # Register new user with unique username
-        username = f"testuser_{int(time.time())}"
+        username = f"testuser_{uuid.uuid4().hex[:12]}"  # unique across parallel workers
         password = "testpass123"
         
         register_page.register_user(username, password)